@@ -1,6 +1,7 @@
 """Pacote principal da API mock de impacto social."""
 
 __all__ = [
+    "indexes",
     "main",
     "models",
     "routers",
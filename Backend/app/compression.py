@@ -0,0 +1,257 @@
+"""Compressao gzip/brotli negociada por ``Accept-Encoding`` com cache de corpos versionados."""
+
+from __future__ import annotations
+
+import gzip
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.requests import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .http_cache import collection_etag, etag_matches
+from .storage import fetch_config
+
+DEFAULT_MIN_BYTES = 1024
+DEFAULT_CACHE_MAX_BYTES = 32 * 1024 * 1024
+# Corpos cacheados sao comprimidos uma vez: vale pagar o nivel mais alto.
+_CACHED_LEVEL = {"gzip": 9, "br": 9}
+_STREAM_LEVEL = {"gzip": 6, "br": 5}
+_SKIPPED_TYPES = ("text/event-stream",)
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli e opcional
+    brotli = None
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Melhor codificacao aceita pelo cliente: ``br`` (se disponivel), ``gzip`` ou nenhuma."""
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[name] = weight
+    candidates = (["br"] if brotli is not None else []) + ["gzip"]
+    best = max(candidates, key=lambda name: weights.get(name, weights.get("*", 0.0)))
+    return best if weights.get(best, weights.get("*", 0.0)) > 0 else None
+
+
+def compress(body: bytes, encoding: str, level: int) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=level)
+    return gzip.compress(body, compresslevel=level, mtime=0)
+
+
+class _StreamCompressor:
+    """Compressao incremental: cada bloco sai descarregado para nao segurar o streaming."""
+
+    def __init__(self, encoding: str) -> None:
+        self._encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=_STREAM_LEVEL["br"])
+        else:
+            self._zlib = zlib.compressobj(_STREAM_LEVEL["gzip"], zlib.DEFLATED, 31)
+
+    def chunk(self, data: bytes) -> bytes:
+        if self._encoding == "br":
+            return self._brotli.process(data) + self._brotli.flush()
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self._encoding == "br":
+            return self._brotli.finish()
+        return self._zlib.flush()
+
+
+class CompressedResponseCache:
+    """LRU limitado em bytes de corpos comprimidos, chaveado por rota + codificacao."""
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple[str, ...], Dict[str, Any]]" = OrderedDict()
+        self._size = 0
+
+    def get(self, key: Tuple[str, ...]) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key: Tuple[str, ...], entry: Dict[str, Any]) -> None:
+        self.discard(key)
+        if len(entry["body"]) > self.max_bytes:
+            return
+        self._entries[key] = entry
+        self._size += len(entry["body"])
+        while self._size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._size -= len(evicted["body"])
+
+    def discard(self, key: Tuple[str, ...]) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= len(entry["body"])
+
+
+_RESPONSE_CACHE: Optional[CompressedResponseCache] = None
+
+
+def get_response_cache() -> CompressedResponseCache:
+    global _RESPONSE_CACHE
+    if _RESPONSE_CACHE is None:
+        config = fetch_config()
+        _RESPONSE_CACHE = CompressedResponseCache(int(config.get("response_cache_max_bytes", DEFAULT_CACHE_MAX_BYTES)))
+    return _RESPONSE_CACHE
+
+
+class CompressionMiddleware:
+    """Comprime respostas conforme ``Accept-Encoding``.
+
+    GETs marcados pela dependencia ``versioned`` tem o corpo comprimido guardado
+    junto do ETag e das colecoes envolvidas; enquanto as versoes nao mudam, as
+    repeticoes sao respondidas do cache sem executar a rota nem comprimir de novo.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: Optional[int] = None) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        encoding = negotiate_encoding(headers.get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        cache = get_response_cache()
+        key: Optional[Tuple[str, ...]] = None
+        if scope["method"] == "GET":
+            query = scope.get("query_string", b"").decode("latin-1")
+            key = (scope["path"], query, headers.get("accept", ""), encoding)
+            entry = cache.get(key)
+            if entry is not None:
+                request = Request(scope)
+                if collection_etag(request, *entry["collections"], extra=entry["extra"]) == entry["etag"]:
+                    await self._send_cached(request, entry, send)
+                    return
+                cache.discard(key)
+
+        minimum_size = self.minimum_size
+        if minimum_size is None:
+            minimum_size = int(fetch_config().get("compression_min_bytes", DEFAULT_MIN_BYTES))
+        responder = _CompressingSend(send, encoding, minimum_size, scope, cache, key)
+        await self.app(scope, receive, responder.send)
+
+    @staticmethod
+    async def _send_cached(request: Request, entry: Dict[str, Any], send: Send) -> None:
+        if etag_matches(request, entry["etag"]):
+            await send({"type": "http.response.start", "status": 304, "headers": [(b"etag", entry["etag"].encode())]})
+            await send({"type": "http.response.body", "body": b""})
+            return
+        await send({"type": "http.response.start", "status": 200, "headers": entry["headers"]})
+        await send({"type": "http.response.body", "body": entry["body"]})
+
+
+class _CompressingSend:
+    def __init__(
+        self,
+        send: Send,
+        encoding: str,
+        minimum_size: int,
+        scope: Scope,
+        cache: CompressedResponseCache,
+        key: Optional[Tuple[str, ...]],
+    ) -> None:
+        self._send = send
+        self._encoding = encoding
+        self._minimum_size = minimum_size
+        self._scope = scope
+        self._cache = cache
+        self._key = key
+        self._start: Optional[Message] = None
+        self._passthrough = False
+        self._stream: Optional[_StreamCompressor] = None
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            content_type = headers.get("content-type", "")
+            self._passthrough = (
+                message["status"] != 200
+                or "content-encoding" in headers
+                or content_type.startswith(_SKIPPED_TYPES)
+            )
+            if self._passthrough:
+                await self._send(message)
+            else:
+                self._start = message
+            return
+        if message["type"] != "http.response.body" or self._passthrough:
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self._stream is None and not more_body:
+            await self._send_whole(body)
+            return
+        if self._stream is None:
+            self._stream = _StreamCompressor(self._encoding)
+            headers = self._encoded_headers(None)
+            await self._send({**self._start, "headers": headers.raw})
+        payload = self._stream.chunk(body) if body else b""
+        if not more_body:
+            payload += self._stream.finish()
+        await self._send({"type": "http.response.body", "body": payload, "more_body": more_body})
+
+    async def _send_whole(self, body: bytes) -> None:
+        if len(body) < self._minimum_size:
+            await self._send(self._start)
+            await self._send({"type": "http.response.body", "body": body})
+            return
+        state = self._scope.get("state", {})
+        cacheable = self._key is not None and "etag_collections" in state
+        level = (_CACHED_LEVEL if cacheable else _STREAM_LEVEL)[self._encoding]
+        compressed = compress(body, self._encoding, level)
+        headers = self._encoded_headers(len(compressed))
+        if cacheable:
+            self._cache.put(
+                self._key,
+                {
+                    "etag": state["etag"],
+                    "collections": state["etag_collections"],
+                    "extra": state.get("etag_extra"),
+                    "headers": headers.raw,
+                    "body": compressed,
+                },
+            )
+        await self._send({**self._start, "headers": headers.raw})
+        await self._send({"type": "http.response.body", "body": compressed})
+
+    def _encoded_headers(self, length: Optional[int]) -> MutableHeaders:
+        headers = MutableHeaders(raw=list(self._start["headers"]))
+        headers["content-encoding"] = self._encoding
+        headers.add_vary_header("Accept-Encoding")
+        if length is None:
+            del headers["content-length"]
+        else:
+            headers["content-length"] = str(length)
+        return headers
+
+
+__all__ = ["CompressedResponseCache", "CompressionMiddleware", "get_response_cache", "negotiate_encoding"]
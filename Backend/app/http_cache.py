@@ -0,0 +1,76 @@
+"""ETags derivados das versoes das colecoes para respostas condicionais (304)."""
+
+from __future__ import annotations
+
+import hashlib
+import secrets
+from typing import Any, Callable, Iterable, Mapping, Optional
+
+from fastapi import Request, Response
+
+from .storage import collection_version
+
+# Versoes recomecam a cada processo; o marcador evita colidir com ETags de uma execucao anterior.
+_EPOCH = secrets.token_hex(4)
+
+
+EtagExtra = Callable[[], Any]
+
+
+def collection_etag(request: Request, *collections: str, extra: Optional[EtagExtra] = None) -> str:
+    """ETag fraco a partir das versoes das colecoes, do caminho, dos parametros (zona inclusa) e do ``Accept``.
+
+    ``extra`` devolve um marcador adicional para estados que mudam sem escrita em colecao.
+    """
+    versions = ",".join(f"{name}:{collection_version(name)}" for name in collections)
+    if extra is not None:
+        versions += f",extra:{extra()}"
+    query = "&".join(sorted(f"{key}={value}" for key, value in request.query_params.multi_items()))
+    # ``Accept`` escolhe entre JSON e NDJSON na mesma URL.
+    accept = request.headers.get("accept", "")
+    digest = hashlib.sha1(f"{request.url.path}?{query}|{accept}|{versions}".encode("utf-8")).hexdigest()[:20]
+    return f'W/"{_EPOCH}-{digest}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return "*" in candidates or etag.removeprefix("W/") in candidates
+
+
+def versioned(
+    *collections: str,
+    expansions: Optional[Mapping[str, Iterable[str]]] = None,
+    extra: Optional[EtagExtra] = None,
+    body_cache: bool = True,
+) -> Callable[[Request, Response], Optional[Response]]:
+    """Dependencia que devolve um 304 pronto quando ``If-None-Match`` confere; senao marca o ETag.
+
+    ``expansions`` mapeia valores de ``?expand=`` para as colecoes extras que eles leem;
+    ``extra`` entra no ETag como em ``collection_etag``. Rotas com efeitos a cada
+    chamada (revalidacao em segundo plano) passam ``body_cache=False``: o cache de
+    corpos comprimidos responderia sem executa-las.
+    """
+
+    def dependency(request: Request, response: Response) -> Optional[Response]:
+        involved = list(collections)
+        for name in (request.query_params.get("expand") or "").split(","):
+            involved.extend((expansions or {}).get(name.strip(), ()))
+        involved = tuple(dict.fromkeys(involved))
+        etag = collection_etag(request, *involved, extra=extra)
+        if etag_matches(request, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        response.headers["ETag"] = etag
+        # Respostas devolvidas pela rota (streaming) nao herdam estes cabecalhos; o cache comprimido usa ambos.
+        request.state.etag = etag
+        if body_cache:
+            request.state.etag_collections = involved
+            request.state.etag_extra = extra
+        return None
+
+    return dependency
+
+
+__all__ = ["collection_etag", "etag_matches", "versioned"]
@@ -0,0 +1,35 @@
+"""Indices em memoria derivados das colecoes e mantidos a cada escrita."""
+
+from .components import HouseholdComponents, get_household_components
+from .graph import GraphIndex, get_graph_index
+from .name_search import NAME_FIELDS, NameSearchIndex, get_name_search_index, normalize_name
+from .spatial import SPATIAL_COLLECTIONS, SpatialGridIndex, get_spatial_index
+from .student_search import StudentSearchIndex, get_student_search_index
+from .tiles import MAX_TILE_ZOOM, TILE_COLLECTIONS, TileGridIndex, get_tile_index, tile_bounds
+from .zone_stats import STATS_COLLECTIONS, ZoneStatsIndex, get_zone_stats, rebuild_zone_stats, zone_stats_generation
+
+__all__ = [
+    "GraphIndex",
+    "HouseholdComponents",
+    "MAX_TILE_ZOOM",
+    "NAME_FIELDS",
+    "NameSearchIndex",
+    "SPATIAL_COLLECTIONS",
+    "STATS_COLLECTIONS",
+    "SpatialGridIndex",
+    "StudentSearchIndex",
+    "TILE_COLLECTIONS",
+    "TileGridIndex",
+    "ZoneStatsIndex",
+    "get_graph_index",
+    "get_household_components",
+    "get_name_search_index",
+    "get_spatial_index",
+    "get_student_search_index",
+    "get_tile_index",
+    "get_zone_stats",
+    "normalize_name",
+    "rebuild_zone_stats",
+    "tile_bounds",
+    "zone_stats_generation",
+]
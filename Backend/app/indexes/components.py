@@ -0,0 +1,192 @@
+"""Componentes de domicilios ligados (union-find) e vinculos voluntario-familia."""
+
+from __future__ import annotations
+
+import threading
+from typing import Dict, List, Optional, Set, Tuple
+
+from ..storage import ensure_indexed, register_index
+
+COMPONENT_COLLECTIONS = ("families", "relationships", "students", "assignments")
+
+Pair = Tuple[str, str]
+
+
+def _row_pairs(collection: str, row: dict) -> List[Pair]:
+    """Pares de nos que uma linha une: familia-membro ou pessoa-pessoa."""
+    if collection == "families":
+        return [(row["id"], member["person_id"]) for member in row.get("household", [])]
+    if collection == "relationships":
+        return [(row["from_person_id"], row["to_person_id"])]
+    return []
+
+
+class HouseholdComponents:
+    """Union-find sobre familias e pessoas, unido a cada escrita.
+
+    Uniao e incremental; remover uma ligacao nao tem inversa no union-find, entao
+    nesse caso a estrutura e marcada como suja e reconstruida na proxima leitura a
+    partir dos pares ja retidos em memoria (sem reler arquivos).
+    """
+
+    def __init__(self) -> None:
+        self._pairs: Dict[str, Dict[str, List[Pair]]] = {"families": {}, "relationships": {}}
+        self._parent: Dict[str, str] = {}
+        self._families: Dict[str, List[str]] = {}
+        self._persons: Dict[str, int] = {}
+        self._dirty = False
+        self._student_family: Dict[str, str] = {}
+        self._student_volunteer: Dict[str, str] = {}
+        self._volunteer_students: Dict[str, Set[str]] = {}
+        self.generation = 0
+        self._lock = threading.RLock()
+
+    # -- ganchos do armazenamento -------------------------------------------------
+
+    def rebuild(self, collection: str, rows: List[dict]) -> None:
+        with self._lock:
+            self.generation += 1
+            if collection == "students":
+                self._student_family = {row["id"]: row["family_id"] for row in rows}
+            elif collection == "assignments":
+                self._student_volunteer = {}
+                self._volunteer_students = {}
+                for row in rows:
+                    self._link(row["student_id"], row["volunteer_id"])
+            else:
+                self._pairs[collection] = {row["id"]: _row_pairs(collection, row) for row in rows}
+                self._dirty = True
+
+    def apply(self, collection: str, old: Optional[dict], new: Optional[dict]) -> None:
+        with self._lock:
+            self.generation += 1
+            if collection == "students":
+                if old is not None:
+                    self._student_family.pop(old["id"], None)
+                if new is not None:
+                    self._student_family[new["id"]] = new["family_id"]
+            elif collection == "assignments":
+                if old is not None:
+                    self._unlink(old["student_id"])
+                if new is not None:
+                    self._link(new["student_id"], new["volunteer_id"])
+            else:
+                self._apply_pairs(collection, old, new)
+
+    def _apply_pairs(self, collection: str, old: Optional[dict], new: Optional[dict]) -> None:
+        owned = self._pairs[collection]
+        previous = set(owned.pop(old["id"], [])) if old is not None else set()
+        current = _row_pairs(collection, new) if new is not None else []
+        if new is not None:
+            owned[new["id"]] = current
+        if not previous.issubset(current):
+            self._dirty = True
+        elif not self._dirty:
+            for left, right in current:
+                self._union(left, right)
+
+    def _link(self, student_id: str, volunteer_id: str) -> None:
+        self._unlink(student_id)
+        self._student_volunteer[student_id] = volunteer_id
+        self._volunteer_students.setdefault(volunteer_id, set()).add(student_id)
+
+    def _unlink(self, student_id: str) -> None:
+        volunteer_id = self._student_volunteer.pop(student_id, None)
+        if volunteer_id is None:
+            return
+        students = self._volunteer_students.get(volunteer_id)
+        if students is not None:
+            students.discard(student_id)
+            if not students:
+                del self._volunteer_students[volunteer_id]
+
+    # -- union-find ----------------------------------------------------------------
+
+    def _add_node(self, node: str) -> None:
+        if node in self._parent:
+            return
+        self._parent[node] = node
+        self._families[node] = [node] if node.startswith("F") else []
+        self._persons[node] = 0 if node.startswith("F") else 1
+
+    def _find(self, node: str) -> str:
+        root = node
+        while self._parent[root] != root:
+            root = self._parent[root]
+        while self._parent[node] != root:
+            self._parent[node], node = root, self._parent[node]
+        return root
+
+    def _union(self, left: str, right: str) -> None:
+        self._add_node(left)
+        self._add_node(right)
+        left, right = self._find(left), self._find(right)
+        if left == right:
+            return
+        # Une o menor ao maior para manter as listas de familias baratas de fundir.
+        if len(self._families[left]) + self._persons[left] < len(self._families[right]) + self._persons[right]:
+            left, right = right, left
+        self._parent[right] = left
+        self._families[left].extend(self._families.pop(right))
+        self._persons[left] += self._persons.pop(right)
+
+    def _refresh(self) -> None:
+        if not self._dirty:
+            return
+        self._parent, self._families, self._persons = {}, {}, {}
+        for owned in self._pairs.values():
+            for pairs in owned.values():
+                for left, right in pairs:
+                    self._union(left, right)
+        self._dirty = False
+
+    # -- consultas -------------------------------------------------------------------
+
+    def component_of(self, node: str) -> Optional[Tuple[str, List[str], int]]:
+        """Raiz, familias e numero de pessoas do componente que contem ``node``."""
+        with self._lock:
+            self._refresh()
+            if node not in self._parent:
+                return None
+            root = self._find(node)
+            return root, list(self._families[root]), self._persons[root]
+
+    def components(self) -> List[Tuple[str, List[str], int]]:
+        with self._lock:
+            self._refresh()
+            return [(root, list(families), self._persons[root]) for root, families in self._families.items()]
+
+    def volunteer_households(self) -> Dict[str, Dict[str, List[str]]]:
+        """Para cada voluntario, as familias atendidas e os alunos de cada uma."""
+        with self._lock:
+            served: Dict[str, Dict[str, List[str]]] = {}
+            for volunteer_id, students in self._volunteer_students.items():
+                families = served.setdefault(volunteer_id, {})
+                for student_id in sorted(students):
+                    family_id = self._student_family.get(student_id)
+                    if family_id is not None:
+                        families.setdefault(family_id, []).append(student_id)
+            return served
+
+    def root_of(self, node: str) -> Optional[str]:
+        with self._lock:
+            self._refresh()
+            return self._find(node) if node in self._parent else None
+
+
+_COMPONENTS = HouseholdComponents()
+for _collection in COMPONENT_COLLECTIONS:
+    register_index(
+        _collection,
+        lambda rows, name=_collection: _COMPONENTS.rebuild(name, rows),
+        lambda old, new, name=_collection: _COMPONENTS.apply(name, old, new),
+    )
+
+
+def get_household_components() -> HouseholdComponents:
+    """Indice sincronizado com os arquivos atuais."""
+    ensure_indexed(*COMPONENT_COLLECTIONS)
+    return _COMPONENTS
+
+
+__all__ = ["HouseholdComponents", "get_household_components"]
@@ -0,0 +1,153 @@
+"""Indice de adjacencia do grafo social (alunos, pessoas, familias e voluntarios)."""
+
+from __future__ import annotations
+
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from ..storage import ensure_indexed, register_index
+
+# (id, origem, destino, tipo, atributos extras)
+Edge = Tuple[str, str, str, str, dict]
+
+GRAPH_COLLECTIONS = ("students", "families", "relationships", "assignments")
+_ROW_KEYS = {"students": "id", "families": "id", "relationships": "id", "assignments": "student_id"}
+# Colecao onde cada tipo de no e resolvido.
+NODE_COLLECTIONS = {"student": "students", "person": "persons", "family": "families", "volunteer": "volunteers"}
+
+
+def _row_edges(collection: str, row: dict) -> List[Tuple[Edge, str, str]]:
+    """Arestas derivadas de uma linha, com o tipo de no de cada ponta."""
+    if collection == "students":
+        return [
+            ((f"E{row['person_id']}{row['id']}", row["person_id"], row["id"], "self_profile", {}), "person", "student"),
+            ((f"E{row['id']}{row['family_id']}", row["id"], row["family_id"], "member_of", {}), "student", "family"),
+        ]
+    if collection == "families":
+        return [
+            ((f"E{row['id']}{member['person_id']}", row["id"], member["person_id"], member["role"], {}), "family", "person")
+            for member in row.get("household", [])
+        ]
+    if collection == "relationships":
+        edge = (row["id"], row["from_person_id"], row["to_person_id"], row["type"], {"weight": row.get("weight", 1.0)})
+        return [(edge, "person", "person")]
+    if collection == "assignments":
+        edge = (
+            f"assign-{row['student_id']}-{row['volunteer_id']}",
+            row["student_id"],
+            row["volunteer_id"],
+            "assigned_to",
+            {"distance_km": row.get("distance_km")},
+        )
+        return [(edge, "student", "volunteer")]
+    return []
+
+
+class GraphIndex:
+    """Listas de adjacencia mantidas pelos ganchos de escrita do armazenamento."""
+
+    def __init__(self) -> None:
+        self._edges: Dict[str, Edge] = {}
+        self._adjacency: Dict[str, Dict[str, None]] = {}
+        self._kinds: Dict[str, str] = {}
+        self._owned: Dict[str, Dict[str, List[str]]] = {name: {} for name in GRAPH_COLLECTIONS}
+        self._lock = threading.RLock()
+
+    def rebuild(self, collection: str, rows: List[dict]) -> None:
+        with self._lock:
+            for key in list(self._owned[collection]):
+                self._drop_row(collection, key)
+            for row in rows:
+                self._add_row(collection, row)
+
+    def apply(self, collection: str, old: Optional[dict], new: Optional[dict]) -> None:
+        with self._lock:
+            if old is not None:
+                self._drop_row(collection, old[_ROW_KEYS[collection]])
+            if new is not None:
+                self._add_row(collection, new)
+
+    def _add_row(self, collection: str, row: dict) -> None:
+        owned = self._owned[collection].setdefault(row[_ROW_KEYS[collection]], [])
+        for edge, source_kind, target_kind in _row_edges(collection, row):
+            edge_id, source, target = edge[0], edge[1], edge[2]
+            self._edges[edge_id] = edge
+            self._adjacency.setdefault(source, {})[edge_id] = None
+            self._adjacency.setdefault(target, {})[edge_id] = None
+            self._kinds[source] = source_kind
+            self._kinds[target] = target_kind
+            owned.append(edge_id)
+
+    def _drop_row(self, collection: str, key: str) -> None:
+        for edge_id in self._owned[collection].pop(key, []):
+            edge = self._edges.pop(edge_id, None)
+            if edge is None:
+                continue
+            for node in (edge[1], edge[2]):
+                neighbors = self._adjacency.get(node)
+                if neighbors is not None:
+                    neighbors.pop(edge_id, None)
+                    if not neighbors:
+                        del self._adjacency[node]
+
+    def kind(self, node_id: str) -> Optional[str]:
+        return self._kinds.get(node_id)
+
+    def edge(self, edge_id: str) -> Optional[Edge]:
+        return self._edges.get(edge_id)
+
+    def traverse(
+        self,
+        starts: Iterable[str],
+        depth: int,
+        max_nodes: int,
+        max_edges: int,
+    ) -> Tuple[Dict[str, int], List[Edge], bool]:
+        """BFS a partir de ``starts``: distancia de cada no, arestas percorridas e truncamento."""
+        with self._lock:
+            distances: Dict[str, int] = {}
+            for start in starts:
+                distances.setdefault(start, 0)
+            frontier = list(distances)
+            edges: Dict[str, Edge] = {}
+            truncated = False
+            for level in range(depth):
+                next_frontier: List[str] = []
+                for node in frontier:
+                    for edge_id in self._adjacency.get(node, {}):
+                        if edge_id in edges:
+                            continue
+                        if len(edges) >= max_edges:
+                            truncated = True
+                            break
+                        edge = self._edges[edge_id]
+                        other = edge[2] if edge[1] == node else edge[1]
+                        if other not in distances:
+                            if len(distances) >= max_nodes:
+                                truncated = True
+                                continue
+                            distances[other] = level + 1
+                            next_frontier.append(other)
+                        edges[edge_id] = edge
+                frontier = next_frontier
+                if not frontier:
+                    break
+            return distances, list(edges.values()), truncated
+
+
+_GRAPH = GraphIndex()
+for _collection in GRAPH_COLLECTIONS:
+    register_index(
+        _collection,
+        lambda rows, name=_collection: _GRAPH.rebuild(name, rows),
+        lambda old, new, name=_collection: _GRAPH.apply(name, old, new),
+    )
+
+
+def get_graph_index() -> GraphIndex:
+    """Indice sincronizado com os arquivos atuais."""
+    ensure_indexed(*GRAPH_COLLECTIONS)
+    return _GRAPH
+
+
+__all__ = ["NODE_COLLECTIONS", "Edge", "GraphIndex", "get_graph_index"]
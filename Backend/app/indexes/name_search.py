@@ -0,0 +1,188 @@
+"""Indice de trigramas para busca aproximada de nomes, sem diferenciar acentos ou caixa."""
+
+from __future__ import annotations
+
+import heapq
+import math
+import re
+import threading
+import unicodedata
+from collections import Counter
+from typing import Dict, List, Optional, Set, Tuple
+
+from ..storage import ensure_indexed, register_index
+
+# Colecao -> campos de nome indexados (cada campo preenchido vira um documento).
+NAME_FIELDS: Dict[str, Tuple[str, ...]] = {
+    "persons": ("name", "preferred_name"),
+    "volunteers": ("name",),
+}
+DEFAULT_MIN_SCORE = 0.3
+
+_SEPARATORS = re.compile(r"[^0-9a-z]+")
+
+Document = Tuple[str, str, str]
+
+
+def normalize_name(text: str) -> str:
+    """Minusculas sem acentos e com pontuacao trocada por espaco: ``"João"`` -> ``"joao"``."""
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(_SEPARATORS.split(stripped)).strip()
+
+
+def trigrams(text: str) -> Set[str]:
+    """Trigramas de cada palavra com dois espacos a esquerda e um a direita (como o ``pg_trgm``)."""
+    grams: Set[str] = set()
+    for word in normalize_name(text).split():
+        padded = f"  {word} "
+        grams.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class NameSearchIndex:
+    """Listas invertidas trigrama -> documentos; cada documento e um campo de nome de um registro.
+
+    A ordem e pela fracao dos trigramas da consulta presentes no nome e, no
+    empate, pela similaridade de Jaccard (nomes mais curtos primeiro). As faixas
+    sao visitadas da nota maxima para baixo e a busca para assim que ``limit``
+    registros sao encontrados: a faixa cheia e a intersecao das listas e, nas
+    demais, so as listas mais raras geram candidatos (quem tem ``k`` trigramas
+    em comum aparece em pelo menos uma das ``n - k + 1`` mais raras).
+    """
+
+    def __init__(self) -> None:
+        self._docs: List[Optional[Document]] = []
+        self._texts: List[str] = []
+        self._sizes: List[int] = []
+        self._free: List[int] = []
+        self._slots: Dict[Tuple[str, str], List[int]] = {}
+        self._postings: Dict[str, Set[int]] = {}
+        self._by_collection: Dict[str, Set[int]] = {}
+        self._lock = threading.RLock()
+
+    # -- ganchos -------------------------------------------------------------------
+
+    def rebuild(self, collection: str, rows: List[dict]) -> None:
+        with self._lock:
+            for key in [key for key in self._slots if key[0] == collection]:
+                self._drop(key)
+            for row in rows:
+                self._add(collection, row)
+
+    def apply(self, collection: str, old: Optional[dict], new: Optional[dict]) -> None:
+        with self._lock:
+            if old is not None:
+                self._drop((collection, old["id"]))
+            if new is not None:
+                self._add(collection, new)
+
+    def _add(self, collection: str, row: dict) -> None:
+        slots = []
+        for field in NAME_FIELDS[collection]:
+            value = row.get(field)
+            grams = trigrams(value) if value else set()
+            if not grams:
+                continue
+            slot = self._free.pop() if self._free else len(self._docs)
+            if slot == len(self._docs):
+                self._docs.append(None)
+                self._texts.append("")
+                self._sizes.append(0)
+            self._docs[slot] = (collection, row["id"], field)
+            self._texts[slot] = value
+            self._sizes[slot] = len(grams)
+            for gram in grams:
+                self._postings.setdefault(gram, set()).add(slot)
+            self._by_collection.setdefault(collection, set()).add(slot)
+            slots.append(slot)
+        if slots:
+            self._slots[(collection, row["id"])] = slots
+
+    def _drop(self, key: Tuple[str, str]) -> None:
+        for slot in self._slots.pop(key, ()):
+            for gram in trigrams(self._texts[slot]):
+                docs = self._postings.get(gram)
+                if docs is not None:
+                    docs.discard(slot)
+                    if not docs:
+                        del self._postings[gram]
+            self._by_collection.get(key[0], set()).discard(slot)
+            self._docs[slot] = None
+            self._texts[slot] = ""
+            self._free.append(slot)
+
+    # -- consulta ------------------------------------------------------------------
+
+    def search(
+        self,
+        query: str,
+        *,
+        limit: int = 20,
+        collections: Optional[Tuple[str, ...]] = None,
+        min_score: float = DEFAULT_MIN_SCORE,
+    ) -> List[dict]:
+        """Melhores registros para ``query``: ``{collection, id, field, score}`` em ordem decrescente."""
+        grams = trigrams(query)
+        if not grams:
+            return []
+        total = len(grams)
+        needed = max(1, math.ceil(total * min_score))
+        per_record = max(len(fields) for fields in NAME_FIELDS.values())
+        results: List[dict] = []
+        seen: Set[Tuple[str, str]] = set()
+        with self._lock:
+            lists = sorted((self._postings.get(gram, set()) for gram in grams), key=len)
+            allowed = None
+            if collections is not None:
+                allowed = set().union(*(self._by_collection.get(name, set()) for name in collections))
+            for level in range(total, needed - 1, -1):
+                tier = self._tier(lists, level, allowed)
+                # Na mesma faixa, menos trigramas no nome = maior similaridade de Jaccard.
+                wanted = (limit - len(results)) * per_record
+                for slot in sorted(heapq.nsmallest(wanted, tier, key=self._sizes.__getitem__), key=self._order):
+                    collection, record_id, field = self._docs[slot]
+                    if (collection, record_id) in seen:
+                        continue
+                    seen.add((collection, record_id))
+                    results.append(
+                        {"collection": collection, "id": record_id, "field": field, "score": round(level / total, 3)}
+                    )
+                if len(results) >= limit:
+                    break
+        return results[:limit]
+
+    def _tier(self, lists: List[Set[int]], level: int, allowed: Optional[Set[int]]) -> Set[int]:
+        """Documentos com exatamente ``level`` trigramas da consulta."""
+        if level == len(lists):
+            tier = set.intersection(*lists)
+            return tier & allowed if allowed is not None else tier
+        # Quem tem ``level`` trigramas em comum esta em alguma das ``n - level + 1`` listas mais raras.
+        candidates = set().union(*lists[: len(lists) - level + 1])
+        if allowed is not None:
+            candidates &= allowed
+        counts: Counter = Counter()
+        for docs in lists:
+            counts.update(candidates & docs)
+        return {slot for slot, shared in counts.items() if shared == level}
+
+    def _order(self, slot: int) -> Tuple[int, Document]:
+        return self._sizes[slot], self._docs[slot]
+
+
+_NAMES = NameSearchIndex()
+for _collection in NAME_FIELDS:
+    register_index(
+        _collection,
+        lambda rows, name=_collection: _NAMES.rebuild(name, rows),
+        lambda old, new, name=_collection: _NAMES.apply(name, old, new),
+    )
+
+
+def get_name_search_index() -> NameSearchIndex:
+    """Indice sincronizado com os arquivos atuais."""
+    ensure_indexed(*NAME_FIELDS)
+    return _NAMES
+
+
+__all__ = ["NAME_FIELDS", "NameSearchIndex", "get_name_search_index", "normalize_name", "trigrams"]
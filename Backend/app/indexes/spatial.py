@@ -0,0 +1,108 @@
+"""Grade espacial sobre ``coordinates`` de alunos e voluntarios para buscas por raio."""
+
+from __future__ import annotations
+
+import math
+import threading
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from ..storage import ensure_indexed, register_index
+from ..utils.geo import haversine_km
+
+SPATIAL_COLLECTIONS = ("students", "volunteers")
+# ~1,1 km de lado no equador; buscas de poucos km tocam poucas dezenas de celulas.
+CELL_DEGREES = 0.01
+_KM_PER_DEGREE = 111.195
+
+Cell = Tuple[int, int]
+
+
+def _cell(latitude: float, longitude: float) -> Cell:
+    return math.floor(latitude / CELL_DEGREES), math.floor(longitude / CELL_DEGREES)
+
+
+class SpatialGridIndex:
+    """Celulas de ``CELL_DEGREES`` graus -> ids; cada colecao tem a sua grade."""
+
+    def __init__(self) -> None:
+        self._points: Dict[str, Dict[str, Tuple[float, float]]] = {name: {} for name in SPATIAL_COLLECTIONS}
+        self._cells: Dict[str, Dict[Cell, Set[str]]] = {name: {} for name in SPATIAL_COLLECTIONS}
+        self._lock = threading.RLock()
+
+    def rebuild(self, collection: str, rows: List[dict]) -> None:
+        with self._lock:
+            self._points[collection] = {}
+            self._cells[collection] = {}
+            for row in rows:
+                self._add(collection, row)
+
+    def apply(self, collection: str, old: Optional[dict], new: Optional[dict]) -> None:
+        with self._lock:
+            if old is not None:
+                self._drop(collection, old["id"])
+            if new is not None:
+                self._add(collection, new)
+
+    def _add(self, collection: str, row: dict) -> None:
+        point = (row["coordinates"]["latitude"], row["coordinates"]["longitude"])
+        self._points[collection][row["id"]] = point
+        self._cells[collection].setdefault(_cell(*point), set()).add(row["id"])
+
+    def _drop(self, collection: str, record_id: str) -> None:
+        point = self._points[collection].pop(record_id, None)
+        if point is None:
+            return
+        cell = _cell(*point)
+        members = self._cells[collection].get(cell)
+        if members is not None:
+            members.discard(record_id)
+            if not members:
+                del self._cells[collection][cell]
+
+    def _cells_within(self, collection: str, latitude: float, longitude: float, radius_km: float) -> Iterator[Set[str]]:
+        lat_span = radius_km / _KM_PER_DEGREE
+        lon_span = radius_km / (_KM_PER_DEGREE * max(math.cos(math.radians(latitude)), 0.01))
+        low, high = _cell(latitude - lat_span, longitude - lon_span), _cell(latitude + lat_span, longitude + lon_span)
+        cells = self._cells[collection]
+        if (high[0] - low[0] + 1) * (high[1] - low[1] + 1) > len(cells):
+            # Raio maior que a area ocupada: mais barato percorrer as celulas existentes.
+            for (row, column), members in cells.items():
+                if low[0] <= row <= high[0] and low[1] <= column <= high[1]:
+                    yield members
+            return
+        for row in range(low[0], high[0] + 1):
+            for column in range(low[1], high[1] + 1):
+                members = cells.get((row, column))
+                if members:
+                    yield members
+
+    def nearby(self, collection: str, latitude: float, longitude: float, radius_km: float) -> List[Tuple[float, str]]:
+        """``(distancia_km, id)`` dos registros a ate ``radius_km`` do ponto, do mais proximo ao mais distante."""
+        with self._lock:
+            points = self._points[collection]
+            found = []
+            for members in self._cells_within(collection, latitude, longitude, radius_km):
+                for record_id in members:
+                    distance = haversine_km(latitude, longitude, *points[record_id])
+                    if distance <= radius_km:
+                        found.append((distance, record_id))
+        found.sort()
+        return found
+
+
+_SPATIAL = SpatialGridIndex()
+for _collection in SPATIAL_COLLECTIONS:
+    register_index(
+        _collection,
+        lambda rows, name=_collection: _SPATIAL.rebuild(name, rows),
+        lambda old, new, name=_collection: _SPATIAL.apply(name, old, new),
+    )
+
+
+def get_spatial_index() -> SpatialGridIndex:
+    """Indice sincronizado com os arquivos atuais."""
+    ensure_indexed(*SPATIAL_COLLECTIONS)
+    return _SPATIAL
+
+
+__all__ = ["SPATIAL_COLLECTIONS", "SpatialGridIndex", "get_spatial_index"]
@@ -0,0 +1,257 @@
+"""Indices invertidos em bitmap para a busca de alunos por multiplos criterios."""
+
+from __future__ import annotations
+
+import threading
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from ..storage import ensure_indexed, register_index
+
+SEARCH_COLLECTIONS = ("students", "families", "assignments")
+
+Posting = Tuple[str, object]
+
+
+def _mask(slots: Iterable[int], size: int) -> int:
+    """Bitmap de uma vez a partir das posicoes (evita recriar o ``int`` a cada bit)."""
+    buffer = bytearray((size + 7) // 8)
+    for slot in slots:
+        buffer[slot >> 3] |= 1 << (slot & 7)
+    return int.from_bytes(buffer, "little")
+
+
+def _term(value: object) -> object:
+    return value.strip().casefold() if isinstance(value, str) else value
+
+
+def _student_postings(row: dict) -> List[Posting]:
+    school = row.get("school", {})
+    attendance = row.get("attendance_last_30d", {})
+    return [
+        ("zone", _term(row["zone"])),
+        ("grade", _term(school.get("grade"))),
+        ("shift", _term(school.get("shift"))),
+        ("classroom", _term(school.get("classroom"))),
+        ("wheelchair_user", bool(row.get("disabilities", {}).get("wheelchair_user", False))),
+        ("absences", int(attendance.get("absences", 0))),
+        ("delays", int(attendance.get("delays", 0))),
+    ]
+
+
+class StudentSearchIndex:
+    """Cada aluno ocupa um bit; cada valor de campo guarda o bitmap (``int``) dos alunos que o tem.
+
+    Filtros combinados viram ANDs de inteiros; limiares de faltas/atrasos sao ORs
+    dos poucos valores distintos acima do limite.
+    """
+
+    def __init__(self) -> None:
+        self._slots: Dict[str, int] = {}
+        self._ids: List[Optional[str]] = []
+        self._free: List[int] = []
+        self._live = 0
+        self._postings: Dict[str, Dict[object, int]] = {}
+        self._student_terms: Dict[str, List[Posting]] = {}
+        self._student_family: Dict[str, str] = {}
+        self._family_students: Dict[str, Set[str]] = {}
+        self._family_signals: Dict[str, Set[str]] = {}
+        self._assigned = 0
+        self._assigned_ids: Set[str] = set()
+        self._lock = threading.RLock()
+
+    # -- bitmaps -------------------------------------------------------------------
+
+    def _set(self, posting: Posting, slot: int) -> None:
+        values = self._postings.setdefault(posting[0], {})
+        values[posting[1]] = values.get(posting[1], 0) | (1 << slot)
+
+    def _clear(self, posting: Posting, slot: int) -> None:
+        values = self._postings.get(posting[0], {})
+        mask = values.get(posting[1], 0) & ~(1 << slot)
+        if mask:
+            values[posting[1]] = mask
+        else:
+            values.pop(posting[1], None)
+
+    def _posting(self, field: str, value: object) -> int:
+        return self._postings.get(field, {}).get(value, 0)
+
+    def _signal_postings(self, family_id: Optional[str]) -> List[Posting]:
+        return [("eligibility", _term(signal)) for signal in self._family_signals.get(family_id or "", ())]
+
+    # -- ganchos -------------------------------------------------------------------
+
+    def rebuild(self, collection: str, rows: List[dict]) -> None:
+        with self._lock:
+            if collection == "students":
+                self._slots = {row["id"]: slot for slot, row in enumerate(rows)}
+                self._ids = [row["id"] for row in rows]
+                self._free = []
+                self._live = (1 << len(rows)) - 1
+                self._student_terms = {row["id"]: _student_postings(row) for row in rows}
+                self._student_family = {row["id"]: row["family_id"] for row in rows}
+                self._family_students = {}
+                for row in rows:
+                    self._family_students.setdefault(row["family_id"], set()).add(row["id"])
+            elif collection == "families":
+                self._family_signals = {
+                    row["id"]: set(row["eligibility_signals"]) for row in rows if row.get("eligibility_signals")
+                }
+            else:
+                self._assigned_ids = {row["student_id"] for row in rows}
+            self._rebuild_masks()
+
+    def _rebuild_masks(self) -> None:
+        slots_by_posting: Dict[Posting, List[int]] = {}
+        for student_id, slot in self._slots.items():
+            terms = self._student_terms[student_id] + self._signal_postings(self._student_family[student_id])
+            for posting in terms:
+                slots_by_posting.setdefault(posting, []).append(slot)
+        size = len(self._ids)
+        self._postings = {}
+        for (field, value), slots in slots_by_posting.items():
+            self._postings.setdefault(field, {})[value] = _mask(slots, size)
+        self._assigned = _mask((self._slots[sid] for sid in self._assigned_ids if sid in self._slots), size)
+
+    def apply(self, collection: str, old: Optional[dict], new: Optional[dict]) -> None:
+        with self._lock:
+            if collection == "students":
+                if old is not None:
+                    self._drop_student(old["id"])
+                if new is not None:
+                    self._add_student(new)
+            elif collection == "families":
+                if old is not None and new is None:
+                    self._set_family(old["id"], [])
+                if new is not None:
+                    self._set_family(new["id"], new.get("eligibility_signals", []))
+            else:
+                if old is not None:
+                    self._set_assigned(old["student_id"], False)
+                if new is not None:
+                    self._set_assigned(new["student_id"], True)
+
+    def _add_student(self, row: dict) -> None:
+        student_id = row["id"]
+        slot = self._free.pop() if self._free else len(self._ids)
+        if slot == len(self._ids):
+            self._ids.append(student_id)
+        else:
+            self._ids[slot] = student_id
+        self._slots[student_id] = slot
+        self._live |= 1 << slot
+        terms = _student_postings(row)
+        self._student_terms[student_id] = terms
+        self._student_family[student_id] = row["family_id"]
+        self._family_students.setdefault(row["family_id"], set()).add(student_id)
+        for posting in terms + self._signal_postings(row["family_id"]):
+            self._set(posting, slot)
+        if student_id in self._assigned_ids:
+            self._assigned |= 1 << slot
+
+    def _drop_student(self, student_id: str) -> None:
+        slot = self._slots.pop(student_id, None)
+        if slot is None:
+            return
+        family_id = self._student_family.pop(student_id, None)
+        for posting in self._student_terms.pop(student_id, []) + self._signal_postings(family_id):
+            self._clear(posting, slot)
+        students = self._family_students.get(family_id or "")
+        if students is not None:
+            students.discard(student_id)
+        self._assigned &= ~(1 << slot)
+        self._live &= ~(1 << slot)
+        self._ids[slot] = None
+        self._free.append(slot)
+
+    def _set_family(self, family_id: str, signals: Iterable[str]) -> None:
+        students = [self._slots[sid] for sid in self._family_students.get(family_id, ()) if sid in self._slots]
+        for posting in self._signal_postings(family_id):
+            for slot in students:
+                self._clear(posting, slot)
+        signals = set(signals)
+        if signals:
+            self._family_signals[family_id] = signals
+        else:
+            self._family_signals.pop(family_id, None)
+        for posting in self._signal_postings(family_id):
+            for slot in students:
+                self._set(posting, slot)
+
+    def _set_assigned(self, student_id: str, assigned: bool) -> None:
+        if assigned:
+            self._assigned_ids.add(student_id)
+        else:
+            self._assigned_ids.discard(student_id)
+        slot = self._slots.get(student_id)
+        if slot is None:
+            return
+        if assigned:
+            self._assigned |= 1 << slot
+        else:
+            self._assigned &= ~(1 << slot)
+
+    # -- consulta ------------------------------------------------------------------
+
+    def search(
+        self,
+        *,
+        zone: Optional[str] = None,
+        grade: Optional[str] = None,
+        shift: Optional[str] = None,
+        classroom: Optional[str] = None,
+        wheelchair_user: Optional[bool] = None,
+        min_absences: Optional[int] = None,
+        min_delays: Optional[int] = None,
+        eligibility: Iterable[str] = (),
+        assigned: Optional[bool] = None,
+    ) -> List[str]:
+        """Ids dos alunos que atendem a todos os filtros, em ordem crescente."""
+        with self._lock:
+            mask = self._live
+            exact = {"zone": zone, "grade": grade, "shift": shift, "classroom": classroom}
+            for field, value in exact.items():
+                if value is not None:
+                    mask &= self._posting(field, _term(value))
+            if wheelchair_user is not None:
+                mask &= self._posting("wheelchair_user", wheelchair_user)
+            for field, threshold in (("absences", min_absences), ("delays", min_delays)):
+                if threshold is not None:
+                    mask &= self._at_least(field, threshold)
+            for signal in eligibility:
+                mask &= self._posting("eligibility", _term(signal))
+            if assigned is not None:
+                mask &= self._assigned if assigned else ~self._assigned
+            # Bits do menos para o mais significativo; ``find`` salta direto entre os ligados.
+            bits = bin(mask)[:1:-1]
+            ids = []
+            position = bits.find("1")
+            while position != -1:
+                ids.append(self._ids[position])
+                position = bits.find("1", position + 1)
+        return sorted(ids)
+
+    def _at_least(self, field: str, threshold: int) -> int:
+        combined = 0
+        for value, mask in self._postings.get(field, {}).items():
+            if value >= threshold:
+                combined |= mask
+        return combined
+
+
+_SEARCH = StudentSearchIndex()
+for _collection in SEARCH_COLLECTIONS:
+    register_index(
+        _collection,
+        lambda rows, name=_collection: _SEARCH.rebuild(name, rows),
+        lambda old, new, name=_collection: _SEARCH.apply(name, old, new),
+    )
+
+
+def get_student_search_index() -> StudentSearchIndex:
+    """Indice sincronizado com os arquivos atuais."""
+    ensure_indexed(*SEARCH_COLLECTIONS)
+    return _SEARCH
+
+
+__all__ = ["StudentSearchIndex", "get_student_search_index"]
@@ -0,0 +1,170 @@
+"""Grade multirresolucao (tiles Web Mercator) com contagens agregadas para o mapa."""
+
+from __future__ import annotations
+
+import math
+import threading
+from typing import Dict, List, Optional, Set, Tuple
+
+from ..storage import ensure_indexed, register_index
+
+TILE_COLLECTIONS = ("students", "volunteers", "assignments")
+MAX_TILE_ZOOM = 16
+# Cada tile e dividido em 2**TILE_SUBDIVISION x 2**TILE_SUBDIVISION celulas de agrupamento.
+TILE_SUBDIVISION = 3
+_MAX_LEVEL = MAX_TILE_ZOOM + TILE_SUBDIVISION
+_MAX_LATITUDE = 85.05112878
+
+# Posicoes do acumulador de cada celula.
+_STUDENTS, _VOLUNTEERS, _ASSIGNED, _LAT_SUM, _LON_SUM = range(5)
+
+Cell = Tuple[int, int]
+
+
+def _pixel(latitude: float, longitude: float) -> Cell:
+    """Celula no nivel mais fino; os niveis acima saem por deslocamento de bits."""
+    scale = 1 << _MAX_LEVEL
+    latitude = max(-_MAX_LATITUDE, min(_MAX_LATITUDE, latitude))
+    x = int((longitude + 180.0) / 360.0 * scale)
+    sin_lat = math.sin(math.radians(latitude))
+    y = int((0.5 - math.log((1 + sin_lat) / (1 - sin_lat)) / (4 * math.pi)) * scale)
+    return min(max(x, 0), scale - 1), min(max(y, 0), scale - 1)
+
+
+def tile_bounds(z: int, x: int, y: int) -> Tuple[float, float, float, float]:
+    """``(oeste, sul, leste, norte)`` em graus do tile ``z/x/y``."""
+    scale = 1 << z
+
+    def latitude(row: int) -> float:
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / scale))))
+
+    return x / scale * 360.0 - 180.0, latitude(y + 1), (x + 1) / scale * 360.0 - 180.0, latitude(y)
+
+
+class TileGridIndex:
+    """Para cada nivel ``0.._MAX_LEVEL``, celula -> [alunos, voluntarios, atribuidos, soma lat, soma lon].
+
+    Cada escrita ajusta uma celula por nivel, entao um tile e respondido lendo
+    no maximo ``4 ** TILE_SUBDIVISION`` celulas, qualquer que seja o tamanho da zona.
+    """
+
+    def __init__(self) -> None:
+        self._levels: List[Dict[Cell, List[float]]] = [{} for _ in range(_MAX_LEVEL + 1)]
+        self._points: Dict[str, Dict[str, Tuple[float, float]]] = {"students": {}, "volunteers": {}}
+        self._assigned_ids: Set[str] = set()
+        self._lock = threading.RLock()
+
+    def rebuild(self, collection: str, rows: List[dict]) -> None:
+        with self._lock:
+            if collection == "assignments":
+                for student_id in list(self._assigned_ids):
+                    self._set_assigned(student_id, False)
+                for row in rows:
+                    self._set_assigned(row["student_id"], True)
+                return
+            for record_id in list(self._points[collection]):
+                self._drop(collection, record_id)
+            for row in rows:
+                self._add(collection, row)
+
+    def apply(self, collection: str, old: Optional[dict], new: Optional[dict]) -> None:
+        with self._lock:
+            if collection == "assignments":
+                if old is not None:
+                    self._set_assigned(old["student_id"], False)
+                if new is not None:
+                    self._set_assigned(new["student_id"], True)
+                return
+            if old is not None:
+                self._drop(collection, old["id"])
+            if new is not None:
+                self._add(collection, new)
+
+    def _bump(self, point: Tuple[float, float], deltas: Dict[int, float]) -> None:
+        x, y = _pixel(*point)
+        for level in range(_MAX_LEVEL, -1, -1):
+            shift = _MAX_LEVEL - level
+            cells = self._levels[level]
+            cell = (x >> shift, y >> shift)
+            counts = cells.get(cell)
+            if counts is None:
+                counts = cells[cell] = [0, 0, 0, 0.0, 0.0]
+            for position, delta in deltas.items():
+                counts[position] += delta
+            if counts[_STUDENTS] == 0 and counts[_VOLUNTEERS] == 0:
+                del cells[cell]
+
+    def _point_deltas(self, collection: str, record_id: str, point: Tuple[float, float], sign: int) -> Dict[int, float]:
+        deltas = {_LAT_SUM: sign * point[0], _LON_SUM: sign * point[1]}
+        if collection == "volunteers":
+            deltas[_VOLUNTEERS] = sign
+        else:
+            deltas[_STUDENTS] = sign
+            if record_id in self._assigned_ids:
+                deltas[_ASSIGNED] = sign
+        return deltas
+
+    def _add(self, collection: str, row: dict) -> None:
+        point = (row["coordinates"]["latitude"], row["coordinates"]["longitude"])
+        self._points[collection][row["id"]] = point
+        self._bump(point, self._point_deltas(collection, row["id"], point, 1))
+
+    def _drop(self, collection: str, record_id: str) -> None:
+        point = self._points[collection].pop(record_id, None)
+        if point is not None:
+            self._bump(point, self._point_deltas(collection, record_id, point, -1))
+
+    def _set_assigned(self, student_id: str, assigned: bool) -> None:
+        if assigned == (student_id in self._assigned_ids):
+            return
+        if assigned:
+            self._assigned_ids.add(student_id)
+        else:
+            self._assigned_ids.discard(student_id)
+        point = self._points["students"].get(student_id)
+        if point is not None:
+            self._bump(point, {_ASSIGNED: 1 if assigned else -1})
+
+    def tile(self, z: int, x: int, y: int) -> List[dict]:
+        """Agrupamentos nao vazios do tile, um por celula, com o centroide dos pontos."""
+        level = z + TILE_SUBDIVISION
+        side = 1 << TILE_SUBDIVISION
+        clusters = []
+        with self._lock:
+            cells = self._levels[level]
+            for row in range(y * side, (y + 1) * side):
+                for column in range(x * side, (x + 1) * side):
+                    counts = cells.get((column, row))
+                    if counts is None:
+                        continue
+                    students, volunteers, assigned, lat_sum, lon_sum = counts
+                    points = students + volunteers
+                    clusters.append(
+                        {
+                            "cell": [column, row],
+                            "latitude": round(lat_sum / points, 6),
+                            "longitude": round(lon_sum / points, 6),
+                            "students": int(students),
+                            "volunteers": int(volunteers),
+                            "unassigned": int(students - assigned),
+                        }
+                    )
+        return clusters
+
+
+_TILES = TileGridIndex()
+for _collection in TILE_COLLECTIONS:
+    register_index(
+        _collection,
+        lambda rows, name=_collection: _TILES.rebuild(name, rows),
+        lambda old, new, name=_collection: _TILES.apply(name, old, new),
+    )
+
+
+def get_tile_index() -> TileGridIndex:
+    """Indice sincronizado com os arquivos atuais."""
+    ensure_indexed(*TILE_COLLECTIONS)
+    return _TILES
+
+
+__all__ = ["MAX_TILE_ZOOM", "TILE_COLLECTIONS", "TILE_SUBDIVISION", "TileGridIndex", "get_tile_index", "tile_bounds"]
@@ -0,0 +1,249 @@
+"""Estatisticas materializadas por zona, ajustadas em O(1) a cada escrita."""
+
+from __future__ import annotations
+
+import threading
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from ..storage import ensure_indexed, iter_audit, register_index, reindex
+from ..utils.quantiles import QuantileSketch
+
+STATS_COLLECTIONS = ("students", "volunteers", "assignments")
+# Alunos sem atribuicao que ainda nao passaram por ``/assign``.
+PENDING_REASON = "pending"
+
+
+class _ZoneCounters:
+    __slots__ = ("students", "assigned", "reasons", "volunteers", "capacity", "load", "distances")
+
+    def __init__(self) -> None:
+        self.students = 0
+        self.assigned = 0
+        self.reasons: Counter = Counter()
+        self.volunteers = 0
+        self.capacity = 0
+        self.load = 0
+        self.distances = QuantileSketch()
+
+
+class ZoneStatsIndex:
+    """Contadores por zona derivados de alunos, voluntarios e atribuicoes.
+
+    Guarda apenas o necessario para desfazer a contribuicao de cada registro
+    (zona do aluno, zona/capacidade do voluntario, zona/voluntario/distancia da
+    atribuicao), entao cada troca antigo -> novo custa O(1). Os motivos de nao
+    atribuicao vem da ultima rodada de ``/assign`` de cada aluno.
+
+    ``generation`` sobe a cada reconstrucao ou troca de motivos, que podem mudar
+    o resultado sem que nenhuma colecao mude de versao; entra no ETag da rota.
+    """
+
+    def __init__(self) -> None:
+        self._zones: Dict[str, _ZoneCounters] = {}
+        self._student_zone: Dict[str, str] = {}
+        self._volunteers: Dict[str, Tuple[str, int]] = {}
+        self._volunteer_load: Counter = Counter()
+        self._assignments: Dict[str, Tuple[str, str, float]] = {}
+        self._reasons: Dict[str, str] = {}
+        self.generation = 0
+        self._lock = threading.RLock()
+
+    def _zone(self, zone: str) -> _ZoneCounters:
+        counters = self._zones.get(zone)
+        if counters is None:
+            counters = self._zones[zone] = _ZoneCounters()
+        return counters
+
+    # -- ganchos -------------------------------------------------------------------
+
+    def rebuild(self, collection: str, rows: List[dict]) -> None:
+        with self._lock:
+            if collection == "students":
+                self._student_zone = {row["id"]: row["zone"] for row in rows}
+            elif collection == "volunteers":
+                self._volunteers = {row["id"]: (row["zone"], row["max_students"]) for row in rows}
+            else:
+                self._assignments = {
+                    row["student_id"]: (row["zone"], row["volunteer_id"], row["distance_km"]) for row in rows
+                }
+            self._recount()
+            self.generation += 1
+
+    def _recount(self) -> None:
+        self._zones = {}
+        self._volunteer_load = Counter(volunteer_id for _, volunteer_id, _ in self._assignments.values())
+        for student_id, zone in self._student_zone.items():
+            self._count_student(student_id, zone, 1)
+        for volunteer_id, (zone, capacity) in self._volunteers.items():
+            self._count_volunteer(volunteer_id, zone, capacity, 1)
+        for zone, _, distance in self._assignments.values():
+            self._zone(zone).distances.add(distance)
+
+    def apply(self, collection: str, old: Optional[dict], new: Optional[dict]) -> None:
+        with self._lock:
+            if collection == "students":
+                if old is not None and self._student_zone.pop(old["id"], None) is not None:
+                    self._count_student(old["id"], old["zone"], -1)
+                if new is not None:
+                    self._student_zone[new["id"]] = new["zone"]
+                    self._count_student(new["id"], new["zone"], 1)
+            elif collection == "volunteers":
+                if old is not None and self._volunteers.pop(old["id"], None) is not None:
+                    self._count_volunteer(old["id"], old["zone"], old["max_students"], -1)
+                if new is not None:
+                    self._volunteers[new["id"]] = (new["zone"], new["max_students"])
+                    self._count_volunteer(new["id"], new["zone"], new["max_students"], 1)
+            else:
+                if old is not None:
+                    self._count_assignment(old["student_id"], -1)
+                if new is not None:
+                    self._assignments[new["student_id"]] = (new["zone"], new["volunteer_id"], new["distance_km"])
+                    self._count_assignment(new["student_id"], 1)
+
+    # -- contribuicoes -------------------------------------------------------------
+
+    def _count_student(self, student_id: str, zone: str, sign: int) -> None:
+        counters = self._zone(zone)
+        counters.students += sign
+        if student_id in self._assignments:
+            counters.assigned += sign
+        elif student_id in self._reasons:
+            counters.reasons[self._reasons[student_id]] += sign
+
+    def _count_volunteer(self, volunteer_id: str, zone: str, capacity: int, sign: int) -> None:
+        counters = self._zone(zone)
+        counters.volunteers += sign
+        counters.capacity += sign * capacity
+        counters.load += sign * self._volunteer_load[volunteer_id]
+
+    def _count_assignment(self, student_id: str, sign: int) -> None:
+        """Com ``sign`` negativo remove a atribuicao guardada; com positivo conta a recem-guardada."""
+        record = self._assignments.get(student_id)
+        if record is None:
+            return
+        zone, volunteer_id, distance = record
+        student_zone = self._student_zone.get(student_id)
+        if student_zone is not None:
+            counters = self._zone(student_zone)
+            counters.assigned += sign
+            reason = self._reasons.get(student_id)
+            if reason is not None:
+                counters.reasons[reason] -= sign
+        if sign > 0:
+            # Atribuido: o motivo da rodada anterior deixa de valer.
+            self._reasons.pop(student_id, None)
+            self._zone(zone).distances.add(distance)
+        else:
+            del self._assignments[student_id]
+            self._zone(zone).distances.remove(distance)
+        self._volunteer_load[volunteer_id] += sign
+        volunteer = self._volunteers.get(volunteer_id)
+        if volunteer is not None:
+            self._zone(volunteer[0]).load += sign
+
+    # -- motivos -------------------------------------------------------------------
+
+    def note_unassigned(self, entries: Iterable[dict]) -> None:
+        """Registra ``{student_id, reason}`` devolvidos por ``/assign``; substitui o motivo anterior."""
+        with self._lock:
+            for entry in entries:
+                student_id = entry["student_id"]
+                zone = self._student_zone.get(student_id)
+                counted = zone is not None and student_id not in self._assignments
+                previous = self._reasons.get(student_id)
+                if counted and previous is not None:
+                    self._zone(zone).reasons[previous] -= 1
+                self._reasons[student_id] = entry["reason"]
+                if counted:
+                    self._zone(zone).reasons[entry["reason"]] += 1
+            self.generation += 1
+
+    def load_reasons(self, reasons: Dict[str, str]) -> None:
+        with self._lock:
+            self._reasons = dict(reasons)
+            self._recount()
+            self.generation += 1
+
+    # -- consulta ------------------------------------------------------------------
+
+    def zone_names(self) -> List[str]:
+        with self._lock:
+            return sorted(self._zones)
+
+    def stats(self, zones: Optional[Iterable[str]] = None) -> List[dict]:
+        with self._lock:
+            names = sorted(self._zones) if zones is None else list(zones)
+            return [self._snapshot(zone, self._zones.get(zone) or _ZoneCounters()) for zone in names]
+
+    @staticmethod
+    def _snapshot(zone: str, counters: _ZoneCounters) -> dict:
+        unassigned = counters.students - counters.assigned
+        reasons = {reason: count for reason, count in sorted(counters.reasons.items()) if count}
+        reasons[PENDING_REASON] = unassigned - sum(reasons.values())
+        distances = counters.distances
+        return {
+            "zone": zone,
+            "students": counters.students,
+            "assigned": counters.assigned,
+            "unassigned": unassigned,
+            "unassigned_by_reason": reasons,
+            "volunteers": counters.volunteers,
+            "capacity": counters.capacity,
+            "volunteer_load": counters.load,
+            "utilization": round(counters.load / counters.capacity, 4) if counters.capacity else None,
+            "distance_km": {
+                "count": distances.count,
+                "mean": _rounded(distances.mean()),
+                "p50": _rounded(distances.quantile(0.5)),
+                "p90": _rounded(distances.quantile(0.9)),
+            },
+        }
+
+
+def _rounded(value: Optional[float]) -> Optional[float]:
+    return round(value, 3) if value is not None else None
+
+
+_STATS = ZoneStatsIndex()
+for _collection in STATS_COLLECTIONS:
+    register_index(
+        _collection,
+        lambda rows, name=_collection: _STATS.rebuild(name, rows),
+        lambda old, new, name=_collection: _STATS.apply(name, old, new),
+    )
+
+
+def get_zone_stats() -> ZoneStatsIndex:
+    """Indice sincronizado com os arquivos atuais."""
+    ensure_indexed(*STATS_COLLECTIONS)
+    return _STATS
+
+
+def zone_stats_generation() -> int:
+    """Geracao do indice sincronizado, para compor o ETag de ``/zones/stats``."""
+    return get_zone_stats().generation
+
+
+def rebuild_zone_stats() -> ZoneStatsIndex:
+    """Reparo completo: le de novo os arquivos e recupera os motivos das rodadas de ``/assign`` no log de auditoria."""
+    reasons: Dict[str, str] = {}
+    for event in iter_audit("assign"):
+        payload = event.get("payload", {})
+        for student_id in payload.get("assigned", []):
+            reasons.pop(student_id, None)
+        for entry in payload.get("unassigned", []):
+            reasons[entry["student_id"]] = entry["reason"]
+    _STATS.load_reasons(reasons)
+    reindex(*STATS_COLLECTIONS)
+    return _STATS
+
+
+__all__ = [
+    "PENDING_REASON",
+    "STATS_COLLECTIONS",
+    "ZoneStatsIndex",
+    "get_zone_stats",
+    "rebuild_zone_stats",
+    "zone_stats_generation",
+]
@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+from contextlib import asynccontextmanager
 from datetime import datetime, timezone
 
 from fastapi import FastAPI, HTTPException, Request
@@ -9,13 +10,34 @@ from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 
-from .routers import assignments, families, graph, insights, students, volunteers
+from .compression import CompressionMiddleware
+from .routers import assignments, batch, families, graph, insights, maps, search, students, volunteers, zones
+from .services.cache_refresh import start_background_refresh, stop_background_refresh
+from .services.graph_analytics import start_graph_analytics, stop_graph_analytics
+from .services.insight_cache import flush_insight_cache
+from .services.insight_precompute import start_precompute_scheduler, stop_precompute_scheduler
+from .services.llm_client import close_client
 
 
 def _utc_now_iso() -> str:
     return datetime.utcnow().replace(tzinfo=timezone.utc, microsecond=0).isoformat()
 
 
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    start_background_refresh()
+    start_precompute_scheduler()
+    start_graph_analytics()
+    try:
+        yield
+    finally:
+        await stop_precompute_scheduler()
+        stop_background_refresh()
+        stop_graph_analytics()
+        await close_client()
+        flush_insight_cache()
+
+
 app = FastAPI(
     title="Impacto Social API",
     description=(
@@ -23,8 +45,11 @@ app = FastAPI(
         "Todos os dados são sintéticos, com persistência em arquivos JSON."
     ),
     version="0.2.0",
+    lifespan=lifespan,
 )
 
+# Antes do CORS: respostas servidas do cache comprimido ainda recebem os cabecalhos CORS.
+app.add_middleware(CompressionMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -38,6 +63,10 @@ app.include_router(families.router)
 app.include_router(assignments.router)
 app.include_router(insights.router)
 app.include_router(graph.router)
+app.include_router(batch.router)
+app.include_router(search.router)
+app.include_router(maps.router)
+app.include_router(zones.router)
 
 
 @app.exception_handler(RequestValidationError)
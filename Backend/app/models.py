@@ -300,6 +300,23 @@ class InsightFamilyRequest(BaseModel):
     family_id: str
 
 
+class InsightBatchRequest(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    student_ids: List[str] = Field(default_factory=list)
+    family_ids: List[str] = Field(default_factory=list)
+    concurrency: Optional[int] = Field(default=None, ge=1)
+
+
+class BatchGetRequest(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    students: List[str] = Field(default_factory=list)
+    families: List[str] = Field(default_factory=list)
+    persons: List[str] = Field(default_factory=list)
+    volunteers: List[str] = Field(default_factory=list)
+
+
 class GraphResponse(BaseModel):
     model_config = ConfigDict(extra="forbid")
 
@@ -310,9 +327,11 @@ class GraphResponse(BaseModel):
 __all__ = [
     "AssignmentRecord",
     "AssignmentRequest",
+    "BatchGetRequest",
     "Document",
     "FamilyProfile",
     "GraphResponse",
+    "InsightBatchRequest",
     "InsightFamilyRequest",
     "InsightStudentRequest",
     "PersonProfile",
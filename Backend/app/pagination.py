@@ -0,0 +1,126 @@
+"""Paginacao por cursor, projecao de campos e streaming NDJSON compartilhados pelas rotas de listagem."""
+
+from __future__ import annotations
+
+import base64
+import json
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from fastapi import Query, Request
+from fastapi.responses import StreamingResponse
+
+from .http_errors import http_error
+from .storage import collection_fields, iter_records, page_records
+
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+BatchTransform = Callable[[List[dict]], List[dict]]
+# Linhas agrupadas por bloco enviado: poucos writes sem acumular a colecao inteira.
+STREAM_CHUNK_LINES = 200
+
+
+@dataclass
+class ListParams:
+    """Parametros ``cursor``/``limit``/``fields``; sem nenhum deles a rota mantem a resposta completa."""
+
+    cursor: Optional[str] = None
+    limit: Optional[int] = None
+    fields: Optional[str] = None
+    stream: bool = False
+
+    @property
+    def requested(self) -> bool:
+        return self.cursor is not None or self.limit is not None or self.fields is not None
+
+
+def list_params(
+    request: Request,
+    cursor: Optional[str] = Query(default=None, description="Cursor opaco devolvido em `next_cursor`."),
+    limit: Optional[int] = Query(default=None, ge=1, le=5000, description="Máximo de registros por página."),
+    fields: Optional[str] = Query(default=None, description="Campos de primeiro nível separados por vírgula."),
+    stream: bool = Query(default=False, description="Transmite NDJSON (igual a `Accept: application/x-ndjson`)."),
+) -> ListParams:
+    return ListParams(cursor, limit, fields, stream or NDJSON_MEDIA_TYPE in request.headers.get("accept", ""))
+
+
+def encode_cursor(key: str) -> str:
+    return base64.urlsafe_b64encode(key.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> str:
+    try:
+        return base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+    except (ValueError, UnicodeDecodeError):
+        raise http_error(400, "cursor_invalido", {"cursor": cursor})
+
+
+def parse_fields(collection: str, fields: Optional[str]) -> Optional[List[str]]:
+    if fields is None:
+        return None
+    names = list(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+    known = collection_fields(collection)
+    unknown = [name for name in names if name not in known]
+    if not names or unknown:
+        raise http_error(400, "campos_invalidos", {"fields": unknown or names, "allowed": sorted(known)})
+    return names
+
+
+def paginate(collection: str, params: ListParams, zone: Optional[str] = None) -> Tuple[List[dict], Optional[str]]:
+    """Pagina ja materializada e o ``next_cursor`` (``None`` na ultima pagina)."""
+    after = decode_cursor(params.cursor) if params.cursor is not None else None
+    items, next_after = page_records(collection, zone, after, params.limit, parse_fields(collection, params.fields))
+    return items, encode_cursor(next_after) if next_after is not None else None
+
+
+def _ndjson_lines(records: Iterator[dict], transform: Optional[BatchTransform]) -> Iterator[str]:
+    batch: List[dict] = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= STREAM_CHUNK_LINES:
+            yield _ndjson_block(batch, transform)
+            batch = []
+    if batch:
+        yield _ndjson_block(batch, transform)
+
+
+def _ndjson_block(batch: List[dict], transform: Optional[BatchTransform]) -> str:
+    if transform is not None:
+        batch = transform(batch)
+    return "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in batch)
+
+
+def stream_records(
+    collection: str,
+    params: ListParams,
+    request: Request,
+    zone: Optional[str] = None,
+    transform: Optional[BatchTransform] = None,
+) -> StreamingResponse:
+    """Uma linha JSON por registro, serializada conforme e consumida; memoria constante.
+
+    Respeita ``cursor``/``limit``/``fields``; o proximo cursor vai no cabecalho
+    ``X-Next-Cursor`` porque o corpo so contem registros. ``transform`` recebe
+    cada bloco de registros antes da serializacao (ex.: expansoes em lote).
+    """
+    after = decode_cursor(params.cursor) if params.cursor is not None else None
+    records, next_after = iter_records(collection, zone, after, params.limit, parse_fields(collection, params.fields))
+    headers: Dict[str, str] = {}
+    if next_after is not None:
+        headers["X-Next-Cursor"] = encode_cursor(next_after)
+    etag = getattr(request.state, "etag", None)
+    if etag:
+        headers["ETag"] = etag
+    return StreamingResponse(_ndjson_lines(records, transform), media_type=NDJSON_MEDIA_TYPE, headers=headers)
+
+
+__all__ = [
+    "NDJSON_MEDIA_TYPE",
+    "ListParams",
+    "decode_cursor",
+    "encode_cursor",
+    "list_params",
+    "paginate",
+    "parse_fields",
+    "stream_records",
+]
@@ -1,12 +1,16 @@
 """Exposicao centralizada dos routers."""
 
-from . import assignments, families, graph, insights, students, volunteers
+from . import assignments, batch, families, graph, insights, maps, search, students, volunteers, zones
 
 __all__ = [
     "assignments",
+    "batch",
     "families",
     "graph",
     "insights",
+    "maps",
+    "search",
     "students",
     "volunteers",
+    "zones",
 ]
@@ -2,10 +2,12 @@
 
 from __future__ import annotations
 
-from fastapi import APIRouter, Body, Query
+from fastapi import APIRouter, Body, Depends, Query, Request, Response
 
+from ..http_cache import versioned
 from ..http_errors import http_error
 from ..models import AssignmentRequest
+from ..pagination import ListParams, list_params, paginate, stream_records
 from ..services.assignment import assign_students
 from ..storage import list_assignments, resolve_zone
 
@@ -36,8 +38,24 @@ def post_assign(request: AssignmentRequest = Body(default_factory=AssignmentRequ
 
 
 @router.get("/assignments")
-def get_assignments(zone: str | None = Query(default=None, description="Filtrar por zona.")) -> dict:
+def get_assignments(
+    request: Request,
+    zone: str | None = Query(default=None, description="Filtrar por zona."),
+    page: ListParams = Depends(list_params),
+    not_modified: Response | None = Depends(versioned("assignments")),
+):
+    if not_modified is not None:
+        return not_modified
     canonical_zone = _resolve_zone(zone) if zone else None
+    if page.stream:
+        return stream_records("assignments", page, request, canonical_zone)
+    if page.requested:
+        items, next_cursor = paginate("assignments", page, canonical_zone)
+        return {
+            "assignments": items,
+            "next_cursor": next_cursor,
+            "explanation": "Histórico de atribuições realizadas no ambiente mock.",
+        }
     assignments = list_assignments(zone=canonical_zone if canonical_zone else None)
     return {
         "assignments": [assignment.model_dump() for assignment in assignments],
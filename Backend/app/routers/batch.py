@@ -0,0 +1,48 @@
+"""Leitura em lote de entidades por identificador."""
+
+from __future__ import annotations
+
+from typing import Dict, List
+
+from fastapi import APIRouter, Body
+
+from ..http_errors import http_error
+from ..models import BatchGetRequest, FamilyProfile, PersonProfile, StudentProfile, VolunteerProfile
+from ..storage import fetch_config, get_records
+
+router = APIRouter(tags=["batch"])
+
+DEFAULT_MAX_IDS = 1000
+_COLLECTIONS = {
+    "students": StudentProfile,
+    "families": FamilyProfile,
+    "persons": PersonProfile,
+    "volunteers": VolunteerProfile,
+}
+
+
+@router.post("/batch/get")
+def post_batch_get(body: BatchGetRequest = Body(...)) -> dict:
+    requested = {name: list(dict.fromkeys(getattr(body, name))) for name in _COLLECTIONS}
+    total = sum(len(ids) for ids in requested.values())
+    if not total:
+        raise http_error(400, "lote_vazio")
+    max_ids = int(fetch_config().get("batch_get_max_ids", DEFAULT_MAX_IDS))
+    if total > max_ids:
+        raise http_error(400, "lote_excede_limite", {"max_items": max_ids, "received": total})
+
+    found: Dict[str, List[dict]] = {}
+    missing: Dict[str, List[str]] = {}
+    for name, ids in requested.items():
+        rows = get_records(name, ids)
+        model = _COLLECTIONS[name]
+        found[name] = [model(**rows[entity_id]).model_dump() for entity_id in ids if entity_id in rows]
+        missing[name] = [entity_id for entity_id in ids if entity_id not in rows]
+    return {
+        **found,
+        "missing": missing,
+        "explanation": "Registros encontrados na ordem pedida (ids repetidos contam uma vez); ausentes listados em `missing`.",
+    }
+
+
+__all__ = ["router"]
@@ -2,10 +2,13 @@
 
 from __future__ import annotations
 
-from fastapi import APIRouter, Path, Query
+from fastapi import APIRouter, BackgroundTasks, Depends, Path, Query, Request, Response
 
+from ..http_cache import versioned
 from ..http_errors import http_error
-from ..storage import get_family, list_families, resolve_zone
+from ..pagination import ListParams, list_params, paginate, stream_records
+from ..services.cache_refresh import is_stale, refresh_family_if_stale, service_cutoffs
+from ..storage import get_family, list_families, list_family_services, resolve_zone
 
 router = APIRouter(tags=["families"])
 
@@ -21,8 +24,24 @@ def _resolve_zone(zone: str) -> str:
 
 
 @router.get("/families")
-def get_families(zone: str | None = Query(default=None, description="Zona a filtrar.")) -> dict:
+def get_families(
+    request: Request,
+    zone: str | None = Query(default=None, description="Zona a filtrar."),
+    page: ListParams = Depends(list_params),
+    not_modified: Response | None = Depends(versioned("families", "students")),
+):
+    if not_modified is not None:
+        return not_modified
     canonical_zone = _resolve_zone(zone) if zone else None
+    if page.stream:
+        return stream_records("families", page, request, canonical_zone)
+    if page.requested:
+        items, next_cursor = paginate("families", page, canonical_zone)
+        return {
+            "families": items,
+            "next_cursor": next_cursor,
+            "explanation": "Perfis familiares com dados mockados e enriquecimento de serviços.",
+        }
     families = list_families(zone=canonical_zone if canonical_zone else None)
     return {
         "families": [family.model_dump() for family in families],
@@ -31,7 +50,15 @@ def get_families(zone: str | None = Query(default=None, description="Zona a filt
 
 
 @router.get("/family/{family_id}")
-def get_family_profile(family_id: str = Path(..., description="Identificador da família.")) -> dict:
+def get_family_profile(
+    background_tasks: BackgroundTasks,
+    family_id: str = Path(..., description="Identificador da família."),
+    not_modified: Response | None = Depends(versioned("families", body_cache=False)),
+):
+    # Agendada antes do 304 para que revalidacoes condicionais tambem renovem servicos vencidos.
+    background_tasks.add_task(refresh_family_if_stale, family_id)
+    if not_modified is not None:
+        return not_modified
     family = get_family(family_id)
     if not family:
         raise http_error(404, "familia_nao_encontrada", {"family_id": family_id})
@@ -41,4 +68,31 @@ def get_family_profile(family_id: str = Path(..., description="Identificador da
     }
 
 
+@router.get("/family/{family_id}/services")
+def get_family_services(
+    background_tasks: BackgroundTasks,
+    family_id: str = Path(..., description="Identificador da família."),
+) -> dict:
+    entries = list_family_services(family_id)
+    if not entries and not get_family(family_id):
+        raise http_error(404, "familia_nao_encontrada", {"family_id": family_id})
+    cutoffs, default_cutoff = service_cutoffs()
+    services = {
+        source: {
+            "id": entry.id,
+            "payload": entry.payload,
+            "fetched_at": entry.fetched_at,
+            "stale": is_stale(entry, cutoffs, default_cutoff),
+        }
+        for source, entry in entries.items()
+    }
+    if any(item["stale"] for item in services.values()):
+        background_tasks.add_task(refresh_family_if_stale, family_id)
+    return {
+        "family_id": family_id,
+        "services": services,
+        "explanation": "Status em cache das fontes externas (mock); entradas vencidas são revalidadas em segundo plano.",
+    }
+
+
 __all__ = ["router"]
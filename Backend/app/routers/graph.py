@@ -2,155 +2,194 @@
 
 from __future__ import annotations
 
-from fastapi import APIRouter, Path
+from typing import Dict, List, Literal
 
+from fastapi import APIRouter, Depends, Path, Query, Request, Response
+from fastapi.responses import StreamingResponse
+
+from ..http_cache import versioned
 from ..http_errors import http_error
-from ..storage import (
-    get_family,
-    get_person,
-    get_student,
-    list_assignments,
-    list_relationships,
-    list_volunteers,
-)
+from ..indexes import get_graph_index, get_household_components
+from ..indexes.graph import GRAPH_COLLECTIONS, NODE_COLLECTIONS, Edge
+from ..pagination import ListParams, list_params, paginate, stream_records
+from ..services.graph_analytics import get_analytics
+from ..services.graph_export import iter_ndjson, to_csr, zone_graph
+from ..storage import fetch_config, get_family, get_records, get_student, list_relationships, resolve_zone
 
 router = APIRouter(tags=["graph"])
 
+def _resolve_zone(zone: str) -> str:
+    try:
+        return resolve_zone(zone)
+    except ValueError as exc:
+        message = str(exc)
+        if message == "zona_obrigatoria":
+            raise http_error(400, message)
+        raise http_error(400, "zona_invalida", {"zone": zone})
+
+
+def _node_payload(kind: str, row: dict) -> dict:
+    if kind == "student":
+        return {"id": row["id"], "type": "student", "label": row["id"], "zone": row["zone"], "tags": row.get("tags", [])}
+    if kind == "person":
+        return {
+            "id": row["id"],
+            "type": "person",
+            "label": row["name"],
+            "preferred_name": row.get("preferred_name"),
+            "tags": row.get("tags", []),
+        }
+    if kind == "family":
+        return {"id": row["id"], "type": "family", "label": row["id"], "eligibility": row.get("eligibility_signals", [])}
+    return {
+        "id": row["id"],
+        "type": "volunteer",
+        "label": row["name"],
+        "zone": row["zone"],
+        "skills": row.get("skills", []),
+    }
+
+
+def _resolve_nodes(node_ids: List[str]) -> Dict[str, dict]:
+    """Resolve os nos em lote por colecao, sem materializar modelos."""
+    index = get_graph_index()
+    by_kind: Dict[str, List[str]] = {}
+    for node_id in node_ids:
+        kind = index.kind(node_id)
+        if kind:
+            by_kind.setdefault(kind, []).append(node_id)
+    resolved: Dict[str, dict] = {}
+    for kind, ids in by_kind.items():
+        for node_id, row in get_records(NODE_COLLECTIONS[kind], ids).items():
+            resolved[node_id] = _node_payload(kind, row)
+    return resolved
+
+
+def _edge_payload(edge: Edge) -> dict:
+    edge_id, source, target, edge_type, extra = edge
+    return {"id": edge_id, "from": source, "to": target, "type": edge_type, **extra}
+
+
+@router.get("/relationships")
+def get_relationships(
+    request: Request,
+    page: ListParams = Depends(list_params),
+    not_modified: Response | None = Depends(versioned("relationships")),
+):
+    if not_modified is not None:
+        return not_modified
+    if page.stream:
+        return stream_records("relationships", page, request)
+    explanation = "Relacionamentos entre pessoas (responsáveis, irmãos e demais vínculos)."
+    if page.requested:
+        items, next_cursor = paginate("relationships", page)
+        return {"relationships": items, "next_cursor": next_cursor, "explanation": explanation}
+    return {
+        "relationships": [edge.model_dump() for edge in list_relationships()],
+        "explanation": explanation,
+    }
+
 
 @router.get("/network/student/{student_id}")
-def get_student_network(student_id: str = Path(..., description="Identificador do aluno.")) -> dict:
-    student = get_student(student_id)
-    if not student:
+def get_student_network(
+    student_id: str = Path(..., description="Identificador do aluno."),
+    depth: int = Query(default=2, ge=1, le=6, description="Saltos a partir do aluno (2 = família, responsáveis e voluntário)."),
+    max_nodes: int | None = Query(default=None, ge=1, description="Limite de nós retornados."),
+    max_edges: int | None = Query(default=None, ge=1, description="Limite de arestas retornadas."),
+    not_modified: Response | None = Depends(versioned(*GRAPH_COLLECTIONS, "persons", "volunteers")),
+):
+    if not_modified is not None:
+        return not_modified
+    if not get_student(student_id):
         raise http_error(404, "aluno_nao_encontrado", {"student_id": student_id})
 
-    nodes: dict[str, dict] = {}
-    edges: list[dict] = []
+    config = fetch_config()
+    node_limit = min(max_nodes or int(config.get("network_max_nodes", 500)), int(config.get("network_max_nodes", 500)))
+    edge_limit = min(max_edges or int(config.get("network_max_edges", 2000)), int(config.get("network_max_edges", 2000)))
+    distances, edges, truncated = get_graph_index().traverse([student_id], depth, node_limit, edge_limit)
+
+    nodes = _resolve_nodes(list(distances))
+    return {
+        "nodes": [{**nodes[node_id], "depth": distance} for node_id, distance in distances.items() if node_id in nodes],
+        "edges": [_edge_payload(edge) for edge in edges if edge[1] in nodes and edge[2] in nodes],
+        "depth": depth,
+        "truncated": truncated,
+        "explanation": "Grafo social conectando aluno, família, responsáveis e voluntários até a profundidade pedida.",
+    }
 
-    def add_node(node_id: str, data: dict) -> None:
-        nodes.setdefault(node_id, {"id": node_id, **data})
 
-    add_node(
-        student.id,
-        {
-            "type": "student",
-            "label": student.id,
-            "zone": student.zone,
-            "tags": student.tags,
-        },
+@router.get("/network/zone/{zone}")
+def get_zone_network(
+    response: Response,
+    zone: str = Path(..., description="Zona cujos alunos iniciam o grafo."),
+    format: Literal["csr", "ndjson"] = Query(default="csr", description="`csr` (arrays compactos) ou `ndjson` (um nó/aresta por linha)."),
+    not_modified: Response | None = Depends(versioned(*GRAPH_COLLECTIONS, "persons", "volunteers")),
+):
+    if not_modified is not None:
+        return not_modified
+    canonical = _resolve_zone(zone)
+    config = fetch_config()
+    nodes, edges, truncated = zone_graph(
+        canonical,
+        int(config.get("network_zone_max_nodes", 200000)),
+        int(config.get("network_zone_max_edges", 1000000)),
     )
-
-    student_person = get_person(student.person_id)
-    if student_person:
-        add_node(
-            student_person.id,
-            {
-                "type": "person",
-                "label": student_person.name,
-                "preferred_name": student_person.preferred_name,
-                "tags": student_person.tags,
-            },
-        )
-        edges.append(
-            {
-                "id": f"E{student_person.id}{student.id}",
-                "from": student_person.id,
-                "to": student.id,
-                "type": "self_profile",
-            }
+    if format == "ndjson":
+        return StreamingResponse(
+            iter_ndjson(canonical, nodes, edges, truncated),
+            media_type="application/x-ndjson",
+            headers={"ETag": response.headers["etag"]},
         )
+    return {
+        "zone": canonical,
+        **to_csr(nodes, edges),
+        "truncated": truncated,
+        "explanation": "Grafo da zona em CSR: as arestas de saída do nó i são targets[offsets[i]:offsets[i + 1]].",
+    }
+
+
+@router.get("/network/households")
+def get_household_clusters(
+    min_families: int = Query(default=2, ge=1, description="Tamanho mínimo do agrupamento em famílias."),
+    limit: int = Query(default=50, ge=1, le=1000),
+) -> dict:
+    snapshot = get_analytics()
+    clusters = [item for item in snapshot["components"] if item["family_count"] >= min_families]
+    return {
+        "computed_at": snapshot["computed_at"],
+        "component_count": snapshot["component_count"],
+        "total": len(clusters),
+        "items": clusters[:limit],
+        "explanation": "Famílias ligadas por membros em comum ou relacionamentos entre pessoas, maiores primeiro.",
+    }
+
+
+@router.get("/network/households/{family_id}")
+def get_household_cluster(family_id: str = Path(..., description="Identificador da família.")) -> dict:
+    if not get_family(family_id):
+        raise http_error(404, "familia_nao_encontrada", {"family_id": family_id})
+    component = get_household_components().component_of(family_id)
+    families, persons = (sorted(component[1]), component[2]) if component else ([family_id], 0)
+    return {
+        "family_id": family_id,
+        "component_id": families[0],
+        "families": families,
+        "family_count": len(families),
+        "person_count": persons,
+    }
 
-    family = get_family(student.family_id)
-    if family:
-        add_node(
-            family.id,
-            {
-                "type": "family",
-                "label": family.id,
-                "eligibility": family.eligibility_signals,
-            },
-        )
-        edges.append(
-            {
-                "id": f"E{student.id}{family.id}",
-                "from": student.id,
-                "to": family.id,
-                "type": "member_of",
-            }
-        )
-        for member in family.household:
-            person = get_person(member.person_id)
-            if not person:
-                continue
-            add_node(
-                person.id,
-                {
-                    "type": "person",
-                    "label": person.name,
-                    "preferred_name": person.preferred_name,
-                    "tags": person.tags,
-                },
-            )
-            edges.append(
-                {
-                    "id": f"E{family.id}{person.id}",
-                    "from": family.id,
-                    "to": person.id,
-                    "type": member.role,
-                }
-            )
-
-    relationships = list_relationships()
-    for relation in relationships:
-        if relation.to_person_id == student.person_id:
-            guardian = get_person(relation.from_person_id)
-            if guardian:
-                add_node(
-                    guardian.id,
-                    {
-                        "type": "person",
-                        "label": guardian.name,
-                        "preferred_name": guardian.preferred_name,
-                        "tags": guardian.tags,
-                    },
-                )
-            edges.append(
-                {
-                    "id": relation.id,
-                    "from": relation.from_person_id,
-                    "to": relation.to_person_id,
-                    "type": relation.type,
-                    "weight": relation.weight,
-                }
-            )
-
-    # Voluntario atribuido se existir
-    assignment = next((item for item in list_assignments() if item.student_id == student.id), None)
-    if assignment:
-        volunteer = next((vol for vol in list_volunteers() if vol.id == assignment.volunteer_id), None)
-        if volunteer:
-            add_node(
-                volunteer.id,
-                {
-                    "type": "volunteer",
-                    "label": volunteer.name,
-                    "zone": volunteer.zone,
-                    "skills": volunteer.skills,
-                },
-            )
-        edges.append(
-            {
-                "id": f"assign-{assignment.student_id}-{assignment.volunteer_id}",
-                "from": assignment.student_id,
-                "to": assignment.volunteer_id,
-                "type": "assigned_to",
-                "distance_km": assignment.distance_km,
-            }
-        )
 
+@router.get("/network/volunteers/centrality")
+def get_volunteer_centrality(limit: int = Query(default=50, ge=1, le=1000)) -> dict:
+    snapshot = get_analytics()
     return {
-        "nodes": list(nodes.values()),
-        "edges": edges,
-        "explanation": "Grafo social simplificado conectando aluno, família e voluntário (quando disponível).",
+        "computed_at": snapshot["computed_at"],
+        "total": len(snapshot["volunteers"]),
+        "items": snapshot["volunteers"][:limit],
+        "explanation": (
+            "Grau (alunos, famílias e agrupamentos atendidos) e intermediação aproximada no grafo "
+            "voluntário–agrupamento; calculados em segundo plano."
+        ),
     }
 
 
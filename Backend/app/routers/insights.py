@@ -2,19 +2,43 @@
 
 from __future__ import annotations
 
-from fastapi import APIRouter, Body
+import json
+
+from fastapi import APIRouter, BackgroundTasks, Body, Query
+from fastapi.responses import StreamingResponse
 
 from ..http_errors import http_error
-from ..models import InsightFamilyRequest, InsightStudentRequest
-from ..services.insights import generate_family_insight, generate_student_insight
+from ..models import InsightBatchRequest, InsightFamilyRequest, InsightStudentRequest
+from ..services.insight_batch import batch_limits, generate_insight_batch
+from ..services.insight_precompute import claim_zone, precompute_status, precompute_zone
+from ..services.insights import (
+    InsightPlan,
+    generate_family_insight,
+    generate_student_insight,
+    prepare_family_stream,
+    prepare_student_stream,
+    stream_plan,
+)
+from ..services.llm_client import get_breaker
+from ..storage import resolve_zone
 
 router = APIRouter(tags=["insights"])
 
 
+def _resolve_zone(zone: str) -> str:
+    try:
+        return resolve_zone(zone)
+    except ValueError as exc:
+        message = str(exc)
+        if message == "zona_obrigatoria":
+            raise http_error(400, message)
+        raise http_error(400, "zona_invalida", {"zone": zone})
+
+
 @router.post("/insights/student")
-def post_student_insight(body: InsightStudentRequest = Body(...)) -> dict:
+async def post_student_insight(body: InsightStudentRequest = Body(...)) -> dict:
     try:
-        result = generate_student_insight(body)
+        result = await generate_student_insight(body)
     except ValueError as exc:
         if str(exc) == "aluno_nao_encontrado":
             raise http_error(404, "aluno_nao_encontrado", {"student_id": body.student_id}) from exc
@@ -23,9 +47,9 @@ def post_student_insight(body: InsightStudentRequest = Body(...)) -> dict:
 
 
 @router.post("/insights/family")
-def post_family_insight(body: InsightFamilyRequest = Body(...)) -> dict:
+async def post_family_insight(body: InsightFamilyRequest = Body(...)) -> dict:
     try:
-        result = generate_family_insight(body)
+        result = await generate_family_insight(body)
     except ValueError as exc:
         if str(exc) == "familia_nao_encontrada":
             raise http_error(404, "familia_nao_encontrada", {"family_id": body.family_id}) from exc
@@ -33,4 +57,83 @@ def post_family_insight(body: InsightFamilyRequest = Body(...)) -> dict:
     return result
 
 
+def _event_stream(plan: InsightPlan) -> StreamingResponse:
+    async def events():
+        async for event, data in stream_plan(plan):
+            yield f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/insights/student/stream")
+async def post_student_insight_stream(body: InsightStudentRequest = Body(...)) -> StreamingResponse:
+    try:
+        plan = await prepare_student_stream(body)
+    except ValueError as exc:
+        if str(exc) == "aluno_nao_encontrado":
+            raise http_error(404, "aluno_nao_encontrado", {"student_id": body.student_id}) from exc
+        raise
+    return _event_stream(plan)
+
+
+@router.post("/insights/family/stream")
+async def post_family_insight_stream(body: InsightFamilyRequest = Body(...)) -> StreamingResponse:
+    try:
+        plan = await prepare_family_stream(body)
+    except ValueError as exc:
+        if str(exc) == "familia_nao_encontrada":
+            raise http_error(404, "familia_nao_encontrada", {"family_id": body.family_id}) from exc
+        raise
+    return _event_stream(plan)
+
+
+@router.get("/insights/provider")
+def get_provider_status() -> dict:
+    return {
+        "breaker": get_breaker().snapshot(),
+        "explanation": "Estado do circuit breaker do provedor de LLM; aberto significa fallback imediato.",
+    }
+
+
+@router.post("/insights/precompute", status_code=202)
+async def post_insight_precompute(
+    background_tasks: BackgroundTasks,
+    zone: str = Query(description="Zona cujos insights serão pré-gerados."),
+) -> dict:
+    canonical = _resolve_zone(zone)
+    if not claim_zone(canonical):
+        raise http_error(409, "precomputo_em_andamento", {"zone": canonical})
+    background_tasks.add_task(precompute_zone, canonical)
+    return {
+        "zone": canonical,
+        "status": "scheduled",
+        "explanation": "Pré-geração agendada: alunos sem atribuição e com mais faltas primeiro, respeitando a taxa do provedor.",
+    }
+
+
+@router.get("/insights/precompute")
+def get_insight_precompute() -> dict:
+    return {"jobs": precompute_status()}
+
+
+@router.post("/insights/batch")
+async def post_insight_batch(body: InsightBatchRequest = Body(...)) -> StreamingResponse:
+    total = len(set(body.student_ids)) + len(set(body.family_ids))
+    if not total:
+        raise http_error(400, "lote_vazio")
+    _, _, max_items = batch_limits()
+    if total > max_items:
+        raise http_error(400, "lote_excede_limite", {"max_items": max_items, "received": total})
+
+    async def lines():
+        async for item in generate_insight_batch(body):
+            yield json.dumps(item, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
 __all__ = ["router"]
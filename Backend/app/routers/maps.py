@@ -0,0 +1,66 @@
+"""Agrupamentos do mapa servidos por tiles."""
+
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, Path, Query, Response
+
+from ..http_cache import versioned
+from ..http_errors import http_error
+from ..indexes import MAX_TILE_ZOOM, TILE_COLLECTIONS, get_tile_index, tile_bounds
+from ..services.coverage import COVERAGE_COLLECTIONS, get_coverage
+from ..storage import resolve_zone
+
+router = APIRouter(tags=["map"])
+
+
+def _resolve_zone(zone: str) -> str:
+    try:
+        return resolve_zone(zone)
+    except ValueError as exc:
+        message = str(exc)
+        if message == "zona_obrigatoria":
+            raise http_error(400, message)
+        raise http_error(400, "zona_invalida", {"zone": zone})
+
+
+@router.get("/map/tiles/{z}/{x}/{y}")
+def get_map_tile(
+    z: int = Path(..., description="Nível de zoom (Web Mercator)."),
+    x: int = Path(..., description="Coluna do tile."),
+    y: int = Path(..., description="Linha do tile."),
+    not_modified: Response | None = Depends(versioned(*TILE_COLLECTIONS)),
+):
+    if not_modified is not None:
+        return not_modified
+    if not 0 <= z <= MAX_TILE_ZOOM or not 0 <= x < 1 << z or not 0 <= y < 1 << z:
+        raise http_error(400, "tile_invalido", {"z": z, "x": x, "y": y, "max_zoom": MAX_TILE_ZOOM})
+    clusters = get_tile_index().tile(z, x, y)
+    return {
+        "z": z,
+        "x": x,
+        "y": y,
+        "bbox": list(tile_bounds(z, x, y)),
+        "clusters": clusters,
+        "totals": {
+            name: sum(cluster[name] for cluster in clusters) for name in ("students", "volunteers", "unassigned")
+        },
+        "explanation": "Alunos, voluntários e alunos sem voluntário agregados por célula do tile; tamanho fixo qualquer que seja a zona.",
+    }
+
+
+@router.get("/map/coverage")
+def get_map_coverage(
+    zone: str = Query(..., description="Zona (obrigatória)."),
+    cell_km: float | None = Query(default=None, gt=0, le=50, description="Lado da célula em km (padrão `coverage_cell_km`)."),
+    not_modified: Response | None = Depends(versioned(*COVERAGE_COLLECTIONS)),
+):
+    if not_modified is not None:
+        return not_modified
+    coverage = get_coverage(_resolve_zone(zone), cell_km)
+    return {
+        **coverage,
+        "explanation": "Demanda (alunos sem voluntário) versus vagas restantes de voluntários que alcançam cada célula; lacuna positiva indica falta de capacidade.",
+    }
+
+
+__all__ = ["router"]
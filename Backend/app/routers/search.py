@@ -0,0 +1,62 @@
+"""Busca aproximada de pessoas e voluntarios por nome."""
+
+from __future__ import annotations
+
+from typing import Dict, List
+
+from fastapi import APIRouter, Depends, Query, Response
+
+from ..http_cache import versioned
+from ..http_errors import http_error
+from ..indexes import NAME_FIELDS, get_name_search_index
+from ..storage import get_records
+
+router = APIRouter(tags=["search"])
+
+_TYPES = {"person": "persons", "volunteer": "volunteers"}
+_LABELS = {collection: label for label, collection in _TYPES.items()}
+
+
+@router.get("/search/people")
+def search_people(
+    q: str = Query(..., min_length=1, description="Nome ou parte dele; acentos e maiúsculas são ignorados."),
+    type: str | None = Query(default=None, description="Restringe a `person` ou `volunteer`."),
+    limit: int = Query(default=20, ge=1, le=200, description="Máximo de resultados."),
+    min_score: float = Query(default=0.3, gt=0, le=1, description="Fração mínima dos trigramas da busca presentes no nome."),
+    not_modified: Response | None = Depends(versioned(*NAME_FIELDS)),
+):
+    if not_modified is not None:
+        return not_modified
+    if type is not None and type not in _TYPES:
+        raise http_error(400, "tipo_invalido", {"type": type, "allowed": list(_TYPES)})
+    collections = (_TYPES[type],) if type else None
+    matches = get_name_search_index().search(q, limit=limit, collections=collections, min_score=min_score)
+
+    rows: Dict[str, Dict[str, dict]] = {
+        collection: get_records(collection, [match["id"] for match in matches if match["collection"] == collection])
+        for collection in NAME_FIELDS
+    }
+    results: List[dict] = []
+    for match in matches:
+        row = rows[match["collection"]].get(match["id"])
+        if row is None:
+            continue
+        results.append(
+            {
+                "type": _LABELS[match["collection"]],
+                "id": match["id"],
+                "name": row["name"],
+                "preferred_name": row.get("preferred_name"),
+                "zone": row.get("zone"),
+                "matched_field": match["field"],
+                "score": match["score"],
+            }
+        )
+    return {
+        "query": q,
+        "results": results,
+        "explanation": "Nomes ranqueados por trigramas em comum com a busca, sem diferenciar acentos ou maiúsculas.",
+    }
+
+
+__all__ = ["router"]
@@ -2,11 +2,19 @@
 
 from __future__ import annotations
 
-from fastapi import APIRouter, Query
+from bisect import bisect_right
+from typing import List
 
+from fastapi import APIRouter, Depends, Path, Query, Request, Response
+
+from ..http_cache import versioned
 from ..http_errors import http_error
+from ..indexes import get_spatial_index, get_student_search_index
+from ..models import StudentProfile
+from ..pagination import ListParams, decode_cursor, encode_cursor, list_params, paginate, parse_fields, stream_records
+from ..services.student_view import EXPANSIONS, expand_students, parse_expand, student_full
 from ..services.sync import sync_zone_students
-from ..storage import list_students, resolve_zone
+from ..storage import get_records, list_students, resolve_zone
 
 router = APIRouter(tags=["students"])
 
@@ -21,9 +29,40 @@ def _resolve_zone(zone: str) -> str:
         raise http_error(400, "zona_invalida", {"zone": zone})
 
 
+def _parse_expand(expand: str | None) -> List[str]:
+    try:
+        return parse_expand(expand)
+    except ValueError as exc:
+        raise http_error(400, "expansao_invalida", {"expand": str(exc).split(","), "allowed": list(EXPANSIONS)})
+
+
 @router.get("/students")
-def get_students(zone: str | None = Query(default=None, description="Filtrar por zona.")) -> dict:
+def get_students(
+    request: Request,
+    zone: str | None = Query(default=None, description="Filtrar por zona."),
+    expand: str | None = Query(default=None, description="Relações a embutir: family, assignment, volunteer."),
+    page: ListParams = Depends(list_params),
+    not_modified: Response | None = Depends(versioned("students", expansions=EXPANSIONS)),
+):
+    if not_modified is not None:
+        return not_modified
     canonical_zone = _resolve_zone(zone) if zone else None
+    relations = _parse_expand(expand)
+    if relations and page.fields is not None and "id" not in [name.strip() for name in page.fields.split(",")]:
+        raise http_error(400, "expansao_requer_id", {"fields": page.fields})
+
+    def join(records: List[dict]) -> List[dict]:
+        return expand_students(records, relations)
+
+    if page.stream:
+        return stream_records("students", page, request, canonical_zone, join if relations else None)
+    if page.requested or relations:
+        items, next_cursor = paginate("students", page, canonical_zone)
+        return {
+            "students": join(items),
+            "next_cursor": next_cursor,
+            "explanation": "Listagem de estudantes mock filtrada por zona quando informado.",
+        }
     students = list_students(zone=canonical_zone if canonical_zone else None)
     return {
         "students": [student.model_dump() for student in students],
@@ -31,6 +70,103 @@ def get_students(zone: str | None = Query(default=None, description="Filtrar por
     }
 
 
+@router.get("/students/search")
+def search_students(
+    zone: str | None = Query(default=None, description="Filtrar por zona."),
+    grade: str | None = Query(default=None, description="Série/ano escolar."),
+    shift: str | None = Query(default=None, description="Turno escolar."),
+    classroom: str | None = Query(default=None, description="Turma."),
+    wheelchair_user: bool | None = Query(default=None, description="Apenas cadeirantes (true) ou não cadeirantes (false)."),
+    min_absences: int | None = Query(default=None, ge=0, description="Faltas mínimas nos últimos 30 dias."),
+    min_delays: int | None = Query(default=None, ge=0, description="Atrasos mínimos nos últimos 30 dias."),
+    eligibility: str | None = Query(default=None, description="Sinais de elegibilidade da família, separados por vírgula (todos exigidos)."),
+    assigned: bool | None = Query(default=None, description="Apenas alunos com (true) ou sem (false) voluntário."),
+    cursor: str | None = Query(default=None, description="Cursor opaco devolvido em `next_cursor`."),
+    limit: int = Query(default=50, ge=1, le=5000, description="Máximo de registros por página."),
+    fields: str | None = Query(default=None, description="Campos de primeiro nível separados por vírgula."),
+    not_modified: Response | None = Depends(versioned("students", "families", "assignments")),
+):
+    if not_modified is not None:
+        return not_modified
+    projection = parse_fields("students", fields)
+    ids = get_student_search_index().search(
+        zone=_resolve_zone(zone) if zone else None,
+        grade=grade,
+        shift=shift,
+        classroom=classroom,
+        wheelchair_user=wheelchair_user,
+        min_absences=min_absences,
+        min_delays=min_delays,
+        eligibility=[signal.strip() for signal in (eligibility or "").split(",") if signal.strip()],
+        assigned=assigned,
+    )
+    start = bisect_right(ids, decode_cursor(cursor)) if cursor is not None else 0
+    page_ids = ids[start : start + limit]
+    rows = get_records("students", page_ids)
+    students = [StudentProfile(**rows[student_id]).model_dump() for student_id in page_ids if student_id in rows]
+    if projection is not None:
+        students = [{name: row.get(name) for name in projection} for row in students]
+    has_more = start + limit < len(ids)
+    return {
+        "students": students,
+        "total": len(ids),
+        "next_cursor": encode_cursor(page_ids[-1]) if has_more and page_ids else None,
+        "explanation": "Busca de estudantes por interseção de índices em bitmap; filtros combinados exigem todos os critérios.",
+    }
+
+
+@router.get("/students/nearby")
+def get_students_nearby(
+    lat: float = Query(..., ge=-90, le=90, description="Latitude do ponto de referência."),
+    lon: float = Query(..., ge=-180, le=180, description="Longitude do ponto de referência."),
+    radius_km: float = Query(default=3.0, gt=0, le=100, description="Raio de busca em km."),
+    assigned: bool | None = Query(default=None, description="Apenas alunos com (true) ou sem (false) voluntário."),
+    wheelchair_user: bool | None = Query(default=None, description="Filtrar por uso de cadeira de rodas."),
+    limit: int = Query(default=20, ge=1, le=500, description="Máximo de alunos (k mais próximos)."),
+    not_modified: Response | None = Depends(versioned("students", "assignments")),
+):
+    if not_modified is not None:
+        return not_modified
+    matches = get_spatial_index().nearby("students", lat, lon, radius_km)
+    ids = [student_id for _, student_id in matches]
+    rows = get_records("students", ids)
+    assignments = get_records("assignments", ids) if assigned is not None else {}
+    students = []
+    for distance, student_id in matches:
+        row = rows.get(student_id)
+        if row is None:
+            continue
+        if wheelchair_user is not None and row["disabilities"]["wheelchair_user"] != wheelchair_user:
+            continue
+        if assigned is not None and (student_id in assignments) != assigned:
+            continue
+        students.append({**StudentProfile(**row).model_dump(), "distance_km": distance})
+        if len(students) >= limit:
+            break
+    return {
+        "students": students,
+        "explanation": "Alunos dentro do raio, do mais próximo ao mais distante, servidos pela grade espacial.",
+    }
+
+
+@router.get("/student/{student_id}/full")
+def get_student_full(
+    student_id: str = Path(..., description="Identificador do aluno."),
+    not_modified: Response | None = Depends(
+        versioned("students", "persons", "families", "services", "assignments", "volunteers")
+    ),
+):
+    if not_modified is not None:
+        return not_modified
+    aggregate = student_full(student_id)
+    if aggregate is None:
+        raise http_error(404, "aluno_nao_encontrado", {"student_id": student_id})
+    return {
+        **aggregate,
+        "explanation": "Aluno com pessoa, família, responsáveis, serviços, atribuição e voluntário em uma única resposta.",
+    }
+
+
 @router.get("/sync/students")
 def sync_students(zone: str = Query(description="Nome exato da zona (obrigatória).")) -> dict:
     if not zone:
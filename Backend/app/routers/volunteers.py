@@ -2,21 +2,40 @@
 
 from __future__ import annotations
 
-from fastapi import APIRouter, Body, Query
+import tempfile
 
+from fastapi import APIRouter, Body, Depends, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+
+from ..http_cache import versioned
 from ..http_errors import http_error
+from ..indexes import get_spatial_index
 from ..models import VolunteerProfile, VolunteerUpsert
+from ..pagination import NDJSON_MEDIA_TYPE, ListParams, list_params, paginate, stream_records
+from ..services.volunteer_import import (
+    DEFAULT_MAX_ROWS,
+    IMPORT_FORMATS,
+    ImportFileError,
+    import_volunteers,
+    volunteer_profile,
+)
 from ..storage import (
     append_audit,
     fetch_config,
-    generate_id,
+    get_records,
     list_volunteers,
+    reserve_id,
     resolve_zone,
     upsert_volunteer,
+    volunteer_loads,
 )
 
 router = APIRouter(tags=["volunteers"])
 
+# Corpo da importacao fica em memoria ate este tamanho; acima vai para um arquivo temporario.
+_IMPORT_SPOOL_BYTES = 4 * 1024 * 1024
+_IMPORT_MEDIA_TYPES = {"text/csv": "csv", NDJSON_MEDIA_TYPE: "ndjson", "application/jsonl": "ndjson"}
+
 
 def _resolve_zone(zone: str) -> str:
     try:
@@ -29,8 +48,24 @@ def _resolve_zone(zone: str) -> str:
 
 
 @router.get("/volunteers")
-def get_volunteers(zone: str | None = Query(default=None, description="Filtrar por zona.")) -> dict:
+def get_volunteers(
+    request: Request,
+    zone: str | None = Query(default=None, description="Filtrar por zona."),
+    page: ListParams = Depends(list_params),
+    not_modified: Response | None = Depends(versioned("volunteers")),
+):
+    if not_modified is not None:
+        return not_modified
     canonical_zone = _resolve_zone(zone) if zone else None
+    if page.stream:
+        return stream_records("volunteers", page, request, canonical_zone)
+    if page.requested:
+        items, next_cursor = paginate("volunteers", page, canonical_zone)
+        return {
+            "volunteers": items,
+            "next_cursor": next_cursor,
+            "explanation": "Lista de voluntários mock para apoio acadêmico.",
+        }
     volunteers = list_volunteers(zone=canonical_zone if canonical_zone else None)
     return {
         "volunteers": [volunteer.model_dump() for volunteer in volunteers],
@@ -38,36 +73,49 @@ def get_volunteers(zone: str | None = Query(default=None, description="Filtrar p
     }
 
 
+@router.get("/volunteers/nearby")
+def get_volunteers_nearby(
+    lat: float = Query(..., ge=-90, le=90, description="Latitude do ponto de referência."),
+    lon: float = Query(..., ge=-180, le=180, description="Longitude do ponto de referência."),
+    radius_km: float = Query(default=3.0, gt=0, le=100, description="Raio de busca em km."),
+    has_capacity: bool | None = Query(default=None, description="Apenas voluntários com (true) ou sem (false) vagas."),
+    mobility_assistance: bool | None = Query(default=None, description="Filtrar por apoio de mobilidade."),
+    limit: int = Query(default=20, ge=1, le=500, description="Máximo de voluntários (k mais próximos)."),
+    not_modified: Response | None = Depends(versioned("volunteers", "assignments")),
+):
+    if not_modified is not None:
+        return not_modified
+    matches = get_spatial_index().nearby("volunteers", lat, lon, radius_km)
+    rows = get_records("volunteers", [volunteer_id for _, volunteer_id in matches])
+    loads = volunteer_loads(rows)
+    volunteers = []
+    for distance, volunteer_id in matches:
+        row = rows.get(volunteer_id)
+        if row is None:
+            continue
+        if mobility_assistance is not None and row["accessibility"]["mobility_assistance"] != mobility_assistance:
+            continue
+        if has_capacity is not None and (loads[volunteer_id] < row["max_students"]) != has_capacity:
+            continue
+        volunteers.append(
+            {**VolunteerProfile(**row).model_dump(), "distance_km": distance, "assigned_students": loads[volunteer_id]}
+        )
+        if len(volunteers) >= limit:
+            break
+    return {
+        "volunteers": volunteers,
+        "explanation": "Voluntários dentro do raio, do mais próximo ao mais distante, servidos pela grade espacial.",
+    }
+
+
 @router.post("/webhook/volunteers")
 def webhook_volunteers(payload: VolunteerUpsert = Body(...)) -> dict:
     canonical_zone = _resolve_zone(payload.zone)
     config = fetch_config()
-    existing_ids = {vol.id for vol in list_volunteers()}
-    volunteer_id = payload.id or generate_id("V", existing_ids)
-    if payload.id and payload.id in existing_ids:
-        volunteer_id = generate_id("V", existing_ids)
-
-    max_students = payload.max_students if payload.max_students is not None else int(config.get("max_students_default", 10))
-    radius_km = payload.radius_km if payload.radius_km is not None else float(config.get("max_radius_km", 8.0))
-    verified = payload.verified if payload.verified is not None else False
-    profile = VolunteerProfile(
-        id=volunteer_id,
-        name=payload.name,
-        zone=canonical_zone,
-        address=payload.address,
-        contact=payload.contact,
-        coordinates=payload.coordinates,
-        max_students=max_students,
-        radius_km=radius_km,
-        availability=payload.availability,
-        skills=payload.skills,
-        languages=payload.languages,
-        experience_years=payload.experience_years or 0,
-        accessibility=payload.accessibility,
-        verified=verified,
-        warm_notes=payload.warm_notes,
-        tags=payload.tags,
-    )
+    # ID informado so e mantido se ainda estiver livre.
+    free = payload.id and not get_records("volunteers", [payload.id])
+    volunteer_id = payload.id if free else reserve_id("V")
+    profile = volunteer_profile(payload, volunteer_id, canonical_zone, config)
     upsert_volunteer(profile)
 
     append_audit(
@@ -78,4 +126,31 @@ def webhook_volunteers(payload: VolunteerUpsert = Body(...)) -> dict:
     return {"message": "volunteer_saved", "volunteer": profile.model_dump()}
 
 
+@router.post("/volunteers/import")
+async def import_volunteers_file(
+    request: Request,
+    format: str | None = Query(default=None, description="`csv` ou `ndjson`; por padrão deduzido do Content-Type."),
+) -> dict:
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    fmt = format or _IMPORT_MEDIA_TYPES.get(content_type)
+    if fmt not in IMPORT_FORMATS:
+        raise http_error(400, "formato_invalido", {"format": format or content_type, "allowed": list(IMPORT_FORMATS)})
+    with tempfile.SpooledTemporaryFile(max_size=_IMPORT_SPOOL_BYTES) as spool:
+        async for chunk in request.stream():
+            spool.write(chunk)
+        spool.seek(0)
+        try:
+            result = await run_in_threadpool(import_volunteers, spool, fmt)
+        except ImportFileError as exc:
+            raise http_error(400, str(exc), {"row": exc.row})
+        except ValueError as exc:
+            max_rows = int(fetch_config().get("volunteer_import_max_rows", DEFAULT_MAX_ROWS))
+            raise http_error(400, str(exc), {"max_rows": max_rows})
+    return {
+        "message": "volunteers_imported",
+        **result,
+        "explanation": "Linhas válidas gravadas em uma única escrita; as inválidas voltam em `errors` com o número da linha.",
+    }
+
+
 __all__ = ["router"]
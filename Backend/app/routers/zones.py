@@ -0,0 +1,51 @@
+"""Estatisticas agregadas por zona."""
+
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, Query, Response
+
+from ..http_cache import versioned
+from ..http_errors import http_error
+from ..indexes import STATS_COLLECTIONS, get_zone_stats, rebuild_zone_stats, zone_stats_generation
+from ..storage import append_audit, fetch_zones, resolve_zone
+
+router = APIRouter(tags=["zones"])
+
+
+def _resolve_zone(zone: str) -> str:
+    try:
+        return resolve_zone(zone)
+    except ValueError as exc:
+        message = str(exc)
+        if message == "zona_obrigatoria":
+            raise http_error(400, message)
+        raise http_error(400, "zona_invalida", {"zone": zone})
+
+
+@router.get("/zones/stats")
+def get_zones_stats(
+    zone: str | None = Query(default=None, description="Limitar a uma zona."),
+    not_modified: Response | None = Depends(versioned(*STATS_COLLECTIONS, extra=zone_stats_generation)),
+):
+    if not_modified is not None:
+        return not_modified
+    stats = get_zone_stats()
+    zones = [_resolve_zone(zone)] if zone else sorted(set(fetch_zones()) | set(stats.zone_names()))
+    return {
+        "zones": stats.stats(zones),
+        "explanation": "Totais por zona mantidos a cada escrita; distâncias (média, p50, p90) estimadas por sketch com erro relativo de 1%.",
+    }
+
+
+@router.post("/zones/stats/rebuild")
+def post_zones_stats_rebuild() -> dict:
+    stats = rebuild_zone_stats()
+    append_audit("zone_stats_rebuild", {})
+    return {
+        "message": "zone_stats_rebuilt",
+        "zones": stats.stats(),
+        "explanation": "Contadores recalculados a partir dos arquivos e dos motivos registrados no log de auditoria.",
+    }
+
+
+__all__ = ["router"]
@@ -139,10 +139,55 @@ TIME_SLOT_OPTIONS = [
 ]
 
 # Parâmetros gerais (mantidos em inglês para não quebrar consumidores)
-CONFIG: Dict[str, float] = {
+CONFIG: Dict[str, object] = {
     "max_students_default": 10,
     "max_radius_km": 8.0,
     "min_students_per_zone_after_sync": 5,
+    "services_ttl_seconds": {
+        "default": 86400,
+        "sus": 604800,
+        "cad_unico": 2592000,
+        "bolsa_familia": 2592000,
+        "outro": 604800,
+    },
+    "services_refresh_interval_seconds": 300,
+    "services_refresh_batch_size": 20000,
+    "insight_cache_max_entries": 1000,
+    "insight_cache_ttl_seconds": 21600,
+    "insight_cache_persist": True,
+    "insight_cache_flush_seconds": 5.0,
+    "llm_max_concurrency": 8,
+    "llm_max_connections": 20,
+    "insight_batch_concurrency": 4,
+    "insight_batch_rate_per_second": 5.0,
+    "insight_batch_max_items": 500,
+    "llm_breaker": {
+        "failure_threshold": 5,
+        "p95_threshold_seconds": 8.0,
+        "open_seconds": 30.0,
+        "window": 50,
+        "min_samples": 10,
+        "min_timeout_seconds": 2.0,
+        "max_timeout_seconds": 15.0,
+        "timeout_factor": 2.0,
+    },
+    "insight_precompute_hour_utc": None,
+    "insight_precompute_zones": [],
+    "insight_precompute_rate_per_second": 1.0,
+    "insight_precompute_concurrency": 2,
+    "insight_precompute_max_per_run": 0,
+    "network_max_nodes": 500,
+    "network_max_edges": 2000,
+    "network_zone_max_nodes": 200000,
+    "network_zone_max_edges": 1000000,
+    "graph_analytics_interval_seconds": 60,
+    "graph_analytics_betweenness_samples": 500,
+    "compression_min_bytes": 1024,
+    "response_cache_max_bytes": 33554432,
+    "batch_get_max_ids": 1000,
+    "coverage_cell_km": 1.0,
+    "coverage_max_cells": 40000,
+    "volunteer_import_max_rows": 50000,
 }
 
 
@@ -1,6 +1,7 @@
 """Serviços de negócio (sync, assignment, insights)."""
 
 from .assignment import assign_students
+from .cache_refresh import refresh_stale_services
 from .insights import generate_family_insight, generate_student_insight
 from .sync import sync_zone_students
 
@@ -8,5 +9,6 @@ __all__ = [
     "assign_students",
     "generate_family_insight",
     "generate_student_insight",
+    "refresh_stale_services",
     "sync_zone_students",
 ]
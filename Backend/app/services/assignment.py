@@ -5,6 +5,7 @@ from __future__ import annotations
 from datetime import datetime, timezone
 from typing import Dict, List, Optional, Tuple
 
+from ..indexes import get_zone_stats
 from ..models import AssignmentRecord, AssignmentRequest, StudentProfile, VolunteerProfile
 from ..storage import (
     append_assignment,
@@ -144,6 +145,7 @@ def assign_students(request: AssignmentRequest) -> Dict[str, List[dict]]:
         )
 
     summary = _volunteer_summary(list(touched_volunteers.values()) or volunteer_pool, load_map)
+    get_zone_stats().note_unassigned(unassigned)
     append_audit(
         "assign",
         {
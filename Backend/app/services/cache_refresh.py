@@ -0,0 +1,176 @@
+"""Renovacao em segundo plano do cache de servicos externos guiada por TTL."""
+
+from __future__ import annotations
+
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Set, Tuple
+
+from ..models import ExternalServiceStatus, FamilyExternalServices
+from ..storage import (
+    append_audit,
+    family_zones,
+    fetch_config,
+    get_families_many,
+    list_family_services,
+    list_stale_services,
+    upsert_families_many,
+    upsert_service_cache_many,
+)
+from .sync import compose_family_services
+
+DEFAULT_TTL_SECONDS = 86400
+DEFAULT_BATCH_SIZE = 20000
+DEFAULT_INTERVAL_SECONDS = 300
+# Fonte do cache -> campo de ``FamilyProfile.external_services`` que ela alimenta.
+_FAMILY_FIELDS = {"sus": "sus", "cad_unico": "cad_unico", "bolsa_familia": "bolsa_familia", "outro": "others"}
+
+_INFLIGHT: Set[str] = set()
+_INFLIGHT_LOCK = threading.Lock()
+_STOP = threading.Event()
+_WORKER: Optional[threading.Thread] = None
+
+
+def _now() -> datetime:
+    return datetime.utcnow().replace(tzinfo=timezone.utc, microsecond=0)
+
+
+def _iso(moment: datetime) -> str:
+    return moment.isoformat()
+
+
+def _source_cutoffs(config: Dict[str, object], now: datetime) -> Tuple[Dict[str, str], str]:
+    """Converte os TTLs por fonte de ``config.json`` em limites de ``fetched_at``."""
+    ttls = dict(config.get("services_ttl_seconds") or {})
+    default_ttl = float(ttls.pop("default", DEFAULT_TTL_SECONDS))
+    cutoffs = {source: _iso(now - timedelta(seconds=float(ttl))) for source, ttl in ttls.items()}
+    return cutoffs, _iso(now - timedelta(seconds=default_ttl))
+
+
+def is_stale(entry: ExternalServiceStatus, cutoffs: Dict[str, str], default_cutoff: str) -> bool:
+    return entry.fetched_at < cutoffs.get(entry.source, default_cutoff)
+
+
+def service_cutoffs() -> Tuple[Dict[str, str], str]:
+    """Limites de ``fetched_at`` vigentes agora, conforme ``config.json``."""
+    return _source_cutoffs(fetch_config(), _now())
+
+
+def _refresh_entries(entries: List[ExternalServiceStatus]) -> List[str]:
+    """Consulta novamente as fontes (mock) e grava as entradas renovadas em uma escrita.
+
+    As fontes renovadas tambem sao copiadas para ``external_services`` das
+    familias, que e o que ``/family/{id}`` devolve.
+    """
+    timestamp = _iso(_now())
+    zones = family_zones({entry.family_id for entry in entries})
+    composed: Dict[str, Tuple[FamilyExternalServices, Dict[str, dict]]] = {}
+    sources: Dict[str, Set[str]] = {}
+    refreshed: List[ExternalServiceStatus] = []
+    for entry in entries:
+        # Familias sem aluno vinculado mantem o payload, mas nao voltam a bloquear a fila.
+        zone = zones.get(entry.family_id)
+        if zone is not None and entry.family_id not in composed:
+            composed[entry.family_id] = compose_family_services(entry.family_id, zone, timestamp)
+        payload = entry.payload
+        if entry.family_id in composed:
+            payload = composed[entry.family_id][1].get(entry.source, entry.payload)
+            sources.setdefault(entry.family_id, set()).add(entry.source)
+        refreshed.append(entry.model_copy(update={"payload": payload, "fetched_at": timestamp}))
+    upsert_service_cache_many(refreshed)
+
+    families = []
+    for family_id, family in get_families_many(sorted(sources)).items():
+        services = composed[family_id][0]
+        fields = {_FAMILY_FIELDS[source] for source in sources[family_id] if source in _FAMILY_FIELDS}
+        updates = {field: getattr(services, field) for field in fields}
+        if updates:
+            external = family.external_services.model_copy(update=updates)
+            families.append(family.model_copy(update={"external_services": external}))
+    upsert_families_many(families)
+    return [entry.id for entry in refreshed]
+
+
+def refresh_stale_services(limit: Optional[int] = None) -> Dict[str, object]:
+    """Renova um lote limitado das entradas mais antigas que excederam o TTL da fonte.
+
+    Cada lote regrava ``services_cache.json`` e ``families.json`` inteiros uma vez,
+    entao o lote padrao cobre todo o atraso de uma vez em vez de muitas regravacoes.
+    """
+    config = fetch_config()
+    batch_size = int(limit or config.get("services_refresh_batch_size", DEFAULT_BATCH_SIZE))
+    cutoffs, default_cutoff = _source_cutoffs(config, _now())
+    stale = list_stale_services(cutoffs, default_cutoff, limit=batch_size)
+    if not stale:
+        return {"refreshed": [], "remaining": False}
+    refreshed = _refresh_entries(stale)
+    append_audit(
+        "services_refresh",
+        {"refreshed": len(refreshed), "families": sorted({entry.family_id for entry in stale})},
+    )
+    return {"refreshed": refreshed, "remaining": len(stale) >= batch_size}
+
+
+def refresh_family_if_stale(family_id: str) -> None:
+    """Revalidacao stale-while-revalidate de uma familia, executada fora do caminho da requisicao."""
+    with _INFLIGHT_LOCK:
+        if family_id in _INFLIGHT:
+            return
+        _INFLIGHT.add(family_id)
+    try:
+        cutoffs, default_cutoff = service_cutoffs()
+        stale = [
+            entry
+            for entry in list_family_services(family_id).values()
+            if is_stale(entry, cutoffs, default_cutoff)
+        ]
+        if not stale:
+            return
+        refreshed = _refresh_entries(stale)
+        if refreshed:
+            append_audit("services_refresh", {"refreshed": len(refreshed), "families": [family_id]})
+    finally:
+        with _INFLIGHT_LOCK:
+            _INFLIGHT.discard(family_id)
+
+
+def _run_forever() -> None:
+    while not _STOP.is_set():
+        interval = float(fetch_config().get("services_refresh_interval_seconds", DEFAULT_INTERVAL_SECONDS))
+        try:
+            result = refresh_stale_services()
+        except Exception:  # pragma: no cover - o laco nunca deve morrer por um lote com falha
+            result = {"remaining": False}
+        # Enquanto houver lotes atrasados, segue sem esperar o intervalo completo.
+        _STOP.wait(0 if result.get("remaining") else interval)
+
+
+def start_background_refresh() -> bool:
+    """Inicia a thread de renovacao se ``services_refresh_interval_seconds`` for positivo."""
+    global _WORKER
+    if float(fetch_config().get("services_refresh_interval_seconds", DEFAULT_INTERVAL_SECONDS)) <= 0:
+        return False
+    if _WORKER is not None and _WORKER.is_alive():
+        return True
+    _STOP.clear()
+    _WORKER = threading.Thread(target=_run_forever, name="services-cache-refresh", daemon=True)
+    _WORKER.start()
+    return True
+
+
+def stop_background_refresh(timeout: float = 5.0) -> None:
+    global _WORKER
+    _STOP.set()
+    if _WORKER is not None:
+        _WORKER.join(timeout)
+    _WORKER = None
+
+
+__all__ = [
+    "is_stale",
+    "refresh_family_if_stale",
+    "refresh_stale_services",
+    "service_cutoffs",
+    "start_background_refresh",
+    "stop_background_refresh",
+]
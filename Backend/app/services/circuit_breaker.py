@@ -0,0 +1,136 @@
+"""Circuit breaker com timeout adaptativo para o provedor de LLM."""
+
+from __future__ import annotations
+
+import math
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    """Levantado quando o circuito esta aberto e a chamada nem chega ao provedor."""
+
+
+class CircuitBreaker:
+    """Abre apos falhas consecutivas ou p95 alto; sondas em meia-abertura fecham de novo."""
+
+    def __init__(
+        self,
+        *,
+        failure_threshold: int = 5,
+        p95_threshold_seconds: float = 8.0,
+        open_seconds: float = 30.0,
+        window: int = 50,
+        min_samples: int = 10,
+        min_timeout_seconds: float = 2.0,
+        max_timeout_seconds: float = 15.0,
+        timeout_factor: float = 2.0,
+    ) -> None:
+        self.failure_threshold = failure_threshold
+        self.p95_threshold_seconds = p95_threshold_seconds
+        self.open_seconds = open_seconds
+        self.min_samples = min_samples
+        self.min_timeout_seconds = min_timeout_seconds
+        self.max_timeout_seconds = max_timeout_seconds
+        self.timeout_factor = timeout_factor
+        self._latencies: Deque[float] = deque(maxlen=window)
+        self._state = CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._probe_started = 0.0
+        self._last_trip_reason: Optional[str] = None
+        self._short_circuited = 0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Indica se a chamada pode seguir; em meia-abertura libera uma sonda por vez."""
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+                self._state = HALF_OPEN
+                self._probe_in_flight = False
+            if self._state == CLOSED:
+                return True
+            # Uma sonda abandonada (ex.: cliente desconectou) nao pode travar a meia-abertura.
+            stale_probe = time.monotonic() - self._probe_started > self.max_timeout_seconds
+            if self._state == HALF_OPEN and (not self._probe_in_flight or stale_probe):
+                self._probe_in_flight = True
+                self._probe_started = time.monotonic()
+                return True
+            self._short_circuited += 1
+            return False
+
+    def record_success(self, latency: float) -> None:
+        with self._lock:
+            self._latencies.append(latency)
+            self._consecutive_failures = 0
+            if self._state == HALF_OPEN:
+                self._close()
+                return
+            p95 = self._percentile(0.95)
+            if p95 is not None and p95 > self.p95_threshold_seconds:
+                self._trip("latency_p95")
+
+    def record_failure(self, latency: Optional[float] = None) -> None:
+        with self._lock:
+            if latency is not None:
+                self._latencies.append(latency)
+            self._consecutive_failures += 1
+            if self._state == HALF_OPEN:
+                self._trip("probe_failed")
+            elif self._consecutive_failures >= self.failure_threshold:
+                self._trip("consecutive_failures")
+
+    def timeout(self) -> float:
+        """Timeout proporcional ao p95 observado, limitado a ``[min, max]``."""
+        with self._lock:
+            p95 = self._percentile(0.95)
+        if p95 is None:
+            return self.max_timeout_seconds
+        return max(self.min_timeout_seconds, min(self.max_timeout_seconds, p95 * self.timeout_factor))
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            state = self._state
+            if state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+                state = HALF_OPEN
+            p50 = self._percentile(0.50)
+            p95 = self._percentile(0.95)
+            payload = {
+                "state": state,
+                "consecutive_failures": self._consecutive_failures,
+                "last_trip_reason": self._last_trip_reason,
+                "short_circuited": self._short_circuited,
+                "samples": len(self._latencies),
+                "latency_p50_seconds": round(p50, 3) if p50 is not None else None,
+                "latency_p95_seconds": round(p95, 3) if p95 is not None else None,
+            }
+        payload["timeout_seconds"] = round(self.timeout(), 3)
+        return payload
+
+    def _percentile(self, fraction: float) -> Optional[float]:
+        if len(self._latencies) < self.min_samples:
+            return None
+        ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, math.ceil(fraction * len(ordered)) - 1)]
+
+    def _trip(self, reason: str) -> None:
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self._probe_in_flight = False
+        self._last_trip_reason = reason
+
+    def _close(self) -> None:
+        self._state = CLOSED
+        self._probe_in_flight = False
+        # Amostras antigas refletem o periodo degradado e manteriam o circuito instavel.
+        self._latencies.clear()
+
+
+__all__ = ["CLOSED", "HALF_OPEN", "OPEN", "CircuitBreaker", "CircuitOpenError"]
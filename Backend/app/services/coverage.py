@@ -0,0 +1,161 @@
+"""Mapa de calor de cobertura: demanda de alunos sem voluntario versus capacidade ao alcance."""
+
+from __future__ import annotations
+
+import math
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from ..storage import collection_version, fetch_config, volunteer_loads, zone_records
+
+COVERAGE_COLLECTIONS = ("students", "volunteers", "assignments")
+DEFAULT_CELL_KM = 1.0
+DEFAULT_MAX_CELLS = 40000
+# Voluntarios avaliados por bloco: limita a matriz voluntarios x celulas em memoria.
+_VOLUNTEER_BLOCK = 256
+_KM_PER_DEGREE = 111.195
+_EARTH_RADIUS_KM = 6371.0
+_CACHE_MAX_ENTRIES = 64
+
+_CACHE: "OrderedDict[Tuple[str, float], Tuple[Tuple[int, ...], Dict[str, Any]]]" = OrderedDict()
+_CACHE_LOCK = threading.Lock()
+
+
+def _versions() -> Tuple[int, ...]:
+    return tuple(collection_version(name) for name in COVERAGE_COLLECTIONS)
+
+
+def _haversine(lat: np.ndarray, lon: np.ndarray, lat2: np.ndarray, lon2: np.ndarray) -> np.ndarray:
+    """Mesma formula de ``utils.geo.haversine_km``, com broadcasting."""
+    lat, lon, lat2, lon2 = map(np.radians, (lat, lon, lat2, lon2))
+    a_value = np.sin((lat2 - lat) / 2) ** 2 + np.cos(lat) * np.cos(lat2) * np.sin((lon2 - lon) / 2) ** 2
+    return 2 * _EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a_value, 0.0, 1.0)))
+
+
+def compute_coverage(zone: str, cell_km: float) -> Dict[str, Any]:
+    """Grade lat/lon da zona com demanda, oferta e lacuna por celula.
+
+    Demanda e o numero de alunos sem voluntario na celula. Oferta e a soma das
+    vagas restantes (``max_students`` menos a carga atual) dos voluntarios cujo
+    raio de atendimento (``radius_km`` limitado por ``max_radius_km``) alcanca o
+    centro da celula; a mesma vaga conta em todas as celulas que alcanca.
+    Lacuna e demanda menos oferta (positiva = falta capacidade).
+    """
+    config = fetch_config()
+    max_radius = float(config.get("max_radius_km", 8.0))
+    max_cells = int(config.get("coverage_max_cells", DEFAULT_MAX_CELLS))
+    students = zone_records("students", zone)
+    volunteers = zone_records("volunteers", zone)
+    assigned = {row["student_id"] for row in zone_records("assignments", zone)}
+    loads = volunteer_loads(row["id"] for row in volunteers)
+
+    student_lat = np.array([row["coordinates"]["latitude"] for row in students], dtype=float)
+    student_lon = np.array([row["coordinates"]["longitude"] for row in students], dtype=float)
+    unassigned = np.array([row["id"] not in assigned for row in students], dtype=bool)
+    volunteer_lat = np.array([row["coordinates"]["latitude"] for row in volunteers], dtype=float)
+    volunteer_lon = np.array([row["coordinates"]["longitude"] for row in volunteers], dtype=float)
+    remaining = np.array([max(row["max_students"] - loads[row["id"]], 0) for row in volunteers], dtype=float)
+    radius = np.array([min(row["radius_km"], max_radius) for row in volunteers], dtype=float)
+
+    result: Dict[str, Any] = {
+        "zone": zone,
+        "cell_km": cell_km,
+        "students": len(students),
+        "unassigned": int(unassigned.sum()),
+        "volunteers": len(volunteers),
+        "remaining_capacity": int(remaining.sum()),
+        "grid": None,
+        "cells": [],
+    }
+    if not len(students) and not len(volunteers):
+        return result
+
+    all_lat = np.concatenate([student_lat, volunteer_lat])
+    all_lon = np.concatenate([student_lon, volunteer_lon])
+    south, north = float(all_lat.min()), float(all_lat.max())
+    west, east = float(all_lon.min()), float(all_lon.max())
+    lon_km = _KM_PER_DEGREE * max(math.cos(math.radians((south + north) / 2)), 0.01)
+    # Celulas maiores que o pedido quando a zona nao cabe em ``coverage_max_cells``.
+    area_cells = ((north - south) * _KM_PER_DEGREE / cell_km + 1) * ((east - west) * lon_km / cell_km + 1)
+    if area_cells > max_cells:
+        cell_km *= math.sqrt(area_cells / max_cells)
+    lat_step, lon_step = cell_km / _KM_PER_DEGREE, cell_km / lon_km
+    rows = int((north - south) // lat_step) + 1
+    columns = int((east - west) // lon_step) + 1
+    lat_edges = south + lat_step * np.arange(rows + 1)
+    lon_edges = west + lon_step * np.arange(columns + 1)
+
+    demand, _, _ = np.histogram2d(student_lat[unassigned], student_lon[unassigned], bins=[lat_edges, lon_edges])
+    total, _, _ = np.histogram2d(student_lat, student_lon, bins=[lat_edges, lon_edges])
+
+    center_lat = ((lat_edges[:-1] + lat_edges[1:]) / 2)[:, None].repeat(columns, axis=1).ravel()
+    center_lon = ((lon_edges[:-1] + lon_edges[1:]) / 2)[None, :].repeat(rows, axis=0).ravel()
+    supply = np.zeros(rows * columns)
+    reach = np.zeros(rows * columns)
+    available = remaining > 0
+    for start in range(0, int(available.sum()), _VOLUNTEER_BLOCK):
+        block = slice(start, start + _VOLUNTEER_BLOCK)
+        distances = _haversine(
+            volunteer_lat[available][block, None],
+            volunteer_lon[available][block, None],
+            center_lat[None, :],
+            center_lon[None, :],
+        )
+        covers = distances <= radius[available][block, None]
+        supply += remaining[available][block] @ covers
+        reach += covers.sum(axis=0)
+    supply = supply.reshape(rows, columns)
+    reach = reach.reshape(rows, columns)
+    gap = demand - supply
+
+    occupied = np.argwhere((total > 0) | (supply > 0))
+    result["cell_km"] = round(cell_km, 4)
+    result["grid"] = {
+        "rows": rows,
+        "columns": columns,
+        "south": south,
+        "west": west,
+        "lat_step": lat_step,
+        "lon_step": lon_step,
+    }
+    result["cells"] = [
+        {
+            "row": int(row),
+            "column": int(column),
+            "latitude": round(float(lat_edges[row] + lat_step / 2), 6),
+            "longitude": round(float(lon_edges[column] + lon_step / 2), 6),
+            "students": int(total[row, column]),
+            "demand": int(demand[row, column]),
+            "supply": int(supply[row, column]),
+            "volunteers_in_reach": int(reach[row, column]),
+            "gap": int(gap[row, column]),
+        }
+        for row, column in occupied
+    ]
+    return result
+
+
+def get_coverage(zone: str, cell_km: Optional[float] = None) -> Dict[str, Any]:
+    """Heatmap da zona, recalculado apenas quando alunos, voluntarios ou atribuicoes mudam."""
+    if cell_km is None:
+        cell_km = float(fetch_config().get("coverage_cell_km", DEFAULT_CELL_KM))
+    key = (zone, cell_km)
+    versions = _versions()
+    with _CACHE_LOCK:
+        cached = _CACHE.get(key)
+        if cached is not None and cached[0] == versions:
+            _CACHE.move_to_end(key)
+            return cached[1]
+    result = compute_coverage(zone, cell_km)
+    with _CACHE_LOCK:
+        _CACHE[key] = (versions, result)
+        _CACHE.move_to_end(key)
+        while len(_CACHE) > _CACHE_MAX_ENTRIES:
+            _CACHE.popitem(last=False)
+    return result
+
+
+__all__ = ["COVERAGE_COLLECTIONS", "compute_coverage", "get_coverage"]
@@ -0,0 +1,158 @@
+"""Analises do grafo social: agrupamentos de domicilios e voluntarios-ponte."""
+
+from __future__ import annotations
+
+import random
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from ..indexes import get_household_components
+from ..storage import fetch_config
+
+DEFAULT_INTERVAL_SECONDS = 60
+DEFAULT_BETWEENNESS_SAMPLES = 500
+
+_SNAPSHOT: Optional[Dict[str, Any]] = None
+_SNAPSHOT_LOCK = threading.Lock()
+_STOP = threading.Event()
+_WORKER: Optional[threading.Thread] = None
+
+
+def _timestamp() -> str:
+    return datetime.utcnow().replace(tzinfo=timezone.utc, microsecond=0).isoformat()
+
+
+def _betweenness(adjacency: Dict[str, List[str]], samples: int) -> Dict[str, float]:
+    """Brandes em grafo nao ponderado; com ``samples`` menor que o grafo, estima por amostragem de origens."""
+    nodes = list(adjacency)
+    scores = dict.fromkeys(nodes, 0.0)
+    sources = nodes if samples <= 0 or samples >= len(nodes) else random.Random(0).sample(nodes, samples)
+    for source in sources:
+        order: List[str] = []
+        predecessors: Dict[str, List[str]] = {source: []}
+        paths = {source: 1}
+        distance = {source: 0}
+        queue = deque([source])
+        while queue:
+            node = queue.popleft()
+            order.append(node)
+            for neighbor in adjacency[node]:
+                if neighbor not in distance:
+                    distance[neighbor] = distance[node] + 1
+                    paths[neighbor] = 0
+                    predecessors[neighbor] = []
+                    queue.append(neighbor)
+                if distance[neighbor] == distance[node] + 1:
+                    paths[neighbor] += paths[node]
+                    predecessors[neighbor].append(node)
+        dependency = dict.fromkeys(order, 0.0)
+        for node in reversed(order):
+            for predecessor in predecessors[node]:
+                dependency[predecessor] += paths[predecessor] / paths[node] * (1 + dependency[node])
+            if node != source:
+                scores[node] += dependency[node]
+    scale = len(nodes) / len(sources) if sources else 0.0
+    # Normaliza para [0, 1] como em grafos nao direcionados (pares contados duas vezes).
+    pairs = (len(nodes) - 1) * (len(nodes) - 2) if len(nodes) > 2 else 1
+    return {node: score * scale / pairs for node, score in scores.items()}
+
+
+def compute_analytics() -> Dict[str, Any]:
+    """Recalcula componentes e pontuacoes dos voluntarios a partir do indice incremental."""
+    index = get_household_components()
+    generation = index.generation
+    components = [
+        {"component_id": min(families), "families": sorted(families), "family_count": len(families), "person_count": persons}
+        for _, families, persons in index.components()
+        if families
+    ]
+    components.sort(key=lambda item: (-item["family_count"], -item["person_count"], item["component_id"]))
+    component_by_family = {family_id: item["component_id"] for item in components for family_id in item["families"]}
+
+    # Grafo bipartido voluntario <-> agrupamento de domicilios: pontes ligam agrupamentos distintos.
+    served = index.volunteer_households()
+    adjacency: Dict[str, List[str]] = {}
+    for volunteer_id, families in served.items():
+        clusters = sorted({component_by_family.get(family_id, family_id) for family_id in families})
+        adjacency[volunteer_id] = clusters
+        for cluster in clusters:
+            adjacency.setdefault(cluster, []).append(volunteer_id)
+    samples = int(fetch_config().get("graph_analytics_betweenness_samples", DEFAULT_BETWEENNESS_SAMPLES))
+    betweenness = _betweenness(adjacency, samples)
+
+    volunteers = [
+        {
+            "volunteer_id": volunteer_id,
+            "students": sum(len(students) for students in families.values()),
+            "households": len(families),
+            "clusters": len(adjacency[volunteer_id]),
+            "betweenness": round(betweenness.get(volunteer_id, 0.0), 6),
+        }
+        for volunteer_id, families in served.items()
+    ]
+    volunteers.sort(key=lambda item: (-item["betweenness"], -item["clusters"], -item["students"], item["volunteer_id"]))
+    return {
+        "computed_at": _timestamp(),
+        "generation": generation,
+        "component_count": len(components),
+        "components": components,
+        "volunteers": volunteers,
+    }
+
+
+def refresh_analytics(force: bool = False) -> Dict[str, Any]:
+    """Atualiza o instantaneo apenas se o indice mudou desde o ultimo calculo."""
+    global _SNAPSHOT
+    with _SNAPSHOT_LOCK:
+        current = get_household_components().generation
+        if force or _SNAPSHOT is None or _SNAPSHOT["generation"] != current:
+            _SNAPSHOT = compute_analytics()
+        return _SNAPSHOT
+
+
+def get_analytics() -> Dict[str, Any]:
+    """Ultimo instantaneo calculado; so calcula na hora quando ainda nao existe nenhum."""
+    snapshot = _SNAPSHOT
+    return snapshot if snapshot is not None else refresh_analytics()
+
+
+def _run_forever() -> None:
+    while not _STOP.is_set():
+        interval = float(fetch_config().get("graph_analytics_interval_seconds", DEFAULT_INTERVAL_SECONDS))
+        try:
+            refresh_analytics()
+        except Exception:  # pragma: no cover - o laco nunca deve morrer por um calculo com falha
+            pass
+        _STOP.wait(interval)
+
+
+def start_graph_analytics() -> bool:
+    """Inicia a thread de recalculo se ``graph_analytics_interval_seconds`` for positivo."""
+    global _WORKER
+    if float(fetch_config().get("graph_analytics_interval_seconds", DEFAULT_INTERVAL_SECONDS)) <= 0:
+        return False
+    if _WORKER is not None and _WORKER.is_alive():
+        return True
+    _STOP.clear()
+    _WORKER = threading.Thread(target=_run_forever, name="graph-analytics", daemon=True)
+    _WORKER.start()
+    return True
+
+
+def stop_graph_analytics(timeout: float = 5.0) -> None:
+    global _WORKER
+    _STOP.set()
+    if _WORKER is not None:
+        _WORKER.join(timeout)
+    _WORKER = None
+
+
+__all__ = [
+    "compute_analytics",
+    "get_analytics",
+    "refresh_analytics",
+    "start_graph_analytics",
+    "stop_graph_analytics",
+]
@@ -0,0 +1,80 @@
+"""Exportacao do grafo social de uma zona em CSR compacto ou NDJSON."""
+
+from __future__ import annotations
+
+import json
+from typing import Dict, Iterator, List, Tuple
+
+from ..indexes import get_graph_index
+from ..indexes.graph import NODE_COLLECTIONS, Edge
+from ..storage import get_records, zone_records
+
+NODE_TYPES = tuple(NODE_COLLECTIONS)
+# Profundidade suficiente para alcancar responsaveis, membros do domicilio e voluntarios.
+ZONE_DEPTH = 2
+
+
+def _label(kind: str, row: dict) -> str:
+    return row["name"] if kind in {"person", "volunteer"} else row["id"]
+
+
+def zone_graph(zone: str, max_nodes: int, max_edges: int) -> Tuple[List[Tuple[str, str, str]], List[Edge], bool]:
+    """Nos ``(id, tipo, rotulo)`` e arestas da zona, lidos apenas dos indices."""
+    index = get_graph_index()
+    starts = [row["id"] for row in zone_records("students", zone)]
+    distances, edges, truncated = index.traverse(starts, ZONE_DEPTH, max_nodes, max_edges)
+
+    by_kind: Dict[str, List[str]] = {}
+    for node_id in distances:
+        kind = index.kind(node_id)
+        if kind:
+            by_kind.setdefault(kind, []).append(node_id)
+    nodes: List[Tuple[str, str, str]] = []
+    for kind in NODE_TYPES:
+        rows = get_records(NODE_COLLECTIONS[kind], by_kind.get(kind, []))
+        nodes.extend((node_id, kind, _label(kind, row)) for node_id, row in rows.items())
+    known = {node_id for node_id, _, _ in nodes}
+    return nodes, [edge for edge in edges if edge[1] in known and edge[2] in known], truncated
+
+
+def to_csr(nodes: List[Tuple[str, str, str]], edges: List[Edge]) -> Dict[str, object]:
+    """Tabela de nos e adjacencia de saida em CSR (``offsets``/``targets``) com tipos codificados."""
+    position = {node_id: i for i, (node_id, _, _) in enumerate(nodes)}
+    edge_types = sorted({edge[3] for edge in edges})
+    edge_code = {edge_type: code for code, edge_type in enumerate(edge_types)}
+    node_code = {kind: code for code, kind in enumerate(NODE_TYPES)}
+
+    outgoing: List[List[Tuple[int, int]]] = [[] for _ in nodes]
+    for edge in edges:
+        outgoing[position[edge[1]]].append((position[edge[2]], edge_code[edge[3]]))
+    offsets = [0]
+    targets: List[int] = []
+    types: List[int] = []
+    for items in outgoing:
+        for target, code in items:
+            targets.append(target)
+            types.append(code)
+        offsets.append(len(targets))
+    return {
+        "node_type_labels": list(NODE_TYPES),
+        "edge_type_labels": edge_types,
+        "nodes": {
+            "id": [node_id for node_id, _, _ in nodes],
+            "type": [node_code[kind] for _, kind, _ in nodes],
+            "label": [label for _, _, label in nodes],
+        },
+        "offsets": offsets,
+        "targets": targets,
+        "edge_types": types,
+    }
+
+
+def iter_ndjson(zone: str, nodes: List[Tuple[str, str, str]], edges: List[Edge], truncated: bool) -> Iterator[str]:
+    yield json.dumps({"kind": "meta", "zone": zone, "nodes": len(nodes), "edges": len(edges), "truncated": truncated}) + "\n"
+    for node_id, kind, label in nodes:
+        yield json.dumps({"kind": "node", "id": node_id, "type": kind, "label": label}, ensure_ascii=False) + "\n"
+    for edge_id, source, target, edge_type, extra in edges:
+        yield json.dumps({"kind": "edge", "id": edge_id, "from": source, "to": target, "type": edge_type, **extra}) + "\n"
+
+
+__all__ = ["iter_ndjson", "to_csr", "zone_graph"]
@@ -0,0 +1,107 @@
+"""Geracao de insights em lote com concorrencia e taxa limitadas."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+from typing import AsyncIterator, Dict, List, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from ..models import InsightBatchRequest
+from ..storage import append_audit, fetch_config, get_families_many, get_students_many
+from .insight_cache import get_insight_cache
+from .insights import InsightPlan, complete_plan, plan_family_insight, plan_student_insight
+from .llm_client import RateLimiter
+
+DEFAULT_CONCURRENCY = 4
+DEFAULT_RATE_PER_SECOND = 5.0
+DEFAULT_MAX_ITEMS = 500
+
+
+def batch_limits() -> Tuple[int, float, int]:
+    config = fetch_config()
+    return (
+        int(config.get("insight_batch_concurrency", DEFAULT_CONCURRENCY)),
+        float(config.get("insight_batch_rate_per_second", DEFAULT_RATE_PER_SECOND)),
+        int(config.get("insight_batch_max_items", DEFAULT_MAX_ITEMS)),
+    )
+
+
+def _prefetch(request: InsightBatchRequest) -> Tuple[List[InsightPlan], List[dict]]:
+    """Carrega alunos e familias em uma passagem e monta os planos de cada insight."""
+    api_key = os.getenv("OPENAI_API_KEY")
+    student_ids = list(dict.fromkeys(request.student_ids))
+    family_ids = list(dict.fromkeys(request.family_ids))
+    students = get_students_many(student_ids)
+    families = get_families_many(family_ids + [student.family_id for student in students.values()])
+
+    plans: List[InsightPlan] = []
+    missing: List[dict] = []
+    for student_id in student_ids:
+        student = students.get(student_id)
+        if student is None:
+            missing.append({"student_id": student_id, "error": "aluno_nao_encontrado"})
+            continue
+        plans.append(plan_student_insight(student, families.get(student.family_id), api_key))
+    for family_id in family_ids:
+        family = families.get(family_id)
+        if family is None:
+            missing.append({"family_id": family_id, "error": "familia_nao_encontrada"})
+            continue
+        plans.append(plan_family_insight(family, api_key))
+    return plans, missing
+
+
+async def generate_insight_batch(request: InsightBatchRequest) -> AsyncIterator[dict]:
+    """Emite cada resultado assim que fica pronto e, ao final, um resumo do lote."""
+    concurrency, rate_per_second, _ = batch_limits()
+    if request.concurrency:
+        concurrency = min(concurrency, request.concurrency)
+    plans, missing = await run_in_threadpool(_prefetch, request)
+    for item in missing:
+        yield item
+
+    cache = get_insight_cache()
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    limiter = RateLimiter(rate_per_second)
+    uses_provider = bool(os.getenv("OPENAI_API_KEY"))
+
+    async def run(plan: InsightPlan) -> Dict[str, str]:
+        async with semaphore:
+            if uses_provider and cache.get(plan.cache_key) is None:
+                await limiter.wait()
+            return await complete_plan(plan)
+
+    tasks = [asyncio.create_task(run(plan)) for plan in plans]
+    sources: Dict[str, int] = {}
+    completed: List[dict] = []
+    try:
+        for finished in asyncio.as_completed(tasks):
+            result = await finished
+            sources[result["source"]] = sources.get(result["source"], 0) + 1
+            subject = {key: value for key, value in result.items() if key.endswith("_id")}
+            completed.append({**subject, "source": result["source"]})
+            yield result
+    finally:
+        for task in tasks:
+            task.cancel()
+        await run_in_threadpool(
+            append_audit,
+            "insight_batch",
+            {
+                "requested": len(plans) + len(missing),
+                "completed": completed,
+                "missing": missing,
+                "sources": sources,
+            },
+        )
+    yield {
+        "done": True,
+        "completed": len(completed),
+        "missing": len(missing),
+        "sources": sources,
+    }
+
+
+__all__ = ["batch_limits", "generate_insight_batch"]
@@ -0,0 +1,188 @@
+"""Cache LRU com TTL para insights, chaveado pela assinatura das entradas do prompt."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+from ..storage import DATA_DIR, fetch_config, register_index
+
+CACHE_FILE = DATA_DIR / "insight_cache.json"
+DEFAULT_MAX_ENTRIES = 1000
+DEFAULT_TTL_SECONDS = 6 * 3600
+DEFAULT_FLUSH_SECONDS = 5.0
+
+
+def signature(kind: str, inputs: Dict[str, Any]) -> str:
+    """Hash estavel das entradas que determinam o texto do insight."""
+    canonical = json.dumps({"kind": kind, **inputs}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class InsightCache:
+    """LRU limitado em memoria, com expiracao e persistencia opcional em disco.
+
+    Mudancas nao gravam o arquivo na hora: marcam o cache como sujo e uma unica
+    gravacao sai ``flush_seconds`` depois (ou em :meth:`flush`, no encerramento),
+    fora de qualquer trava do armazenamento.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: float,
+        path: Optional[Path] = None,
+        flush_seconds: float = DEFAULT_FLUSH_SECONDS,
+    ) -> None:
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self.path = path
+        self.flush_seconds = flush_seconds
+        self._entries: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._dirty = False
+        self._timer: Optional[threading.Timer] = None
+        self._load()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry["expires_at"] <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return dict(entry["value"])
+
+    def put(self, key: str, value: Dict[str, Any], entities: Iterable[str]) -> None:
+        with self._lock:
+            self._entries[key] = {
+                "value": dict(value),
+                "entities": sorted(set(entities)),
+                "expires_at": time.time() + self.ttl_seconds,
+            }
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._mark_dirty()
+
+    def invalidate(self, entity_id: str) -> int:
+        """Remove as entradas que dependem do aluno/familia informado."""
+        with self._lock:
+            keys = [key for key, entry in self._entries.items() if entity_id in entry["entities"]]
+            for key in keys:
+                del self._entries[key]
+            if keys:
+                self._mark_dirty()
+        return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._mark_dirty()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "persistent": self.path is not None,
+            }
+
+    def _load(self) -> None:
+        if self.path is None or not self.path.exists():
+            return
+        try:
+            raw = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        now = time.time()
+        for key, entry in raw.get("entries", []):
+            if entry.get("expires_at", 0) > now:
+                self._entries[key] = entry
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _mark_dirty(self) -> None:
+        """Agenda a gravacao adiada; chamado com ``_lock`` adquirido."""
+        if self.path is None:
+            return
+        self._dirty = True
+        if self._timer is None:
+            self._timer = threading.Timer(max(0.0, self.flush_seconds), self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self) -> None:
+        """Grava o arquivo se houver mudancas pendentes."""
+        if self.path is None:
+            return
+        # ``_save_lock`` mantem a ordem: um retrato mais antigo nunca sobrescreve um mais novo.
+        with self._save_lock:
+            with self._lock:
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                if not self._dirty:
+                    return
+                self._dirty = False
+                entries = list(self._entries.items())
+            temp = self.path.with_suffix(".tmp")
+            temp.write_text(json.dumps({"entries": entries}, ensure_ascii=False), encoding="utf-8")
+            temp.replace(self.path)
+
+
+_INSTANCE: Optional[InsightCache] = None
+_INSTANCE_LOCK = threading.Lock()
+
+
+def get_insight_cache() -> InsightCache:
+    """Instancia compartilhada configurada por ``config.json``."""
+    global _INSTANCE
+    with _INSTANCE_LOCK:
+        if _INSTANCE is None:
+            config = fetch_config()
+            _INSTANCE = InsightCache(
+                max_entries=int(config.get("insight_cache_max_entries", DEFAULT_MAX_ENTRIES)),
+                ttl_seconds=float(config.get("insight_cache_ttl_seconds", DEFAULT_TTL_SECONDS)),
+                path=CACHE_FILE if config.get("insight_cache_persist", False) else None,
+                flush_seconds=float(config.get("insight_cache_flush_seconds", DEFAULT_FLUSH_SECONDS)),
+            )
+        return _INSTANCE
+
+
+def flush_insight_cache() -> None:
+    """Grava as mudancas pendentes do cache compartilhado (encerramento da aplicacao)."""
+    with _INSTANCE_LOCK:
+        instance = _INSTANCE
+    if instance is not None:
+        instance.flush()
+
+
+def _invalidate_on_change(old: Optional[dict], new: Optional[dict]) -> None:
+    # Roda dentro da trava de escrita: sem instancia ainda nao ha o que invalidar (nem arquivo a ler).
+    instance = _INSTANCE
+    if old is None or old == new or instance is None:
+        return
+    instance.invalidate(old["id"])
+
+
+def _ignore_rebuild(_: list) -> None:
+    return None
+
+
+# A chave ja muda quando as entradas mudam; a invalidacao libera memoria e
+# evita servir textos de um aluno/familia que foi reescrito.
+register_index("students", _ignore_rebuild, _invalidate_on_change)
+register_index("families", _ignore_rebuild, _invalidate_on_change)
+
+
+__all__ = ["InsightCache", "flush_insight_cache", "get_insight_cache", "signature"]
@@ -0,0 +1,211 @@
+"""Pre-geracao de insights por zona fora do horario de pico."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from ..storage import (
+    append_audit,
+    fetch_config,
+    fetch_zones,
+    get_families_many,
+    list_assignments,
+    list_students,
+)
+from .insight_cache import get_insight_cache
+from .insights import InsightPlan, complete_plan, plan_family_insight, plan_student_insight
+from .llm_client import RateLimiter
+
+DEFAULT_RATE_PER_SECOND = 1.0
+DEFAULT_CONCURRENCY = 2
+CHECK_INTERVAL_SECONDS = 60
+
+_JOBS: Dict[str, Dict[str, Any]] = {}
+_SCHEDULER: Optional[asyncio.Task] = None
+
+
+def _timestamp() -> str:
+    return datetime.utcnow().replace(tzinfo=timezone.utc, microsecond=0).isoformat()
+
+
+def _settings() -> Dict[str, Any]:
+    config = fetch_config()
+    return {
+        "rate_per_second": float(config.get("insight_precompute_rate_per_second", DEFAULT_RATE_PER_SECOND)),
+        "concurrency": int(config.get("insight_precompute_concurrency", DEFAULT_CONCURRENCY)),
+        "max_per_run": int(config.get("insight_precompute_max_per_run", 0)),
+        "hour_utc": config.get("insight_precompute_hour_utc"),
+        "zones": list(config.get("insight_precompute_zones") or []),
+    }
+
+
+def _zone_plans(zone: str, max_per_run: int) -> List[InsightPlan]:
+    """Planos da zona priorizando alunos sem atribuicao e com mais faltas."""
+    api_key = os.getenv("OPENAI_API_KEY")
+    assigned = {record.student_id for record in list_assignments(zone=zone)}
+    students = sorted(
+        list_students(zone=zone),
+        key=lambda student: (
+            student.id in assigned,
+            -student.attendance_last_30d.absences,
+            -student.attendance_last_30d.delays,
+            student.id,
+        ),
+    )
+    families = get_families_many(student.family_id for student in students)
+    cache = get_insight_cache()
+    # Gerar mais que a capacidade do LRU so expulsaria os primeiros (e mais prioritarios).
+    budget = min(max_per_run, cache.max_entries) if max_per_run else cache.max_entries
+    plans: List[InsightPlan] = []
+    planned_families = set()
+    for student in students:
+        family = families.get(student.family_id)
+        candidates = [plan_student_insight(student, family, api_key)]
+        if family is not None and family.id not in planned_families:
+            planned_families.add(family.id)
+            candidates.append(plan_family_insight(family, api_key))
+        plans.extend(plan for plan in candidates if cache.get(plan.cache_key) is None)
+        if len(plans) >= budget:
+            return plans[:budget]
+    return plans
+
+
+async def _generate(zone: str, job: Dict[str, Any]) -> None:
+    settings = _settings()
+    plans = await run_in_threadpool(_zone_plans, zone, settings["max_per_run"])
+    job["planned"] = len(plans)
+
+    semaphore = asyncio.Semaphore(max(1, settings["concurrency"]))
+    limiter = RateLimiter(settings["rate_per_second"])
+
+    async def run(plan: InsightPlan) -> None:
+        async with semaphore:
+            await limiter.wait()
+            try:
+                result = await complete_plan(plan)
+            except Exception:
+                # Ex.: ``OSError`` ao gravar o cache; os demais planos seguem.
+                job["failed"] += 1
+                return
+        if result["source"] == "openai":
+            job["generated"] += 1
+        elif result["source"] == "fallback":
+            job["failed"] += 1
+        else:
+            # Ex.: ``cache`` preenchido por outra chamada enquanto o plano esperava.
+            job["skipped"] += 1
+
+    await asyncio.gather(*(run(plan) for plan in plans))
+
+
+async def precompute_zone(zone: str) -> Dict[str, Any]:
+    """Aquece o cache de insights da zona respeitando o orcamento de taxa do provedor.
+
+    Qualquer falha encerra o job como ``failed`` (com ``error``), nunca preso em
+    ``running``: senao ``claim_zone`` recusaria a zona para sempre. Sem
+    ``OPENAI_API_KEY`` o job termina como ``skipped`` (``reason:
+    "sem_provedor_configurado"``), pois respostas mock nao entram no cache.
+    ``generated`` conta apenas entradas novas no cache.
+    """
+    job = {
+        "zone": zone,
+        "status": "running",
+        "started_at": _timestamp(),
+        "planned": 0,
+        "generated": 0,
+        "skipped": 0,
+        "failed": 0,
+    }
+    _JOBS[zone] = job
+    try:
+        if os.getenv("OPENAI_API_KEY"):
+            await _generate(zone, job)
+            job["status"] = "done"
+        else:
+            job.update({"status": "skipped", "reason": "sem_provedor_configurado"})
+    except Exception as exc:
+        job.update({"status": "failed", "error": f"{type(exc).__name__}: {exc}"})
+    finally:
+        if job["status"] == "running":
+            # Cancelado (encerramento da aplicacao).
+            job["status"] = "cancelled"
+        job["finished_at"] = _timestamp()
+    await run_in_threadpool(
+        append_audit,
+        "insight_precompute",
+        {key: job[key] for key in ("zone", "status", "planned", "generated", "skipped", "failed")},
+    )
+    return dict(job)
+
+
+def precompute_status() -> List[Dict[str, Any]]:
+    return [dict(job) for job in _JOBS.values()]
+
+
+def is_running(zone: str) -> bool:
+    return _JOBS.get(zone, {}).get("status") in {"scheduled", "running"}
+
+
+def claim_zone(zone: str) -> bool:
+    """Reserva a zona para uma execucao; falso se ja houver uma agendada ou em curso."""
+    if is_running(zone):
+        return False
+    _JOBS[zone] = {"zone": zone, "status": "scheduled", "scheduled_at": _timestamp()}
+    return True
+
+
+async def _scheduler_loop() -> None:
+    last_run_day: Optional[str] = None
+    while True:
+        try:
+            settings = _settings()
+            now = datetime.utcnow()
+            day = now.date().isoformat()
+            if settings["hour_utc"] is not None and now.hour == int(settings["hour_utc"]) and last_run_day != day:
+                last_run_day = day
+                for zone in settings["zones"] or list(fetch_zones().keys()):
+                    if not claim_zone(zone):
+                        continue
+                    try:
+                        await precompute_zone(zone)
+                    except Exception:  # pragma: no cover - o status do job ja registra a falha
+                        pass
+        except Exception:  # pragma: no cover - o agendador nunca deve morrer por uma rodada com falha
+            pass
+        await asyncio.sleep(CHECK_INTERVAL_SECONDS)
+
+
+def start_precompute_scheduler() -> bool:
+    """Agenda a execucao diaria na hora UTC ``insight_precompute_hour_utc`` (ausente desliga)."""
+    global _SCHEDULER
+    if _settings()["hour_utc"] is None:
+        return False
+    if _SCHEDULER is None or _SCHEDULER.done():
+        _SCHEDULER = asyncio.create_task(_scheduler_loop())
+    return True
+
+
+async def stop_precompute_scheduler() -> None:
+    global _SCHEDULER
+    if _SCHEDULER is not None:
+        _SCHEDULER.cancel()
+        try:
+            await _SCHEDULER
+        except asyncio.CancelledError:
+            pass
+    _SCHEDULER = None
+
+
+__all__ = [
+    "claim_zone",
+    "is_running",
+    "precompute_status",
+    "precompute_zone",
+    "start_precompute_scheduler",
+    "stop_precompute_scheduler",
+]
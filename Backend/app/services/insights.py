@@ -3,17 +3,19 @@
 from __future__ import annotations
 
 import os
+import re
+from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import Dict, Tuple
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 
-import requests
+from starlette.concurrency import run_in_threadpool
 
 from ..models import FamilyProfile, InsightFamilyRequest, InsightStudentRequest, StudentProfile
 from ..storage import append_audit, get_family, get_student
+from .insight_cache import get_insight_cache, signature
+from .llm_client import chat_completion, stream_chat_completion
 
-OPENAI_URL = "https://api.openai.com/v1/chat/completions"
 DEFAULT_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
-TIMEOUT_SECONDS = 15
 
 
 def _timestamp() -> str:
@@ -55,136 +57,245 @@ def _service_summary(family: FamilyProfile) -> Dict[str, str]:
     }
 
 
-def _call_openai(messages, api_key: str, model: str) -> Tuple[str, str]:
-    response = requests.post(
-        OPENAI_URL,
-        headers={
-            "Authorization": f"Bearer {api_key}",
-            "Content-Type": "application/json",
+@dataclass
+class InsightPlan:
+    """Tudo o que e preciso para resolver um insight sem voltar ao armazenamento."""
+
+    kind: str
+    subject_id: str
+    entities: List[str]
+    cache_key: str
+    messages: List[Dict[str, str]]
+    mock_text: str
+
+
+def _active_model(api_key: Optional[str]) -> str:
+    return DEFAULT_MODEL if api_key else "none"
+
+
+def plan_student_insight(student: StudentProfile, family: Optional[FamilyProfile], api_key: Optional[str]) -> InsightPlan:
+    signals = _service_summary(family) if family else {"summary": "", "highlight": "acompanhar estudos"}
+    cache_key = signature(
+        "student",
+        {
+            "student_id": student.id,
+            "tags": sorted(student.tags),
+            "zone": student.zone,
+            "services": signals["summary"],
+            "eligibility": sorted(family.eligibility_signals) if family else [],
+            "model": _active_model(api_key),
         },
-        json={"model": model, "messages": messages, "temperature": 0.2, "max_tokens": 120},
-        timeout=TIMEOUT_SECONDS,
     )
-    response.raise_for_status()
-    data = response.json()
-    content = (
-        data.get("choices", [{}])[0]
-        .get("message", {})
-        .get("content", "")
-        .strip()
+    messages = [
+        {
+            "role": "system",
+            "content": (
+                "Você é um assistente para coordenadores escolares; NUNCA cria diagnósticos; "
+                "use linguagem breve (1-2 frases) em PT-BR e inclua exatamente uma pergunta aberta à família."
+            ),
+        },
+        {
+            "role": "user",
+            "content": (
+                f"Aluno {student.id} na zona {student.zone}. Sinais: {', '.join(student.tags)}. "
+                f"Serviços da família: {signals['summary']}. Gere insight sobre transporte, alimentação, material, saúde e apoio pedagógico, "
+                "sem atribuir culpa e convidando a família para conversar."
+            ),
+        },
+    ]
+    return InsightPlan(
+        kind="student",
+        subject_id=student.id,
+        entities=[student.id, student.family_id],
+        cache_key=cache_key,
+        messages=messages,
+        mock_text=_mock_student_insight(student, signals),
     )
-    if not content:
-        raise ValueError("Resposta vazia da API.")
-    return content, model
 
 
-def generate_student_insight(request: InsightStudentRequest) -> Dict[str, str]:
-    student = get_student(request.student_id)
+def plan_family_insight(family: FamilyProfile, api_key: Optional[str]) -> InsightPlan:
+    signals = _service_summary(family)
+    focus = "fortalecer transporte e materiais" if "transporte" in signals.get("summary", "") else "ampliar redes de apoio"
+    cache_key = signature(
+        "family",
+        {
+            "family_id": family.id,
+            "services": signals["summary"],
+            "eligibility": sorted(family.eligibility_signals),
+            "model": _active_model(api_key),
+        },
+    )
+    messages = [
+        {
+            "role": "system",
+            "content": (
+                "Você orienta equipes intersetoriais; NUNCA fornece diagnósticos; "
+                "redija 1-2 frases em PT-BR com tom respeitoso e finalize com pergunta aberta à família."
+            ),
+        },
+        {
+            "role": "user",
+            "content": (
+                f"Família {family.id} com sinais: {', '.join(family.eligibility_signals)}. "
+                f"Serviços ativos: {signals['summary']}. Sugira caminhos de apoio para transporte, material escolar, alimentação e redes comunitárias."
+            ),
+        },
+    ]
+    return InsightPlan(
+        kind="family",
+        subject_id=family.id,
+        entities=[family.id],
+        cache_key=cache_key,
+        messages=messages,
+        mock_text=_mock_family_insight(family, focus),
+    )
+
+
+def _result(plan: InsightPlan, text: str, source: str, model: str) -> Dict[str, str]:
+    return {
+        f"{plan.kind}_id": plan.subject_id,
+        "insight": text,
+        "source": source,
+        "model": model,
+        "generated_at": _timestamp(),
+    }
+
+
+def _load_student_plan(student_id: str) -> InsightPlan:
+    student = get_student(student_id)
     if not student:
         raise ValueError("aluno_nao_encontrado")
-    family = get_family(student.family_id)
-    signals = _service_summary(family) if family else {"summary": "", "highlight": "acompanhar estudos"}
+    return plan_student_insight(student, get_family(student.family_id), os.getenv("OPENAI_API_KEY"))
+
+
+def _load_family_plan(family_id: str) -> InsightPlan:
+    family = get_family(family_id)
+    if not family:
+        raise ValueError("familia_nao_encontrada")
+    return plan_family_insight(family, os.getenv("OPENAI_API_KEY"))
+
+
+async def complete_plan(plan: InsightPlan) -> Dict[str, str]:
+    """Consulta o cache e, em caso de falta, o provedor (ou o mock); nao grava auditoria."""
+    cache = get_insight_cache()
+    cached = cache.get(plan.cache_key)
+    if cached:
+        return {**cached, "source": "cache"}
 
     api_key = os.getenv("OPENAI_API_KEY")
     source = "mock"
     model = "none"
-    insight_text = _mock_student_insight(student, signals)
-
+    insight_text = plan.mock_text
     if api_key:
         try:
-            messages = [
-                {
-                    "role": "system",
-                    "content": (
-                        "Você é um assistente para coordenadores escolares; NUNCA cria diagnósticos; "
-                        "use linguagem breve (1-2 frases) em PT-BR e inclua exatamente uma pergunta aberta à família."
-                    ),
-                },
-                {
-                    "role": "user",
-                    "content": (
-                        f"Aluno {student.id} na zona {student.zone}. Sinais: {', '.join(student.tags)}. "
-                        f"Serviços da família: {signals['summary']}. Gere insight sobre transporte, alimentação, material, saúde e apoio pedagógico, "
-                        "sem atribuir culpa e convidando a família para conversar."
-                    ),
-                },
-            ]
-            insight_text, model = _call_openai(messages, api_key, DEFAULT_MODEL)
+            insight_text, model = await chat_completion(plan.messages, api_key, DEFAULT_MODEL)
             source = "openai"
         except Exception:
             source = "fallback"
-            insight_text = _mock_student_insight(student, signals)
+            insight_text = plan.mock_text
+
+    result = _result(plan, insight_text, source, model)
+    # Mock e fallback saem na hora; so respostas do provedor valem o cache.
+    if source == "openai":
+        await run_in_threadpool(cache.put, plan.cache_key, result, plan.entities)
+    return result
+
 
-    append_audit(
-        "insight_student",
+async def _audit(plan: InsightPlan, result: Dict[str, str]) -> None:
+    await run_in_threadpool(
+        append_audit,
+        f"insight_{plan.kind}",
         {
-            "student_id": student.id,
-            "source": source,
-            "model": model,
+            f"{plan.kind}_id": plan.subject_id,
+            "source": result["source"],
+            "model": result["model"],
         },
     )
 
-    return {
-        "student_id": student.id,
-        "insight": insight_text,
-        "source": source,
-        "model": model,
-        "generated_at": _timestamp(),
-    }
 
+async def _resolve(plan: InsightPlan) -> Dict[str, str]:
+    result = await complete_plan(plan)
+    await _audit(plan, result)
+    return result
 
-def generate_family_insight(request: InsightFamilyRequest) -> Dict[str, str]:
-    family = get_family(request.family_id)
-    if not family:
-        raise ValueError("familia_nao_encontrada")
-    signals = _service_summary(family)
-    focus = "fortalecer transporte e materiais" if "transporte" in signals.get("summary", "") else "ampliar redes de apoio"
+
+def _chunks(text: str) -> List[str]:
+    return re.findall(r"\S+\s*", text)
+
+
+async def stream_plan(plan: InsightPlan) -> AsyncIterator[Tuple[str, Dict[str, str]]]:
+    """Emite ``("token", {...})`` a cada fragmento e ``("done", resultado)`` ao final.
+
+    Cache e mock sao fatiados por palavra para que o cliente trate todas as
+    origens da mesma forma; o texto final vai para o cache e para a auditoria.
+    """
+    cached = get_insight_cache().get(plan.cache_key)
+    if cached:
+        for chunk in _chunks(cached["insight"]):
+            yield "token", {"text": chunk}
+        result = {**cached, "source": "cache"}
+        await _audit(plan, result)
+        yield "done", result
+        return
 
     api_key = os.getenv("OPENAI_API_KEY")
     source = "mock"
     model = "none"
-    insight_text = _mock_family_insight(family, focus)
-
+    insight_text = plan.mock_text
     if api_key:
+        parts: List[str] = []
         try:
-            messages = [
-                {
-                    "role": "system",
-                    "content": (
-                        "Você orienta equipes intersetoriais; NUNCA fornece diagnósticos; "
-                        "redija 1-2 frases em PT-BR com tom respeitoso e finalize com pergunta aberta à família."
-                    ),
-                },
-                {
-                    "role": "user",
-                    "content": (
-                        f"Família {family.id} com sinais: {', '.join(family.eligibility_signals)}. "
-                        f"Serviços ativos: {signals['summary']}. Sugira caminhos de apoio para transporte, material escolar, alimentação e redes comunitárias."
-                    ),
-                },
-            ]
-            insight_text, model = _call_openai(messages, api_key, DEFAULT_MODEL)
+            async for chunk in stream_chat_completion(plan.messages, api_key, DEFAULT_MODEL):
+                parts.append(chunk)
+                yield "token", {"text": chunk}
+            insight_text = "".join(parts).strip()
+            if not insight_text:
+                raise ValueError("Resposta vazia da API.")
             source = "openai"
+            model = DEFAULT_MODEL
         except Exception:
             source = "fallback"
-            insight_text = _mock_family_insight(family, focus)
+            insight_text = plan.mock_text
+            if parts:
+                # O texto parcial ja enviado e descartado antes do fallback.
+                yield "reset", {"reason": "provider_error"}
+    if source != "openai":
+        for chunk in _chunks(insight_text):
+            yield "token", {"text": chunk}
 
-    append_audit(
-        "insight_family",
-        {
-            "family_id": family.id,
-            "source": source,
-            "model": model,
-        },
-    )
+    result = _result(plan, insight_text, source, model)
+    if source == "openai":
+        await run_in_threadpool(get_insight_cache().put, plan.cache_key, result, plan.entities)
+    await _audit(plan, result)
+    yield "done", result
 
-    return {
-        "family_id": family.id,
-        "insight": insight_text,
-        "source": source,
-        "model": model,
-        "generated_at": _timestamp(),
-    }
+
+async def prepare_student_stream(request: InsightStudentRequest) -> InsightPlan:
+    return await run_in_threadpool(_load_student_plan, request.student_id)
+
+
+async def prepare_family_stream(request: InsightFamilyRequest) -> InsightPlan:
+    return await run_in_threadpool(_load_family_plan, request.family_id)
+
+
+async def generate_student_insight(request: InsightStudentRequest) -> Dict[str, str]:
+    plan = await run_in_threadpool(_load_student_plan, request.student_id)
+    return await _resolve(plan)
+
+
+async def generate_family_insight(request: InsightFamilyRequest) -> Dict[str, str]:
+    plan = await run_in_threadpool(_load_family_plan, request.family_id)
+    return await _resolve(plan)
 
 
-__all__ = ["generate_student_insight", "generate_family_insight"]
+__all__ = [
+    "InsightPlan",
+    "complete_plan",
+    "generate_family_insight",
+    "generate_student_insight",
+    "plan_family_insight",
+    "plan_student_insight",
+    "prepare_family_stream",
+    "prepare_student_stream",
+    "stream_plan",
+]
@@ -0,0 +1,173 @@
+"""Cliente HTTP assincrono compartilhado para o provedor de completions."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import time
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+import httpx
+
+from ..storage import fetch_config
+from .circuit_breaker import CircuitBreaker, CircuitOpenError
+
+OPENAI_URL = os.getenv("OPENAI_URL", "https://api.openai.com/v1/chat/completions")
+TIMEOUT_SECONDS = 15
+DEFAULT_MAX_CONCURRENCY = 8
+DEFAULT_MAX_CONNECTIONS = 20
+
+_CLIENT: Optional[httpx.AsyncClient] = None
+_SEMAPHORE: Optional[asyncio.Semaphore] = None
+_LOOP: Optional[asyncio.AbstractEventLoop] = None
+_BREAKER: Optional[CircuitBreaker] = None
+
+
+def get_breaker() -> CircuitBreaker:
+    """Breaker compartilhado, configurado por ``llm_breaker`` em ``config.json``."""
+    global _BREAKER
+    if _BREAKER is None:
+        settings = dict(fetch_config().get("llm_breaker") or {})
+        settings.setdefault("max_timeout_seconds", TIMEOUT_SECONDS)
+        _BREAKER = CircuitBreaker(**settings)
+    return _BREAKER
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+async def _close_stale(client: httpx.AsyncClient) -> None:
+    """Fecha o pool criado em outro event loop; conexoes presas a um loop encerrado so sao descartadas."""
+    try:
+        await client.aclose()
+    except Exception:  # pragma: no cover - loop antigo ja fechado
+        pass
+
+
+async def _ensure_client() -> Tuple[httpx.AsyncClient, asyncio.Semaphore]:
+    """Cria (uma vez por event loop) o pool keep-alive e o limite de chamadas simultaneas."""
+    global _CLIENT, _SEMAPHORE, _LOOP
+    loop = asyncio.get_running_loop()
+    if _CLIENT is None or _LOOP is not loop:
+        previous = _CLIENT
+        config = fetch_config()
+        max_connections = int(config.get("llm_max_connections", DEFAULT_MAX_CONNECTIONS))
+        _CLIENT = httpx.AsyncClient(
+            http2=_http2_available(),
+            timeout=httpx.Timeout(TIMEOUT_SECONDS),
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+        )
+        _SEMAPHORE = asyncio.Semaphore(int(config.get("llm_max_concurrency", DEFAULT_MAX_CONCURRENCY)))
+        _LOOP = loop
+        # Troca antes de aguardar: chamadas concorrentes no novo loop ja veem o pool novo.
+        if previous is not None:
+            await _close_stale(previous)
+    return _CLIENT, _SEMAPHORE
+
+
+class RateLimiter:
+    """Espacamento minimo entre chamadas ao provedor (``rate_per_second`` <= 0 desliga)."""
+
+    def __init__(self, rate_per_second: float) -> None:
+        self._interval = 1.0 / rate_per_second if rate_per_second > 0 else 0.0
+        self._next_slot = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self) -> None:
+        if not self._interval:
+            return
+        async with self._lock:
+            now = asyncio.get_running_loop().time()
+            delay = max(0.0, self._next_slot - now)
+            self._next_slot = max(now, self._next_slot) + self._interval
+        if delay:
+            await asyncio.sleep(delay)
+
+
+async def close_client() -> None:
+    global _CLIENT, _SEMAPHORE, _LOOP
+    if _CLIENT is not None:
+        await _CLIENT.aclose()
+    _CLIENT = None
+    _SEMAPHORE = None
+    _LOOP = None
+
+
+async def chat_completion(messages: List[Dict[str, str]], api_key: str, model: str) -> Tuple[str, str]:
+    """Executa uma completion e retorna ``(texto, modelo)``; levanta excecao em falha."""
+    breaker = get_breaker()
+    if not breaker.allow():
+        raise CircuitOpenError("circuito_aberto")
+    client, semaphore = await _ensure_client()
+    async with semaphore:
+        started = time.monotonic()
+        try:
+            response = await client.post(
+                OPENAI_URL,
+                headers={"Authorization": f"Bearer {api_key}"},
+                json={"model": model, "messages": messages, "temperature": 0.2, "max_tokens": 120},
+                timeout=breaker.timeout(),
+            )
+            response.raise_for_status()
+            data = response.json()
+            content = (
+                data.get("choices", [{}])[0]
+                .get("message", {})
+                .get("content", "")
+                .strip()
+            )
+            if not content:
+                raise ValueError("Resposta vazia da API.")
+        except Exception:
+            breaker.record_failure(time.monotonic() - started)
+            raise
+    breaker.record_success(time.monotonic() - started)
+    return content, model
+
+
+async def stream_chat_completion(messages: List[Dict[str, str]], api_key: str, model: str) -> AsyncIterator[str]:
+    """Repassa os fragmentos de texto de uma completion em modo ``stream``."""
+    breaker = get_breaker()
+    if not breaker.allow():
+        raise CircuitOpenError("circuito_aberto")
+    client, semaphore = await _ensure_client()
+    async with semaphore:
+        started = time.monotonic()
+        try:
+            async with client.stream(
+                "POST",
+                OPENAI_URL,
+                headers={"Authorization": f"Bearer {api_key}"},
+                json={"model": model, "messages": messages, "temperature": 0.2, "max_tokens": 120, "stream": True},
+                timeout=breaker.timeout(),
+            ) as response:
+                response.raise_for_status()
+                first_token: Optional[float] = None
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[len("data:") :].strip()
+                    if data == "[DONE]":
+                        break
+                    delta = json.loads(data).get("choices", [{}])[0].get("delta", {}).get("content")
+                    if delta:
+                        if first_token is None:
+                            first_token = time.monotonic() - started
+                        yield delta
+        except Exception:
+            breaker.record_failure(time.monotonic() - started)
+            raise
+    # Em streaming a latencia relevante para o breaker e o tempo ate o primeiro token.
+    breaker.record_success(first_token if first_token is not None else time.monotonic() - started)
+
+
+__all__ = ["RateLimiter", "chat_completion", "close_client", "get_breaker", "stream_chat_completion"]
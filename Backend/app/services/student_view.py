@@ -0,0 +1,102 @@
+"""Visao do aluno com familia, atribuicao e voluntario unidos pelos indices."""
+
+from __future__ import annotations
+
+from typing import Dict, Iterable, List, Optional, Tuple, Type
+
+from pydantic import BaseModel
+
+from ..models import AssignmentRecord, FamilyProfile, PersonProfile, StudentProfile, VolunteerProfile
+from ..storage import get_records, list_family_services
+
+# Relacao expandivel -> colecoes lidas para resolve-la (tambem entram no ETag).
+EXPANSIONS: Dict[str, Tuple[str, ...]] = {
+    "family": ("families",),
+    "assignment": ("assignments",),
+    "volunteer": ("assignments", "volunteers"),
+}
+
+
+def _dumped(model: Type[BaseModel], rows: Dict[str, dict]) -> Dict[str, dict]:
+    """Linhas cruas passadas pelo modelo: mesmo formato (defaults inclusos) de ``/family/{id}`` e ``/students``."""
+    return {key: model(**row).model_dump() for key, row in rows.items()}
+
+
+def parse_expand(expand: Optional[str]) -> List[str]:
+    """Relacoes pedidas em ``expand``; levanta ``ValueError`` com as desconhecidas."""
+    if not expand:
+        return []
+    names = list(dict.fromkeys(name.strip() for name in expand.split(",") if name.strip()))
+    unknown = [name for name in names if name not in EXPANSIONS]
+    if unknown:
+        raise ValueError(",".join(unknown))
+    return names
+
+
+def expand_students(records: List[dict], relations: Iterable[str]) -> List[dict]:
+    """Anexa as relacoes pedidas a cada aluno com uma consulta em lote por colecao."""
+    relations = list(relations)
+    if not relations or not records:
+        return records
+    ids = [record["id"] for record in records]
+    students = get_records("students", ids)
+    assignments = get_records("assignments", ids) if {"assignment", "volunteer"} & set(relations) else {}
+    families = (
+        _dumped(FamilyProfile, get_records("families", {row["family_id"] for row in students.values()}))
+        if "family" in relations
+        else {}
+    )
+    volunteers = (
+        _dumped(VolunteerProfile, get_records("volunteers", {row["volunteer_id"] for row in assignments.values()}))
+        if "volunteer" in relations
+        else {}
+    )
+
+    expanded: List[dict] = []
+    for record in records:
+        student = students.get(record["id"], {})
+        assignment = assignments.get(record["id"])
+        extra: Dict[str, Optional[dict]] = {}
+        if "family" in relations:
+            extra["family"] = families.get(student.get("family_id"))
+        if "assignment" in relations:
+            extra["assignment"] = AssignmentRecord(**assignment).model_dump() if assignment else None
+        if "volunteer" in relations:
+            extra["volunteer"] = volunteers.get(assignment["volunteer_id"]) if assignment else None
+        expanded.append({**record, **extra})
+    return expanded
+
+
+def student_full(student_id: str) -> Optional[dict]:
+    """Agregado do aluno: perfil, pessoa, familia com responsaveis, servicos, atribuicao e voluntario."""
+    student = _dumped(StudentProfile, get_records("students", [student_id])).get(student_id)
+    if student is None:
+        return None
+    family = _dumped(FamilyProfile, get_records("families", [student["family_id"]])).get(student["family_id"])
+    household = family["household"] if family else []
+    persons = _dumped(
+        PersonProfile, get_records("persons", [student["person_id"], *(member["person_id"] for member in household)])
+    )
+    assignment = _dumped(AssignmentRecord, get_records("assignments", [student_id])).get(student_id)
+    volunteer = (
+        _dumped(VolunteerProfile, get_records("volunteers", [assignment["volunteer_id"]])).get(assignment["volunteer_id"])
+        if assignment
+        else None
+    )
+    services = list_family_services(family["id"]) if family else {}
+    return {
+        "student": student,
+        "person": persons.get(student["person_id"]),
+        "family": family,
+        "household": [
+            {**member, "person": persons.get(member["person_id"])}
+            for member in household
+            if member["person_id"] != student["person_id"]
+        ],
+        "services": {source: entry.model_dump() for source, entry in services.items()},
+        "assignment": assignment,
+        "volunteer": volunteer,
+    }
+
+
+__all__ = ["EXPANSIONS", "expand_students", "parse_expand", "student_full"]
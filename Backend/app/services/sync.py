@@ -31,18 +31,16 @@ from ..storage import (
     append_audit,
     fetch_config,
     fetch_zones,
-    generate_id,
     get_family,
-    list_families,
-    list_persons,
+    list_family_services,
     list_relationships,
-    list_services_cache,
     list_students,
+    reserve_id,
     resolve_zone,
     upsert_family,
     upsert_person,
     upsert_relationship,
-    upsert_service_cache,
+    upsert_service_cache_many,
     upsert_student,
 )
 from ..utils.names import generate_guardian_name, generate_student_name
@@ -65,12 +63,6 @@ def _timestamp() -> str:
     return datetime.utcnow().replace(tzinfo=timezone.utc, microsecond=0).isoformat()
 
 
-def _reserve_id(prefix: str, known: Set[str]) -> str:
-    new_id = generate_id(prefix, known)
-    known.add(new_id)
-    return new_id
-
-
 def _base_coordinates(zone: str, index: int, lat: float, lon: float) -> Tuple[float, float]:
     shift_lat = ((index % 3) - 1) * 0.0015
     shift_lon = ((index % 4) - 1) * 0.0013
@@ -244,15 +236,15 @@ def _upsert_services_cache(
     family_id: str,
     timestamp: str,
     entries: List[Tuple[str, dict]],
-    service_index: Dict[Tuple[str, str], ExternalServiceStatus],
-    service_ids: Set[str],
 ) -> None:
+    existing_by_source = list_family_services(family_id)
+    records: List[ExternalServiceStatus] = []
     for source, payload in entries:
-        existing = service_index.get((family_id, source))
+        existing = existing_by_source.get(source)
         if existing:
             service_id = existing.id
         else:
-            service_id = _reserve_id("SV", service_ids)
+            service_id = reserve_id("SV")
         record = ExternalServiceStatus(
             id=service_id,
             family_id=family_id,
@@ -260,21 +252,20 @@ def _upsert_services_cache(
             payload=payload,
             fetched_at=timestamp,
         )
-        upsert_service_cache(record)
-        service_index[(family_id, source)] = record
+        records.append(record)
+    upsert_service_cache_many(records)
 
 
 def _ensure_relationship(
     *,
     guardian_id: str,
     student_person_id: str,
-    relation_ids: Set[str],
     relation_index: Dict[Tuple[str, str, str], RelationshipEdge],
 ) -> None:
     key = (guardian_id, student_person_id, "guardian_of")
     if key in relation_index:
         return
-    edge_id = _reserve_id("E", relation_ids)
+    edge_id = reserve_id("E")
     edge = RelationshipEdge(
         id=edge_id,
         from_person_id=guardian_id,
@@ -299,22 +290,10 @@ def sync_zone_students(zone: str) -> Dict[str, object]:
     base_lon = zones[canonical_zone]["lon"]
     timestamp = _timestamp()
 
-    persons = list_persons()
-    families = list_families()
     relationships = list_relationships()
-    services_cache = list_services_cache()
-
-    person_ids = {item.id for item in persons}
-    family_ids = {item.id for item in families}
-    student_ids = {student.id for student in list_students()}
-    relation_ids = {edge.id for edge in relationships}
     relation_index = {
         (edge.from_person_id, edge.to_person_id, edge.type): edge for edge in relationships
     }
-    service_ids = {entry.id for entry in services_cache}
-    service_index = {
-        (entry.family_id, entry.source): entry for entry in services_cache
-    }
 
     existing_zone_students = list_students(zone=canonical_zone)
     needed = max(0, min_students - len(existing_zone_students))
@@ -323,7 +302,7 @@ def sync_zone_students(zone: str) -> Dict[str, object]:
 
     for offset in range(needed):
         base_index = len(existing_zone_students) + len(added_students) + offset
-        guardian_id = _reserve_id("P", person_ids)
+        guardian_id = reserve_id("P")
         guardian_name, guardian_preferred, guardian_gender = generate_guardian_name(base_index + 1)
         guardian = _build_person(
             person_id=guardian_id,
@@ -338,7 +317,7 @@ def sync_zone_students(zone: str) -> Dict[str, object]:
         )
         upsert_person(guardian)
 
-        student_person_id = _reserve_id("P", person_ids)
+        student_person_id = reserve_id("P")
         student_name, student_preferred, student_gender = generate_student_name(base_index + 1)
         student_person = _build_person(
             person_id=student_person_id,
@@ -353,7 +332,7 @@ def sync_zone_students(zone: str) -> Dict[str, object]:
         )
         upsert_person(student_person)
 
-        family_id = _reserve_id("F", family_ids)
+        family_id = reserve_id("F")
         services, eligibility, warm_notes, confidence, inputs, explanations, cache_entries = _compose_service_package(
             family_id, canonical_zone, timestamp
         )
@@ -376,11 +355,9 @@ def sync_zone_students(zone: str) -> Dict[str, object]:
             family_id=family_id,
             timestamp=timestamp,
             entries=cache_entries,
-            service_index=service_index,
-            service_ids=service_ids,
         )
 
-        student_id = _reserve_id("S", student_ids)
+        student_id = reserve_id("S")
         student_profile = _build_student_profile(
             student_id=student_id,
             person_id=student_person_id,
@@ -395,7 +372,6 @@ def sync_zone_students(zone: str) -> Dict[str, object]:
         _ensure_relationship(
             guardian_id=guardian_id,
             student_person_id=student_person_id,
-            relation_ids=relation_ids,
             relation_index=relation_index,
         )
 
@@ -448,8 +424,6 @@ def sync_zone_students(zone: str) -> Dict[str, object]:
             family_id=family.id,
             timestamp=timestamp,
             entries=cache_entries,
-            service_index=service_index,
-            service_ids=service_ids,
         )
 
     append_audit(
@@ -469,4 +443,10 @@ def sync_zone_students(zone: str) -> Dict[str, object]:
     }
 
 
-__all__ = ["sync_zone_students"]
+def compose_family_services(family_id: str, zone: str, timestamp: str) -> Tuple[FamilyExternalServices, Dict[str, dict]]:
+    """Servicos externos (mock) da familia e o payload de cada fonte, como a sincronizacao os grava."""
+    services, *_, status_payloads = _compose_service_package(family_id, zone, timestamp)
+    return services, dict(status_payloads)
+
+
+__all__ = ["compose_family_services", "sync_zone_students"]
@@ -0,0 +1,213 @@
+"""Importacao em lote de voluntarios a partir de CSV ou NDJSON."""
+
+from __future__ import annotations
+
+import csv
+import json
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+
+from ..models import VolunteerProfile, VolunteerUpsert
+from ..storage import append_audit, fetch_config, get_records, reserve_ids, resolve_zone, upsert_volunteers_many
+
+IMPORT_FORMATS = ("csv", "ndjson")
+DEFAULT_MAX_ROWS = 50000
+# Linhas validadas por bloco; os erros sao reportados por linha de origem.
+IMPORT_CHUNK_ROWS = 500
+# Colunas CSV que viram listas (valores separados por ``;``).
+CSV_LIST_COLUMNS = ("skills", "languages", "tags", "availability.weekdays", "availability.time_slots")
+
+RawRow = Tuple[int, Optional[Dict[str, Any]], Optional[str]]
+
+
+class ImportFileError(ValueError):
+    """Arquivo ilegivel como um todo (``codificacao_invalida``, ``csv_malformado``); ``row`` e a linha do problema."""
+
+    def __init__(self, code: str, row: Optional[int]) -> None:
+        super().__init__(code)
+        self.row = row
+
+
+def volunteer_profile(payload: VolunteerUpsert, volunteer_id: str, zone: str, config: Dict[str, Any]) -> VolunteerProfile:
+    """Perfil completo a partir do payload do webhook/importacao, com os defaults do ``config.json``."""
+    max_students = payload.max_students if payload.max_students is not None else int(config.get("max_students_default", 10))
+    radius_km = payload.radius_km if payload.radius_km is not None else float(config.get("max_radius_km", 8.0))
+    return VolunteerProfile(
+        id=volunteer_id,
+        name=payload.name,
+        zone=zone,
+        address=payload.address,
+        contact=payload.contact,
+        coordinates=payload.coordinates,
+        max_students=max_students,
+        radius_km=radius_km,
+        availability=payload.availability,
+        skills=payload.skills,
+        languages=payload.languages,
+        experience_years=payload.experience_years or 0,
+        accessibility=payload.accessibility,
+        verified=payload.verified if payload.verified is not None else False,
+        warm_notes=payload.warm_notes,
+        tags=payload.tags,
+    )
+
+
+def _csv_record(row: Dict[str, str]) -> Dict[str, Any]:
+    """Cabecalhos com ponto viram objetos aninhados (``address.city``); celulas vazias sao omitidas."""
+    record: Dict[str, Any] = {}
+    for column, value in row.items():
+        if column is None or value is None or not value.strip():
+            continue
+        column = column.strip()
+        parsed: Any = value.strip()
+        if column in CSV_LIST_COLUMNS:
+            parsed = [item.strip() for item in parsed.split(";") if item.strip()]
+        target = record
+        *parents, leaf = column.split(".")
+        for parent in parents:
+            target = target.setdefault(parent, {})
+        target[leaf] = parsed
+    return record
+
+
+class _DecodedLines:
+    """Linhas em UTF-8 (BOM opcional), decodificadas uma a uma; ``number`` e a ultima linha entregue."""
+
+    def __init__(self, stream: BinaryIO) -> None:
+        self._stream = iter(stream)
+        self.number = 0
+
+    def __iter__(self) -> "_DecodedLines":
+        return self
+
+    def __next__(self) -> str:
+        raw = next(self._stream)
+        self.number += 1
+        try:
+            line = raw.decode("utf-8")
+        except UnicodeDecodeError as exc:
+            raise ImportFileError("codificacao_invalida", self.number) from exc
+        return line.removeprefix("\ufeff") if self.number == 1 else line
+
+
+def _iter_rows(stream: BinaryIO, fmt: str) -> Iterator[RawRow]:
+    """``(linha, registro, erro)`` lidos sob demanda do arquivo."""
+    lines = _DecodedLines(stream)
+    if fmt == "csv":
+        reader = csv.DictReader(lines)
+        try:
+            if reader.fieldnames is None:
+                return
+            line = lines.number
+            for row in reader:
+                # Linha inicial do registro (campos entre aspas podem ocupar varias).
+                start, line = line + 1, lines.number
+                yield start, _csv_record(row), None
+        except csv.Error as exc:
+            raise ImportFileError("csv_malformado", lines.number or None) from exc
+        return
+    for number, raw in enumerate(lines, start=1):
+        if not raw.strip():
+            continue
+        try:
+            record = json.loads(raw)
+        except json.JSONDecodeError:
+            yield number, None, "json_invalido"
+            continue
+        if not isinstance(record, dict):
+            yield number, None, "objeto_esperado"
+            continue
+        yield number, record, None
+
+
+def _chunks(rows: Iterator[RawRow], size: int) -> Iterator[List[RawRow]]:
+    chunk: List[RawRow] = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def import_volunteers(stream: BinaryIO, fmt: str) -> Dict[str, Any]:
+    """Valida as linhas em blocos contra ``VolunteerUpsert``, reserva os ids de uma vez e grava uma unica vez.
+
+    Linhas invalidas nao impedem as demais; cada uma volta em ``errors`` com o
+    numero da linha de origem. Ids informados e ainda livres sao mantidos; os
+    repetidos ou ja existentes recebem um novo da sequencia persistente, como no webhook. Acima de
+    ``volunteer_import_max_rows`` linhas levanta ``ValueError`` sem gravar nada; arquivo fora
+    de UTF-8 ou CSV malformado levanta ``ImportFileError``, tambem sem gravar nada.
+    """
+    config = fetch_config()
+    max_rows = int(config.get("volunteer_import_max_rows", DEFAULT_MAX_ROWS))
+    zones: Dict[str, Optional[str]] = {}
+    valid: List[Tuple[int, VolunteerUpsert, str]] = []
+    errors: List[Dict[str, Any]] = []
+    received = 0
+
+    for chunk in _chunks(_iter_rows(stream, fmt), IMPORT_CHUNK_ROWS):
+        received += len(chunk)
+        if received > max_rows:
+            raise ValueError("importacao_excede_limite")
+        for line, record, problem in chunk:
+            if problem is not None:
+                errors.append({"row": line, "errors": [{"field": None, "message": problem}]})
+                continue
+            try:
+                payload = VolunteerUpsert.model_validate(record)
+            except ValidationError as exc:
+                errors.append(
+                    {
+                        "row": line,
+                        "errors": [
+                            {"field": ".".join(str(part) for part in error["loc"]), "message": error["msg"]}
+                            for error in exc.errors()
+                        ],
+                    }
+                )
+                continue
+            if payload.zone not in zones:
+                try:
+                    zones[payload.zone] = resolve_zone(payload.zone)
+                except ValueError:
+                    zones[payload.zone] = None
+            if zones[payload.zone] is None:
+                errors.append({"row": line, "errors": [{"field": "zone", "message": "zona_invalida"}]})
+                continue
+            valid.append((line, payload, zones[payload.zone]))
+
+    taken = set(get_records("volunteers", [payload.id for _, payload, _ in valid if payload.id]))
+    kept: Dict[int, str] = {}
+    for line, payload, _ in valid:
+        if payload.id and payload.id not in taken:
+            taken.add(payload.id)
+            kept[line] = payload.id
+    needed = len(valid) - len(kept)
+    reserved: List[str] = []
+    while len(reserved) < needed:
+        # Pula numeros que coincidam com ids explicitos deste mesmo arquivo.
+        batch = reserve_ids("V", needed - len(reserved))
+        reserved.extend(volunteer_id for volunteer_id in batch if volunteer_id not in taken)
+    fresh = iter(reserved)
+    profiles = [
+        volunteer_profile(payload, kept.get(line) or next(fresh), zone, config) for line, payload, zone in valid
+    ]
+    upsert_volunteers_many(profiles)
+
+    append_audit(
+        "volunteer_import",
+        {"format": fmt, "received": received, "imported": len(profiles), "failed": len(errors)},
+    )
+    return {
+        "received": received,
+        "imported": len(profiles),
+        "failed": len(errors),
+        "volunteer_ids": [profile.id for profile in profiles],
+        "errors": errors,
+    }
+
+
+__all__ = ["DEFAULT_MAX_ROWS", "IMPORT_FORMATS", "ImportFileError", "import_volunteers", "volunteer_profile"]
@@ -3,10 +3,15 @@
 from __future__ import annotations
 
 import json
+import os
 import threading
+from contextlib import contextmanager
+from bisect import bisect_left, bisect_right, insort
 from datetime import datetime, timezone
+from heapq import merge
+from operator import itemgetter
 from pathlib import Path
-from typing import Dict, Iterable, List, Optional
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
 from .models import (
     AssignmentRecord,
@@ -27,7 +32,13 @@ from .seed_data import (
     VOLUNTEERS,
     ZONES,
 )
-from .utils import next_id, normalize_zone_name
+from .utils import format_id, highest_number, normalize_zone_name
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+    import msvcrt
 
 BASE_DIR = Path(__file__).resolve().parent
 DATA_DIR = BASE_DIR.parent / "data"
@@ -62,12 +73,25 @@ _LIST_COLLECTIONS = {
 _DICT_COLLECTIONS = {
     "zones": {"file": DATA_DIR / "zones.json", "seed": {"zones": ZONES}},
     "config": {"file": DATA_DIR / "config.json", "seed": CONFIG},
+    "sequences": {"file": DATA_DIR / "sequences.json", "seed": {"sequences": {}}},
 }
 
-_LOCKS = {name: threading.Lock() for name in {**_LIST_COLLECTIONS, **_DICT_COLLECTIONS}}
+_LOCKS = {name: threading.RLock() for name in {**_LIST_COLLECTIONS, **_DICT_COLLECTIONS}}
 _AUDIT_FILE = DATA_DIR / "audit_log.jsonl"
 _AUDIT_LOCK = threading.Lock()
 
+# Cache em memoria das colecoes, invalidado pelo carimbo (mtime, tamanho) do arquivo.
+# As linhas sao compartilhadas com os indices: nunca mutar os dicts retornados.
+_CACHE: Dict[str, Dict[str, Any]] = {}
+
+RebuildHook = Callable[[List[dict]], None]
+ChangeHook = Callable[[Optional[dict], Optional[dict]], None]
+_INDEX_HOOKS: Dict[str, List[Tuple[RebuildHook, ChangeHook]]] = {name: [] for name in _LIST_COLLECTIONS}
+
+# Versao monotonica por colecao: sobe a cada escrita ou troca externa do arquivo.
+_VERSIONS: Dict[str, int] = {name: 0 for name in _LIST_COLLECTIONS}
+_VERSION_STAMPS: Dict[str, Tuple[int, int]] = {}
+
 
 def _timestamp() -> str:
     return datetime.utcnow().replace(tzinfo=timezone.utc, microsecond=0).isoformat()
@@ -92,34 +116,333 @@ def _ensure_files() -> None:
 _ensure_files()
 
 
-def _read_list(name: str) -> List[dict]:
+def _file_stamp(path: Path) -> Tuple[int, int]:
+    stat = path.stat()
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _observe_stamp(name: str, stamp: Tuple[int, int]) -> None:
+    if _VERSION_STAMPS.get(name) != stamp:
+        _VERSION_STAMPS[name] = stamp
+        _VERSIONS[name] += 1
+
+
+def collection_version(name: str) -> int:
+    """Versao atual da colecao; consulta apenas o carimbo do arquivo, sem ler o conteudo."""
+    with _LOCKS[name]:
+        _observe_stamp(name, _file_stamp(_LIST_COLLECTIONS[name]["file"]))
+        return _VERSIONS[name]
+
+
+def _load_rows(name: str) -> List[dict]:
+    """Retorna as linhas em cache (sem copia), recarregando se o arquivo mudou."""
     meta = _LIST_COLLECTIONS[name]
     with _LOCKS[name]:
-        raw = json.loads(meta["file"].read_text(encoding="utf-8"))
-    return list(raw.get(meta["root"], []))
+        stamp = _file_stamp(meta["file"])
+        _observe_stamp(name, stamp)
+        cached = _CACHE.get(name)
+        if cached is None or cached["stamp"] != stamp:
+            raw = json.loads(meta["file"].read_text(encoding="utf-8"))
+            rows = list(raw.get(meta["root"], []))
+            # Escritas ja gravam nesta ordem; arquivos editados a mao tambem passam a segui-la.
+            rows.sort(key=itemgetter(_PRIMARY_KEYS[name]))
+            _CACHE[name] = {"stamp": stamp, "rows": rows}
+            for rebuild, _ in _INDEX_HOOKS[name]:
+                rebuild(rows)
+        return _CACHE[name]["rows"]
+
+
+def _read_list(name: str) -> List[dict]:
+    return list(_load_rows(name))
 
 
-def _write_list(name: str, items: List[dict]) -> None:
+def _write_list(
+    name: str,
+    items: List[dict],
+    changes: Optional[List[Tuple[Optional[dict], Optional[dict]]]] = None,
+) -> None:
+    """Persiste a colecao; ``changes`` (antigo, novo) atualiza indices sem reconstruir."""
     meta = _LIST_COLLECTIONS[name]
     payload = {meta["root"]: items}
     with _LOCKS[name]:
         meta["file"].write_text(json.dumps(payload, indent=2, ensure_ascii=False), encoding="utf-8")
+        _CACHE[name] = {"stamp": _file_stamp(meta["file"]), "rows": items}
+        # Sobe mesmo que o carimbo coincida (escritas no mesmo tique do relogio de arquivos).
+        _VERSION_STAMPS[name] = _CACHE[name]["stamp"]
+        _VERSIONS[name] += 1
+        for rebuild, apply_change in _INDEX_HOOKS[name]:
+            if changes is None:
+                rebuild(items)
+                continue
+            for old, new in changes:
+                apply_change(old, new)
+
+
+def register_index(name: str, rebuild: RebuildHook, apply_change: ChangeHook) -> None:
+    """Registra um indice derivado mantido a cada leitura completa ou escrita da colecao."""
+    with _LOCKS[name]:
+        _INDEX_HOOKS[name].append((rebuild, apply_change))
+        cached = _CACHE.get(name)
+        if cached is not None:
+            rebuild(cached["rows"])
+
+
+def ensure_indexed(*names: str) -> None:
+    """Garante que os indices das colecoes reflitam o conteudo atual dos arquivos."""
+    for name in names:
+        _load_rows(name)
+
+
+def reindex(*names: str) -> None:
+    """Le de novo os arquivos e reconstroi do zero todos os indices das colecoes (reparo).
+
+    A versao sobe mesmo com o arquivo intacto: ETags e corpos cacheados derivados
+    dos indices antigos deixam de valer.
+    """
+    for name in names:
+        with _LOCKS[name]:
+            _CACHE.pop(name, None)
+            _load_rows(name)
+            _VERSIONS[name] += 1
 
 
 def _upsert(name: str, key_field: str, item: dict) -> None:
-    data = _read_list(name)
-    index = next((i for i, entry in enumerate(data) if entry[key_field] == item[key_field]), None)
-    if index is None:
-        data.append(item)
-    else:
-        data[index] = item
-    data.sort(key=lambda entry: entry[key_field])
-    _write_list(name, data)
+    _upsert_many(name, key_field, [item])
+
+
+def _upsert_many(name: str, key_field: str, items: List[dict]) -> None:
+    if not items:
+        return
+    with _LOCKS[name]:
+        data = _read_list(name)
+        positions = {entry[key_field]: i for i, entry in enumerate(data)}
+        changes: List[Tuple[Optional[dict], Optional[dict]]] = []
+        for item in items:
+            index = positions.get(item[key_field])
+            if index is None:
+                positions[item[key_field]] = len(data)
+                data.append(item)
+                changes.append((None, item))
+            else:
+                changes.append((data[index], item))
+                data[index] = item
+        data.sort(key=lambda entry: entry[key_field])
+        _write_list(name, data, changes)
 
 
 def _remove(name: str, key_field: str, value: str) -> None:
-    data = [entry for entry in _read_list(name) if entry.get(key_field) != value]
-    _write_list(name, data)
+    with _LOCKS[name]:
+        data = _read_list(name)
+        kept = [entry for entry in data if entry.get(key_field) != value]
+        removed = [entry for entry in data if entry.get(key_field) == value]
+        _write_list(name, kept, [(entry, None) for entry in removed])
+
+
+class _FetchedAtIndex:
+    """Entradas do cache de servicos ordenadas por ``fetched_at`` em cada fonte."""
+
+    def __init__(self) -> None:
+        self._by_source: Dict[str, List[Tuple[str, str]]] = {}
+        self._lock = threading.Lock()
+
+    def rebuild(self, rows: List[dict]) -> None:
+        by_source: Dict[str, List[Tuple[str, str]]] = {}
+        for row in rows:
+            by_source.setdefault(row["source"], []).append((row["fetched_at"], row["id"]))
+        for entries in by_source.values():
+            entries.sort()
+        with self._lock:
+            self._by_source = by_source
+
+    def apply(self, old: Optional[dict], new: Optional[dict]) -> None:
+        with self._lock:
+            if old is not None:
+                entries = self._by_source.get(old["source"], [])
+                key = (old["fetched_at"], old["id"])
+                position = bisect_left(entries, key)
+                if position < len(entries) and entries[position] == key:
+                    del entries[position]
+            if new is not None:
+                insort(self._by_source.setdefault(new["source"], []), (new["fetched_at"], new["id"]))
+
+    def older_than(self, cutoffs: Dict[str, str], default_cutoff: Optional[str], limit: int) -> List[str]:
+        with self._lock:
+            streams = []
+            for source, entries in self._by_source.items():
+                cutoff = cutoffs.get(source, default_cutoff)
+                if cutoff is None:
+                    continue
+                streams.append(entries[: bisect_left(entries, (cutoff, ""))])
+        ids: List[str] = []
+        for _, entry_id in merge(*streams):
+            if len(ids) >= limit:
+                break
+            ids.append(entry_id)
+        return ids
+
+
+class _KeyIndex:
+    """Mapa chave -> linha mantido pelos ganchos de escrita da colecao."""
+
+    def __init__(self, key: Callable[[dict], Any]) -> None:
+        self._key = key
+        self._rows: Dict[Any, dict] = {}
+
+    def rebuild(self, rows: List[dict]) -> None:
+        self._rows = {self._key(row): row for row in rows}
+
+    def apply(self, old: Optional[dict], new: Optional[dict]) -> None:
+        if old is not None and self._rows.get(self._key(old)) is old:
+            del self._rows[self._key(old)]
+        if new is not None:
+            self._rows[self._key(new)] = new
+
+    def get(self, key: Any) -> Optional[dict]:
+        return self._rows.get(key)
+
+
+class _GroupIndex:
+    """Agrupa linhas por ``group`` e, dentro do grupo, por ``key``.
+
+    Os grupos sao alterados no lugar pelas escritas; o lock impede que ``get``
+    copie um grupo enquanto ``apply`` o modifica em outra thread.
+    """
+
+    def __init__(self, group: Callable[[dict], Any], key: Callable[[dict], Any]) -> None:
+        self._group = group
+        self._key = key
+        self._groups: Dict[Any, Dict[Any, dict]] = {}
+        self._lock = threading.RLock()
+
+    def rebuild(self, rows: List[dict]) -> None:
+        groups: Dict[Any, Dict[Any, dict]] = {}
+        for row in rows:
+            groups.setdefault(self._group(row), {})[self._key(row)] = row
+        with self._lock:
+            self._groups = groups
+
+    def apply(self, old: Optional[dict], new: Optional[dict]) -> None:
+        with self._lock:
+            if old is not None:
+                members = self._groups.get(self._group(old), {})
+                if members.get(self._key(old)) is old:
+                    del members[self._key(old)]
+            if new is not None:
+                self._groups.setdefault(self._group(new), {})[self._key(new)] = new
+
+    def get(self, group: Any) -> Dict[Any, dict]:
+        with self._lock:
+            return dict(self._groups.get(group, {}))
+
+
+_PRIMARY_KEYS = {
+    "persons": "id",
+    "students": "id",
+    "volunteers": "id",
+    "families": "id",
+    "assignments": "student_id",
+    "relationships": "id",
+    "services": "id",
+}
+_MODELS = {
+    "persons": PersonProfile,
+    "students": StudentProfile,
+    "volunteers": VolunteerProfile,
+    "families": FamilyProfile,
+    "assignments": AssignmentRecord,
+    "relationships": RelationshipEdge,
+    "services": ExternalServiceStatus,
+}
+_PK_INDEXES = {name: _KeyIndex(itemgetter(field)) for name, field in _PRIMARY_KEYS.items()}
+for _name, _index in _PK_INDEXES.items():
+    register_index(_name, _index.rebuild, _index.apply)
+
+_SERVICES_BY_FETCHED_AT = _FetchedAtIndex()
+register_index("services", _SERVICES_BY_FETCHED_AT.rebuild, _SERVICES_BY_FETCHED_AT.apply)
+_SERVICES_BY_FAMILY = _GroupIndex(itemgetter("family_id"), itemgetter("source"))
+register_index("services", _SERVICES_BY_FAMILY.rebuild, _SERVICES_BY_FAMILY.apply)
+_BY_ZONE = {
+    name: _GroupIndex(itemgetter("zone"), itemgetter(_PRIMARY_KEYS[name]))
+    for name in ("students", "volunteers", "assignments")
+}
+for _name, _index in _BY_ZONE.items():
+    register_index(_name, _index.rebuild, _index.apply)
+_ASSIGNMENTS_BY_VOLUNTEER = _GroupIndex(itemgetter("volunteer_id"), itemgetter("student_id"))
+register_index("assignments", _ASSIGNMENTS_BY_VOLUNTEER.rebuild, _ASSIGNMENTS_BY_VOLUNTEER.apply)
+_STUDENTS_BY_FAMILY = _GroupIndex(itemgetter("family_id"), itemgetter("id"))
+register_index("students", _STUDENTS_BY_FAMILY.rebuild, _STUDENTS_BY_FAMILY.apply)
+
+
+def _get_row(name: str, key: str) -> Optional[dict]:
+    _load_rows(name)
+    return _PK_INDEXES[name].get(key)
+
+
+def zone_records(name: str, zone: str) -> List[dict]:
+    """Linhas cruas de uma zona canonica, na ordem da chave primaria; nao mutar o retorno."""
+    _load_rows(name)
+    members = _BY_ZONE[name].get(zone)
+    return [members[key] for key in sorted(members)]
+
+
+def get_records(name: str, keys: Iterable[str]) -> Dict[str, dict]:
+    """Linhas cruas (sem modelos Pydantic) pela chave primaria; nao mutar o retorno."""
+    _load_rows(name)
+    index = _PK_INDEXES[name]
+    rows = ((key, index.get(key)) for key in keys)
+    return {key: row for key, row in rows if row is not None}
+
+
+def collection_fields(name: str) -> List[str]:
+    """Campos de primeiro nivel do modelo da colecao (validos em projecoes)."""
+    return list(_MODELS[name].model_fields)
+
+
+def _zone_ordered(name: str, zone: str) -> List[dict]:
+    if name == "families":
+        family_ids = sorted({row["family_id"] for row in zone_records("students", zone)})
+        rows = get_records("families", family_ids)
+        return [rows[family_id] for family_id in family_ids if family_id in rows]
+    return zone_records(name, zone)
+
+
+def iter_records(
+    name: str,
+    zone: Optional[str] = None,
+    after: Optional[str] = None,
+    limit: Optional[int] = None,
+    fields: Optional[List[str]] = None,
+) -> Tuple[Iterator[dict], Optional[str]]:
+    """Registros na ordem da chave primaria a partir de ``after`` (exclusivo), gerados sob demanda.
+
+    Cada linha so e materializada ao ser consumida: com ``fields`` as linhas cruas
+    sao projetadas (campos ausentes recebem o default do modelo); sem ``fields``
+    passam pelo modelo como nas listagens completas. Retorna tambem a chave da
+    ultima linha quando ha mais paginas. Escritas trocam a lista em cache em vez
+    de muta-la, entao o iterador ve um retrato consistente da colecao.
+    """
+    key_field = _PRIMARY_KEYS[name]
+    rows = _zone_ordered(name, resolve_zone(zone)) if zone else _load_rows(name)
+    start = bisect_right(rows, after, key=itemgetter(key_field)) if after is not None else 0
+    end = len(rows) if limit is None else min(len(rows), start + limit)
+    next_after = rows[end - 1][key_field] if start < end < len(rows) else None
+    model = _MODELS[name]
+    if fields is None:
+        return (model(**rows[i]).model_dump() for i in range(start, end)), next_after
+    defaults = {field: model.model_fields[field].get_default(call_default_factory=True) for field in fields}
+    return ({field: rows[i].get(field, defaults[field]) for field in fields} for i in range(start, end)), next_after
+
+
+def page_records(
+    name: str,
+    zone: Optional[str] = None,
+    after: Optional[str] = None,
+    limit: Optional[int] = None,
+    fields: Optional[List[str]] = None,
+) -> Tuple[List[dict], Optional[str]]:
+    """Pagina materializada de :func:`iter_records`."""
+    records, next_after = iter_records(name, zone, after, limit, fields)
+    return list(records), next_after
 
 
 def resolve_zone(zone: str) -> str:
@@ -139,10 +462,8 @@ def list_persons() -> List[PersonProfile]:
 
 
 def get_person(person_id: str) -> Optional[PersonProfile]:
-    for row in _read_list("persons"):
-        if row["id"] == person_id:
-            return PersonProfile(**row)
-    return None
+    row = _get_row("persons", person_id)
+    return PersonProfile(**row) if row else None
 
 
 def upsert_person(person: PersonProfile) -> None:
@@ -150,18 +471,21 @@ def upsert_person(person: PersonProfile) -> None:
 
 
 def list_students(zone: Optional[str] = None) -> List[StudentProfile]:
-    items = [StudentProfile(**row) for row in _read_list("students")]
     if zone:
-        canonical = resolve_zone(zone)
-        return [student for student in items if student.zone == canonical]
-    return items
+        return [StudentProfile(**row) for row in zone_records("students", resolve_zone(zone))]
+    return [StudentProfile(**row) for row in _read_list("students")]
 
 
 def get_student(student_id: str) -> Optional[StudentProfile]:
-    for row in _read_list("students"):
-        if row["id"] == student_id:
-            return StudentProfile(**row)
-    return None
+    row = _get_row("students", student_id)
+    return StudentProfile(**row) if row else None
+
+
+def get_students_many(student_ids: Iterable[str]) -> Dict[str, StudentProfile]:
+    """Resolve varios alunos em uma unica passagem pelo indice de chave primaria."""
+    _load_rows("students")
+    rows = ((student_id, _PK_INDEXES["students"].get(student_id)) for student_id in student_ids)
+    return {student_id: StudentProfile(**row) for student_id, row in rows if row}
 
 
 def upsert_student(student: StudentProfile) -> None:
@@ -169,43 +493,63 @@ def upsert_student(student: StudentProfile) -> None:
 
 
 def list_volunteers(zone: Optional[str] = None) -> List[VolunteerProfile]:
-    items = [VolunteerProfile(**row) for row in _read_list("volunteers")]
     if zone:
-        canonical = resolve_zone(zone)
-        return [vol for vol in items if vol.zone == canonical]
-    return items
+        return [VolunteerProfile(**row) for row in zone_records("volunteers", resolve_zone(zone))]
+    return [VolunteerProfile(**row) for row in _read_list("volunteers")]
 
 
 def get_volunteer(volunteer_id: str) -> Optional[VolunteerProfile]:
-    for row in _read_list("volunteers"):
-        if row["id"] == volunteer_id:
-            return VolunteerProfile(**row)
-    return None
+    row = _get_row("volunteers", volunteer_id)
+    return VolunteerProfile(**row) if row else None
 
 
 def upsert_volunteer(volunteer: VolunteerProfile) -> None:
     _upsert("volunteers", "id", volunteer.model_dump())
 
 
+def upsert_volunteers_many(volunteers: Iterable[VolunteerProfile]) -> None:
+    """Grava varios voluntarios em uma unica escrita."""
+    _upsert_many("volunteers", "id", [volunteer.model_dump() for volunteer in volunteers])
+
+
 def list_families(zone: Optional[str] = None) -> List[FamilyProfile]:
-    families = [FamilyProfile(**row) for row in _read_list("families")]
     if not zone:
-        return families
-    family_ids = {student.family_id for student in list_students(zone=zone)}
-    return [family for family in families if family.id in family_ids]
+        return [FamilyProfile(**row) for row in _read_list("families")]
+    return [FamilyProfile(**row) for row in _zone_ordered("families", resolve_zone(zone))]
 
 
 def get_family(family_id: str) -> Optional[FamilyProfile]:
-    for row in _read_list("families"):
-        if row["id"] == family_id:
-            return FamilyProfile(**row)
-    return None
+    row = _get_row("families", family_id)
+    return FamilyProfile(**row) if row else None
+
+
+def get_families_many(family_ids: Iterable[str]) -> Dict[str, FamilyProfile]:
+    """Resolve varias familias em uma unica passagem pelo indice de chave primaria."""
+    _load_rows("families")
+    rows = ((family_id, _PK_INDEXES["families"].get(family_id)) for family_id in family_ids)
+    return {family_id: FamilyProfile(**row) for family_id, row in rows if row}
 
 
 def upsert_family(family: FamilyProfile) -> None:
     _upsert("families", "id", family.model_dump())
 
 
+def upsert_families_many(families: Iterable[FamilyProfile]) -> None:
+    """Grava varias familias em uma unica escrita."""
+    _upsert_many("families", "id", [family.model_dump() for family in families])
+
+
+def family_zones(family_ids: Iterable[str]) -> Dict[str, str]:
+    """Zona de cada familia pelo aluno vinculado de maior id, sem varrer a colecao de alunos."""
+    _load_rows("students")
+    zones: Dict[str, str] = {}
+    for family_id in family_ids:
+        members = _STUDENTS_BY_FAMILY.get(family_id)
+        if members:
+            zones[family_id] = members[max(members)]["zone"]
+    return zones
+
+
 def list_relationships() -> List[RelationshipEdge]:
     return [RelationshipEdge(**row) for row in _read_list("relationships")]
 
@@ -222,37 +566,86 @@ def upsert_service_cache(entry: ExternalServiceStatus) -> None:
     _upsert("services", "id", entry.model_dump())
 
 
+def upsert_service_cache_many(entries: Iterable[ExternalServiceStatus]) -> None:
+    """Grava varias entradas do cache de servicos em uma unica escrita."""
+    _upsert_many("services", "id", [entry.model_dump() for entry in entries])
+
+
+def list_stale_services(
+    cutoffs: Dict[str, str],
+    default_cutoff: Optional[str] = None,
+    limit: int = 100,
+) -> List[ExternalServiceStatus]:
+    """Entradas com ``fetched_at`` anterior ao corte da fonte, das mais antigas para as recentes."""
+    _load_rows("services")
+    stale_ids = _SERVICES_BY_FETCHED_AT.older_than(cutoffs, default_cutoff, limit)
+    rows = [_PK_INDEXES["services"].get(entry_id) for entry_id in stale_ids]
+    return [ExternalServiceStatus(**row) for row in rows if row]
+
+
+def list_family_services(family_id: str) -> Dict[str, ExternalServiceStatus]:
+    """Entradas do cache de servicos da familia indexadas por fonte, sem varrer o arquivo."""
+    _load_rows("services")
+    return {
+        source: ExternalServiceStatus(**row)
+        for source, row in sorted(_SERVICES_BY_FAMILY.get(family_id).items())
+    }
+
+
+def get_service_cache(family_id: str, source: str) -> Optional[ExternalServiceStatus]:
+    _load_rows("services")
+    row = _SERVICES_BY_FAMILY.get(family_id).get(source)
+    return ExternalServiceStatus(**row) if row else None
+
+
 def list_assignments(zone: Optional[str] = None) -> List[AssignmentRecord]:
-    items = [AssignmentRecord(**row) for row in _read_list("assignments")]
     if zone:
-        canonical = resolve_zone(zone)
-        return [assignment for assignment in items if assignment.zone == canonical]
-    return items
+        return [AssignmentRecord(**row) for row in zone_records("assignments", resolve_zone(zone))]
+    return [AssignmentRecord(**row) for row in _read_list("assignments")]
+
+
+def volunteer_loads(volunteer_ids: Iterable[str]) -> Dict[str, int]:
+    """Quantidade de alunos atribuidos a cada voluntario, sem varrer as atribuicoes."""
+    _load_rows("assignments")
+    return {volunteer_id: len(_ASSIGNMENTS_BY_VOLUNTEER.get(volunteer_id)) for volunteer_id in volunteer_ids}
 
 
 def append_assignment(record: AssignmentRecord) -> None:
-    data = [row for row in _read_list("assignments") if row["student_id"] != record.student_id]
-    data.append(record.model_dump())
-    data.sort(key=lambda row: row["student_id"])
-    _write_list("assignments", data)
+    with _LOCKS["assignments"]:
+        current = _read_list("assignments")
+        previous = [row for row in current if row["student_id"] == record.student_id]
+        data = [row for row in current if row["student_id"] != record.student_id]
+        item = record.model_dump()
+        data.append(item)
+        data.sort(key=lambda row: row["student_id"])
+        changes: List[Tuple[Optional[dict], Optional[dict]]] = [(row, None) for row in previous]
+        changes.append((None, item))
+        _write_list("assignments", data, changes)
 
 
 def remove_assignments_for_student(student_id: str) -> None:
     _remove("assignments", "student_id", student_id)
 
 
+def _load_dict(name: str) -> Dict[str, Any]:
+    """Conteudo em cache (sem copia) de ``zones``/``config``, relido so quando o carimbo do arquivo muda."""
+    meta = _DICT_COLLECTIONS[name]
+    with _LOCKS[name]:
+        stamp = _file_stamp(meta["file"])
+        cached = _CACHE.get(name)
+        if cached is None or cached["stamp"] != stamp:
+            cached = _CACHE[name] = {"stamp": stamp, "payload": json.loads(meta["file"].read_text(encoding="utf-8"))}
+        return cached["payload"]
+
+
 def fetch_zones() -> Dict[str, Dict[str, float]]:
-    meta = _DICT_COLLECTIONS["zones"]
-    with _LOCKS["zones"]:
-        payload = json.loads(meta["file"].read_text(encoding="utf-8"))
-    return payload.get("zones", {})
+    """Zonas configuradas; compartilhado entre chamadas, nao mutar o retorno."""
+    return _load_dict("zones").get("zones", {})
 
 
-def fetch_config() -> Dict[str, float]:
-    meta = _DICT_COLLECTIONS["config"]
-    with _LOCKS["config"]:
-        payload = json.loads(meta["file"].read_text(encoding="utf-8"))
-    return payload
+def fetch_config() -> Dict[str, Any]:
+    """``config.json`` atual (um ``stat`` por chamada); compartilhado entre chamadas, nao mutar o retorno."""
+    return _load_dict("config")
 
 
 def append_audit(action: str, payload: dict) -> None:
@@ -263,33 +656,134 @@ def append_audit(action: str, payload: dict) -> None:
             handle.write("\n")
 
 
-def generate_id(prefix: str, existing: Iterable[str]) -> str:
-    return next_id(prefix, existing)
+def iter_audit(action: Optional[str] = None) -> Iterator[dict]:
+    """Eventos do log de auditoria em ordem de gravacao, opcionalmente so de uma acao."""
+    with _AUDIT_LOCK:
+        lines = _AUDIT_FILE.read_text(encoding="utf-8").splitlines()
+    for line in lines:
+        if not line.strip():
+            continue
+        event = json.loads(line)
+        if action is None or event.get("action") == action:
+            yield event
+
+
+# Prefixo de ID -> colecao que o usa; a sequencia comeca no maior ID ja gravado.
+ID_PREFIXES = {
+    "P": "persons",
+    "S": "students",
+    "F": "families",
+    "V": "volunteers",
+    "E": "relationships",
+    "SV": "services",
+}
+
+
+@contextmanager
+def _exclusive(handle: Any) -> Iterator[None]:
+    """Trava o arquivo entre processos (workers do uvicorn) enquanto o bloco roda."""
+    if fcntl is not None:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+    else:
+        handle.seek(0)
+        msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+    try:
+        yield
+    finally:
+        if fcntl is not None:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+        else:
+            handle.seek(0)
+            msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def reserve_ids(prefix: str, count: int = 1) -> List[str]:
+    """Reserva ``count`` IDs consecutivos do prefixo de forma atomica, sem varrer a colecao.
+
+    O ultimo numero emitido por prefixo fica em ``sequences.json``, lido e
+    regravado sob trava de thread e de arquivo; assim a reserva sobrevive a
+    reinicios e nao repete IDs entre processos. Um prefixo novo (ou um arquivo
+    corrompido) recomeca do maior ID gravado na colecao; IDs ja usados por
+    registros gravados com ID explicito sao pulados.
+    """
+    if prefix not in ID_PREFIXES:
+        raise ValueError(f"prefixo_desconhecido:{prefix}")
+    if count <= 0:
+        return []
+    collection = ID_PREFIXES[prefix]
+    meta = _DICT_COLLECTIONS["sequences"]
+    with _LOCKS["sequences"], meta["file"].open("r+", encoding="utf-8") as handle, _exclusive(handle):
+        try:
+            sequences = json.loads(handle.read() or "{}").get("sequences", {})
+        except json.JSONDecodeError:
+            sequences = {}
+        last = sequences.get(prefix)
+        if not isinstance(last, int):
+            last = highest_number(prefix, (row[_PRIMARY_KEYS[collection]] for row in _load_rows(collection)))
+        ids: List[str] = []
+        while len(ids) < count:
+            candidates = [format_id(prefix, last + offset) for offset in range(1, count - len(ids) + 1)]
+            last += len(candidates)
+            taken = get_records(collection, candidates)
+            ids.extend(candidate for candidate in candidates if candidate not in taken)
+        sequences[prefix] = last
+        handle.seek(0)
+        handle.truncate()
+        handle.write(json.dumps({"sequences": sequences}, indent=2, ensure_ascii=False))
+        handle.flush()
+        os.fsync(handle.fileno())
+    return ids
+
+
+def reserve_id(prefix: str) -> str:
+    return reserve_ids(prefix, 1)[0]
 
 
 __all__ = [
+    "ID_PREFIXES",
     "append_audit",
     "append_assignment",
+    "collection_fields",
+    "collection_version",
+    "ensure_indexed",
     "fetch_config",
     "fetch_zones",
-    "generate_id",
+    "family_zones",
+    "get_families_many",
     "get_family",
     "get_person",
+    "get_records",
+    "get_service_cache",
+    "iter_audit",
     "get_student",
+    "get_students_many",
     "get_volunteer",
+    "iter_records",
     "list_assignments",
     "list_families",
+    "list_family_services",
     "list_persons",
     "list_relationships",
     "list_services_cache",
+    "list_stale_services",
     "list_students",
     "list_volunteers",
+    "page_records",
+    "register_index",
+    "reindex",
+    "reserve_id",
+    "reserve_ids",
     "resolve_zone",
     "remove_assignments_for_student",
+    "upsert_families_many",
     "upsert_family",
     "upsert_person",
     "upsert_relationship",
     "upsert_service_cache",
+    "upsert_service_cache_many",
     "upsert_student",
     "upsert_volunteer",
+    "upsert_volunteers_many",
+    "volunteer_loads",
+    "zone_records",
 ]
@@ -1,7 +1,7 @@
 """Utilitarios gerais (geo, id, texto)."""
 
 from .geo import haversine_km
-from .idgen import next_id
+from .idgen import format_id, highest_number
 from .strings import normalize_zone_name
 
-__all__ = ["haversine_km", "next_id", "normalize_zone_name"]
+__all__ = ["format_id", "haversine_km", "highest_number", "normalize_zone_name"]
@@ -12,12 +12,17 @@ def _parse_numeric(identifier: str, prefix: str) -> int:
     return 0
 
 
-def next_id(prefix: str, existing_ids: Iterable[str]) -> str:
-    """Retorna proximo ID com zero padding (ex: prefix= S -> S0004)."""
+def format_id(prefix: str, number: int) -> str:
+    """ID com zero padding (ex: prefix= S, 4 -> S0004)."""
+    return f"{prefix}{number:04d}"
+
+
+def highest_number(prefix: str, existing_ids: Iterable[str]) -> int:
+    """Maior sufixo numerico entre os IDs com o prefixo (0 se nenhum)."""
     highest = 0
     for identifier in existing_ids:
         highest = max(highest, _parse_numeric(identifier, prefix))
-    return f"{prefix}{highest + 1:04d}"
+    return highest
 
 
-__all__ = ["next_id"]
+__all__ = ["format_id", "highest_number"]
@@ -0,0 +1,74 @@
+"""Sketch de quantis com erro relativo limitado que aceita insercao e remocao."""
+
+from __future__ import annotations
+
+import math
+from typing import Dict, Optional
+
+
+class QuantileSketch:
+    """Histograma em baldes logaritmicos (estilo DDSketch) para valores nao negativos.
+
+    Cada valor cai no balde ``ceil(log_gamma(valor))``; qualquer quantil sai com
+    erro relativo de no maximo ``relative_accuracy``. Inserir e remover custam
+    O(1) e a memoria cresce com a faixa de valores, nao com a quantidade.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01) -> None:
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self._buckets: Dict[int, int] = {}
+        self._zeros = 0
+        self.count = 0
+        self.total = 0.0
+
+    def _bucket(self, value: float) -> int:
+        return math.ceil(math.log(value) / self._log_gamma)
+
+    def add(self, value: float) -> None:
+        if value <= 0:
+            self._zeros += 1
+        else:
+            bucket = self._bucket(value)
+            self._buckets[bucket] = self._buckets.get(bucket, 0) + 1
+        self.count += 1
+        self.total += value
+
+    def remove(self, value: float) -> None:
+        if value <= 0:
+            if not self._zeros:
+                return
+            self._zeros -= 1
+        else:
+            bucket = self._bucket(value)
+            remaining = self._buckets.get(bucket, 0) - 1
+            if remaining < 0:
+                return
+            if remaining:
+                self._buckets[bucket] = remaining
+            else:
+                del self._buckets[bucket]
+        self.count -= 1
+        self.total -= value
+        if not self.count:
+            self.total = 0.0
+
+    def mean(self) -> Optional[float]:
+        return self.total / self.count if self.count else None
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self._zeros
+        if rank < seen:
+            return 0.0
+        for bucket in sorted(self._buckets):
+            seen += self._buckets[bucket]
+            if rank < seen:
+                # Ponto medio do balde (gamma^(i-1), gamma^i]: erro relativo <= accuracy.
+                return 2 * self._gamma**bucket / (self._gamma + 1)
+        return 2 * self._gamma ** max(self._buckets) / (self._gamma + 1)
+
+
+__all__ = ["QuantileSketch"]
@@ -0,0 +1,83 @@
+"""Confere que ``GET /family/{id}`` comprimido continua revalidando servicos vencidos.
+
+Copia ``app/`` e ``data/`` para um diretorio temporario (os arquivos reais nao
+sao tocados), marca os servicos de uma familia como vencidos e envia
+``--requests`` GETs com ``Accept-Encoding: gzip`` (o segundo em diante com
+``If-None-Match``). Falha (codigo 1) se alguma chamada nao agendar
+``refresh_family_if_stale`` ou se alguma entrada continuar ``stale`` no fim.
+
+Uso, a partir de ``Backend/``::
+
+    python scripts/check_family_revalidation.py --family F0001
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def run(family_id: str, requests: int) -> int:
+    with tempfile.TemporaryDirectory() as workdir:
+        shutil.copytree(BACKEND_DIR / "app", Path(workdir) / "app", ignore=shutil.ignore_patterns("__pycache__"))
+        shutil.copytree(BACKEND_DIR / "data", Path(workdir) / "data")
+        services_file = Path(workdir) / "data" / "services_cache.json"
+        payload = json.loads(services_file.read_text(encoding="utf-8"))
+        for row in payload["services"]:
+            if row["family_id"] == family_id:
+                row["fetched_at"] = "2000-01-01T00:00:00+00:00"
+        services_file.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+
+        sys.path.insert(0, workdir)
+        from fastapi.testclient import TestClient
+
+        from app.main import app
+        from app.routers import families
+
+        scheduled = []
+        refresh = families.refresh_family_if_stale
+
+        def counting_refresh(target: str) -> None:
+            scheduled.append(target)
+            refresh(target)
+
+        families.refresh_family_if_stale = counting_refresh
+        client = TestClient(app)
+        headers = {"accept-encoding": "gzip"}
+        statuses = []
+        for _ in range(requests):
+            response = client.get(f"/family/{family_id}", headers=headers)
+            statuses.append(response.status_code)
+            headers = {"accept-encoding": "gzip", "if-none-match": response.headers.get("etag", "")}
+        services = client.get(f"/family/{family_id}/services").json()["services"]
+
+    stale = sorted(source for source, entry in services.items() if entry["stale"])
+    print(f"respostas: {statuses}")
+    print(f"revalidacoes agendadas: {len(scheduled)} de {requests}")
+    print(f"fontes ainda vencidas: {stale or 'nenhuma'}")
+    failures = []
+    if len(scheduled) != requests:
+        failures.append("chamada comprimida sem revalidacao agendada")
+    if stale:
+        failures.append("servicos continuam vencidos")
+    for failure in failures:
+        print(f"FALHA: {failure}")
+    return 1 if failures else 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--family", default="F0001", help="Familia cujos servicos serao vencidos.")
+    parser.add_argument("--requests", type=int, default=3, help="GETs comprimidos enviados.")
+    args = parser.parse_args()
+    sys.exit(run(args.family, args.requests))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+"""Teste de carga de ``/insights/*`` contra um servidor de completions falso local.
+
+Sobe um endpoint ``/v1/chat/completions`` falso (uvicorn, em uma porta livre)
+que responde apos ``--latency`` segundos e registra quantas chamadas estao em
+andamento e por quantas conexoes TCP distintas elas chegaram. Em seguida
+mede ``GET /students`` e ``GET /volunteers`` sozinhos (linha de base) e depois
+enquanto ``--requests`` chamadas simultaneas a ``POST /insights/student`` e
+``POST /insights/family`` esperam o provedor lento, tudo na propria aplicacao
+(via ASGI, sem rede). Confere que:
+
+- o pico de chamadas simultaneas ao provedor nao passa de ``llm_max_concurrency``;
+- as conexoes abertas nao passam de ``llm_max_connections`` (keep-alive reaproveitado);
+- todas as respostas vieram do provedor (``source: "openai"``), sem fallback;
+- o p95 das leituras sob carga fica abaixo de ``--max-slowdown`` vezes o p95 da
+  linha de base mais ``--slack-ms``.
+
+As leituras pedem ``Accept-Encoding: identity`` para que cada uma execute a rota
+em vez de sair do cache de corpos comprimidos.
+
+Uso, a partir de ``Backend/``::
+
+    python scripts/loadtest_insights.py --requests 200 --latency 0.5
+
+Cada execucao usa um ``OPENAI_MODEL`` proprio, que entra na chave do cache de
+insights, entao nenhuma resposta vem do cache. As chamadas geram linhas de
+auditoria e entradas no cache como qualquer outro uso da API.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import secrets
+import socket
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Set, Tuple
+
+import httpx
+import uvicorn
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+class FakeCompletions:
+    """App ASGI que imita o endpoint de chat completions e mede a carga recebida."""
+
+    def __init__(self, latency: float) -> None:
+        self.latency = latency
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.calls = 0
+        self.connections: Set[Tuple[str, int]] = set()
+
+    async def __call__(self, scope: Dict[str, Any], receive, send) -> None:
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+        while (await receive()).get("more_body"):
+            pass
+        self.calls += 1
+        self.connections.add(tuple(scope["client"]))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+        finally:
+            self.in_flight -= 1
+        body = (
+            b'{"choices": [{"message": {"role": "assistant", '
+            b'"content": "Insight gerado pelo provedor falso. Como podemos apoiar a familia?"}}]}'
+        )
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def _start_fake(fake: FakeCompletions, port: int) -> Tuple[uvicorn.Server, asyncio.Task]:
+    server = uvicorn.Server(uvicorn.Config(fake, host="127.0.0.1", port=port, log_level="warning"))
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    return server, task
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+READ_ROUTES = ("/students", "/volunteers")
+
+
+async def _reads(client: httpx.AsyncClient, count: int, concurrency: int) -> Dict[str, List[float]]:
+    """``count`` GETs por rota de leitura, ``concurrency`` por vez, com a latencia de cada um."""
+    latencies: Dict[str, List[float]] = {route: [] for route in READ_ROUTES}
+
+    async def worker(route: str, queue: List[int]) -> None:
+        while queue:
+            queue.pop()
+            started = time.perf_counter()
+            response = await client.get(route, headers={"accept-encoding": "identity"})
+            response.raise_for_status()
+            latencies[route].append(time.perf_counter() - started)
+
+    for route in READ_ROUTES:
+        queue = list(range(count))
+        await asyncio.gather(*(worker(route, queue) for _ in range(max(1, concurrency))))
+    return latencies
+
+
+def _summary(values: List[float]) -> str:
+    return f"p50 {statistics.median(values) * 1000:.0f} ms, p95 {_percentile(values, 0.95) * 1000:.0f} ms"
+
+
+async def run(
+    requests: int,
+    latency: float,
+    reads: int,
+    read_concurrency: int,
+    max_slowdown: float,
+    slack_ms: float,
+) -> int:
+    fake = FakeCompletions(latency)
+    port = _free_port()
+    # Precisam estar definidos antes de importar a aplicacao (lidos na importacao).
+    os.environ["OPENAI_URL"] = f"http://127.0.0.1:{port}/v1/chat/completions"
+    os.environ["OPENAI_API_KEY"] = "loadtest"
+    os.environ["OPENAI_MODEL"] = f"loadtest-{secrets.token_hex(4)}"
+    sys.path.insert(0, str(BACKEND_DIR))
+    from app.main import app
+    from app.services.llm_client import close_client
+    from app.storage import fetch_config, list_families, list_students
+
+    config = fetch_config()
+    max_concurrency = int(config.get("llm_max_concurrency", 8))
+    max_connections = int(config.get("llm_max_connections", 20))
+    subjects = [("student", student.id) for student in list_students()]
+    subjects += [("family", family.id) for family in list_families()]
+    if requests > len(subjects):
+        print(f"aviso: {requests} chamadas para {len(subjects)} alunos/familias; repeticoes vem do cache")
+
+    server, server_task = await _start_fake(fake, port)
+    latencies: List[float] = []
+    sources: Dict[str, int] = {}
+
+    async def call(client: httpx.AsyncClient, kind: str, subject_id: str) -> None:
+        started = time.perf_counter()
+        response = await client.post(f"/insights/{kind}", json={f"{kind}_id": subject_id})
+        latencies.append(time.perf_counter() - started)
+        source = response.json().get("source", f"http_{response.status_code}")
+        sources[source] = sources.get(source, 0) + 1
+
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://app", timeout=60) as client:
+            # Aquece caches e indices para a linha de base nao pagar a primeira leitura dos arquivos.
+            await _reads(client, 2, 1)
+            baseline = await _reads(client, reads, read_concurrency)
+            started = time.perf_counter()
+            insight_load = asyncio.gather(
+                *(call(client, *subjects[index % len(subjects)]) for index in range(requests))
+            )
+            # Deixa as chamadas chegarem ao provedor antes de medir.
+            while fake.in_flight < min(requests, max_concurrency) and not insight_load.done():
+                await asyncio.sleep(0.005)
+            loaded = await _reads(client, reads, read_concurrency)
+            overlapped = not insight_load.done()
+            await insight_load
+            elapsed = time.perf_counter() - started
+    finally:
+        await close_client()
+        server.should_exit = True
+        await server_task
+
+    print(f"chamadas: {requests} em {elapsed:.2f}s ({requests / elapsed:.1f}/s)")
+    print(f"latencia dos insights: {_summary(latencies)}")
+    print(f"origens: {sources}")
+    print(f"provedor: {fake.calls} chamadas, pico simultaneo {fake.max_in_flight} (limite {max_concurrency})")
+    print(f"conexoes TCP: {len(fake.connections)} (limite {max_connections})")
+    failures = []
+    for route in READ_ROUTES:
+        bound = _percentile(baseline[route], 0.95) * max_slowdown + slack_ms / 1000
+        print(f"GET {route}: sozinho {_summary(baseline[route])}; com insights {_summary(loaded[route])}")
+        if _percentile(loaded[route], 0.95) > bound:
+            failures.append(f"p95 de GET {route} sob carga acima de {bound * 1000:.0f} ms")
+    if not overlapped:
+        failures.append("chamadas de insight terminaram antes das leituras; aumente --requests ou --latency")
+
+    if fake.max_in_flight > max_concurrency:
+        failures.append("pico de chamadas simultaneas acima de llm_max_concurrency")
+    if len(fake.connections) > max_connections:
+        failures.append("conexoes acima de llm_max_connections")
+    if fake.calls and len(fake.connections) >= fake.calls > max_concurrency:
+        failures.append("nenhuma conexao reaproveitada")
+    if set(sources) - {"openai", "cache"}:
+        failures.append("respostas fora do provedor (fallback ou erro)")
+    for failure in failures:
+        print(f"FALHA: {failure}")
+    return 1 if failures else 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200, help="Chamadas simultaneas a /insights/*.")
+    parser.add_argument("--latency", type=float, default=0.5, help="Atraso do provedor falso, em segundos.")
+    parser.add_argument("--reads", type=int, default=20, help="GETs por rota de leitura em cada fase.")
+    parser.add_argument("--read-concurrency", type=int, default=2, help="GETs de leitura simultaneos por rota.")
+    parser.add_argument("--max-slowdown", type=float, default=2.0, help="Fator maximo sobre o p95 da linha de base.")
+    parser.add_argument("--slack-ms", type=float, default=50.0, help="Folga absoluta somada ao limite do p95.")
+    args = parser.parse_args()
+    sys.exit(
+        asyncio.run(
+            run(args.requests, args.latency, args.reads, args.read_concurrency, args.max_slowdown, args.slack_ms)
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
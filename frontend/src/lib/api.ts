@@ -6,6 +6,7 @@ import type {
   InsightResponse,
   NetworkResponse,
   StudentProfile,
+  StudentWithRelations,
   VolunteerProfile,
 } from "../types/models";
 
@@ -85,6 +86,16 @@ export const fetchStudents = async (zone: string) => {
   return response.data.students;
 };
 
+export const fetchStudentsWithFamily = async (zone: string) => {
+  const response = await api.get<{ students: StudentWithRelations[] }>(
+    `/students`,
+    {
+      params: { zone, expand: "family" },
+    },
+  );
+  return response.data.students;
+};
+
 export const fetchAssignments = async (zone: string) => {
   const response = await api.get<{ assignments: AssignmentRecord[] }>(
     `/assignments`,
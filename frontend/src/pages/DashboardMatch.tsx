@@ -7,7 +7,6 @@ import {
 } from "react";
 import {
   useMutation,
-  useQueries,
   useQuery,
   useQueryClient,
 } from "@tanstack/react-query";
@@ -17,9 +16,8 @@ import { useNavigate } from "react-router-dom";
 
 import {
   fetchAssignments,
-  fetchFamily,
   fetchStudentNetwork,
-  fetchStudents,
+  fetchStudentsWithFamily,
   generateFamilyInsight,
   generateStudentInsight,
   runAssignment,
@@ -32,7 +30,7 @@ import { useCasesStore } from "../store/useCases";
 import MatchDeck, { DeckItem } from "../components/MatchDeck";
 import CapacityBar from "../components/CapacityBar";
 import FamilyQuickView from "../components/FamilyQuickView";
-import type { StudentProfile } from "../types/models";
+import type { FamilyProfile, StudentProfile } from "../types/models";
 import logoImage from "../assets/logo.png";
 
 const DashboardMatch: React.FC = () => {
@@ -54,8 +52,8 @@ const DashboardMatch: React.FC = () => {
 
   // --- Dados base
   const studentsQuery = useQuery({
-    queryKey: ["students", zone],
-    queryFn: () => fetchStudents(zone),
+    queryKey: ["students", zone, "family"],
+    queryFn: () => fetchStudentsWithFamily(zone),
     enabled: Boolean(zone),
     staleTime: 30_000,
   });
@@ -78,26 +76,11 @@ const DashboardMatch: React.FC = () => {
   );
   const hasStudents = studentsData.length > 0;
 
-  const familyIds = useMemo(() => {
-    const ids = new Set<string>();
-    studentsData.forEach((s) => ids.add(s.family_id));
-    return Array.from(ids).slice(0, 60);
-  }, [studentsData]);
-
-  const familiesQueries = useQueries({
-    queries: familyIds.map((familyId) => ({
-      queryKey: ["family", familyId],
-      queryFn: () => fetchFamily(familyId),
-      staleTime: 60_000,
-      enabled: Boolean(familyId),
-    })),
-  });
-
   const familiesById = useMemo(() => {
-    const map: Record<string, Awaited<ReturnType<typeof fetchFamily>>> = {};
-    for (const q of familiesQueries) if (q.data) map[q.data.id] = q.data;
+    const map: Record<string, FamilyProfile> = {};
+    for (const s of studentsData) if (s.family) map[s.family.id] = s.family;
     return map;
-  }, [familiesQueries]);
+  }, [studentsData]);
 
   const studentsById = useMemo(() => {
     const map = new Map<string, StudentProfile>();
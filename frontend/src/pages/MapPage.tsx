@@ -1,11 +1,12 @@
 import { useMemo } from "react";
-import { useQueries, useQuery } from "@tanstack/react-query";
+import { useQuery } from "@tanstack/react-query";
 import { useNavigate } from "react-router-dom";
 
-import { fetchAssignments, fetchFamily, fetchStudents } from "../lib/api";
+import { fetchAssignments, fetchStudentsWithFamily } from "../lib/api";
 import buildSuggestions from "../domain/suggestions";
 import MapView from "../components/MapView";
 import { useVolunteerStore } from "../store/useVolunteer";
+import type { FamilyProfile } from "../types/models";
 
 const MapPage = () => {
   const volunteer = useVolunteerStore((state) => state.volunteer);
@@ -13,8 +14,8 @@ const MapPage = () => {
   const zone = volunteer?.zone ?? "";
 
   const studentsQuery = useQuery({
-    queryKey: ["students", zone],
-    queryFn: () => fetchStudents(zone),
+    queryKey: ["students", zone, "family"],
+    queryFn: () => fetchStudentsWithFamily(zone),
     enabled: Boolean(zone),
   });
 
@@ -24,30 +25,15 @@ const MapPage = () => {
     enabled: Boolean(zone),
   });
 
-  const familyIds = useMemo(() => {
-    const ids = new Set<string>();
-    studentsQuery.data?.slice(0, 30).forEach((student) => ids.add(student.family_id));
-    return Array.from(ids);
-  }, [studentsQuery.data]);
-
-  const familiesQueries = useQueries({
-    queries: familyIds.map((familyId) => ({
-      queryKey: ["family", familyId],
-      queryFn: () => fetchFamily(familyId),
-      enabled: Boolean(familyId),
-      staleTime: 60_000,
-    })),
-  });
-
   const familiesById = useMemo(() => {
-    const map: Record<string, Awaited<ReturnType<typeof fetchFamily>>> = {};
-    familiesQueries.forEach((query) => {
-      if (query.data) {
-        map[query.data.id] = query.data;
+    const map: Record<string, FamilyProfile> = {};
+    studentsQuery.data?.forEach((student) => {
+      if (student.family) {
+        map[student.family.id] = student.family;
       }
     });
     return map;
-  }, [familiesQueries]);
+  }, [studentsQuery.data]);
 
   if (!volunteer) {
     return (
@@ -123,6 +123,12 @@ export type FamilyProfile = {
   warm_notes?: string;
 };
 
+export type StudentWithRelations = StudentProfile & {
+  family?: FamilyProfile | null;
+  assignment?: AssignmentRecord | null;
+  volunteer?: VolunteerProfile | null;
+};
+
 export type NetworkNode = {
   id: string;
   type: string;